@@ -0,0 +1,81 @@
+"""Enemy AI benchmark: decisions every step versus level-of-detail tiers and a budget.
+
+Usage: python -m bench.ai [--steps N] [--enemies 100,300,1000,3000] [--budget MS] [--obstacles N]
+
+Each scenario runs tank-shooter headless with the game's FrameProfiler on
+while the player sweeps across the map. Three schedules are compared:
+
+* ``every step``: every enemy makes a decision every step (one tier).
+* ``tiers``: far enemies decide less often (AI_TIERS), with no budget.
+* ``budget``: the tiers within ``--budget`` ms of decisions per step.
+
+Reported per step: the p50/p99/max of the profiler's ai phase, the
+simulation step as a whole (update, pathfinding and ai), and the mean
+decisions made and deferred from the scheduler's counters.
+"""
+import argparse
+import importlib
+import math
+import os
+import random
+import sys
+
+os.environ.setdefault('SDL_VIDEODRIVER', 'dummy')
+
+import numpy as np
+
+from bench.pathfinding import SweepKeys
+from engine.profiler import FrameProfiler
+
+OTHER = os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir, 'other')
+STEP_PHASES = ('update', 'pathfinding', 'ai')
+
+
+def measure(tank, enemy_count, obstacle_count, steps, seed, tiers, budget):
+    random.seed(seed)
+    tank.AI_TIERS = tiers
+    profiler = FrameProfiler(tank.PHASES, window=steps, enabled=True)
+    game = tank.TankShooter(enemy_count, obstacle_count, profiler=profiler, ai_budget=budget)
+    player = game.player
+    player.health = player.max_health = 10**9
+    keys = SweepKeys(player.controls)
+    for _ in range(steps):
+        keys.step += 1
+        profiler.start_frame()
+        game.step(keys)
+        profiler.lap('update')
+        profiler.end_frame()
+    recent = profiler.recent()
+    ai = recent[:, profiler.columns.index('ai')]
+    step = sum(recent[:, profiler.columns.index(phase)] for phase in STEP_PHASES)
+    return ai, step, game.ai.total_thought / steps, game.ai.total_deferred / steps
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--steps', type=int, default=600)
+    parser.add_argument('--enemies', default='100,300,1000,3000')
+    parser.add_argument('--budget', type=float, default=None, help='AI budget in ms (default: the game\'s)')
+    parser.add_argument('--obstacles', type=int, default=30)
+    parser.add_argument('--seed', type=int, default=1)
+    args = parser.parse_args()
+
+    sys.path.insert(0, OTHER)
+    tank = importlib.import_module('tank-shooter')
+    tiers = tank.AI_TIERS
+    budget = tank.AI_BUDGET_MS if args.budget is None else args.budget
+    schedules = (('every step', ((math.inf, 1),), None), ('tiers', tiers, None), ('budget', tiers, budget))
+    print(f"{args.steps} steps, {args.obstacles} obstacles, tiers {tiers[:-1]}, budget {budget} ms")
+    print(f"{'enemies':>8} {'schedule':<11} {'ai p50':>7} {'p99':>7} {'max ms':>7} {'step p50':>9} {'p99 ms':>7} "
+          f"{'thought':>8} {'deferred':>9}")
+    for count in (int(value) for value in args.enemies.split(',')):
+        for name, schedule, limit in schedules:
+            ai, step, thought, deferred = measure(tank, count, args.obstacles, args.steps, args.seed, schedule, limit)
+            p50, p99 = np.percentile(ai, (50, 99))
+            print(f"{count:8d} {name:<11} {p50:7.3f} {p99:7.3f} {ai.max():7.3f} {np.percentile(step, 50):9.3f} "
+                  f"{np.percentile(step, 99):7.3f} {thought:8.1f} {deferred:9.1f}")
+    tank.AI_TIERS = tiers
+
+
+if __name__ == '__main__':
+    main()
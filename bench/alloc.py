@@ -0,0 +1,144 @@
+"""Entity churn benchmark: list.remove versus pooled, swap-removed containers.
+
+Usage: python -m bench.alloc [--frames N] [--counts 100,1000,...]
+
+Every frame spawns a batch of bullets, moves them all and removes the ones
+that left the playfield or used up their (random) lifetime, standing in for
+hits. The spawn rate keeps about ``count`` bullets in flight. This is the pattern tank-shooter and
+spacegame run each tick. Three containers are compared:
+
+* ``list``: a fresh object per bullet and ``list.remove`` on a copy, as the
+  games originally did.
+* ``pooled``: ``EntityList`` with deferred ``discard`` and an ``ObjectPool``,
+  as tank-shooter keeps its enemies.
+* ``store``: the NumPy ``EntityStore`` spacegame uses.
+
+Timing runs first without tracemalloc. A second pass under tracemalloc
+reports the peak allocated above the steady-state baseline within a frame,
+and how much the heap grew over the whole run. ``created`` is the number of
+bullet objects built; the pooled column stops growing once the pool covers
+the peak in flight.
+"""
+import argparse
+import random
+import time
+import tracemalloc
+
+import numpy as np
+
+from engine.entities import EntityList, EntityStore, ObjectPool
+
+WIDTH, HEIGHT = 800, 600
+MEAN_LIFE = 40
+
+
+class Bullet:
+    created = 0
+
+    def __init__(self, x=0.0, y=0.0, dy=0.0, life=0):
+        Bullet.created += 1
+        self.reset(x, y, dy, life)
+
+    def reset(self, x, y, dy, life):
+        self.x = x
+        self.y = y
+        self.dy = dy
+        self.life = life
+
+
+def spawn_batch(rng, count):
+    return [(rng.uniform(0, WIDTH), HEIGHT, -rng.uniform(4, 12), int(rng.expovariate(1 / MEAN_LIFE)))
+            for _ in range(count)]
+
+
+def list_frame(bullets, batch):
+    # The original pattern: new objects, remove() from a copy of the list
+    for x, y, dy, life in batch:
+        bullets.append(Bullet(x, y, dy, life))
+    for bullet in bullets[:]:
+        bullet.y += bullet.dy
+        bullet.life -= 1
+        if bullet.y < 0 or bullet.life < 0:
+            bullets.remove(bullet)
+
+
+def pooled_frame(bullets, batch):
+    for x, y, dy, life in batch:
+        bullets.spawn(x, y, dy, life)
+    for bullet in bullets:
+        bullet.y += bullet.dy
+        bullet.life -= 1
+        if bullet.y < 0 or bullet.life < 0:
+            bullets.discard(bullet)
+    bullets.compact()
+
+
+def store_frame(store, batch):
+    for x, y, dy, life in batch:
+        store.add(x=x, y=y, speed=dy, life=life)
+    store.y += store.speed
+    store.life -= 1
+    store.alive &= (store.y >= 0) & (store.life >= 0)
+    store.compact()
+
+
+def make_batches(rng, count, frames):
+    # The same spawns are replayed into every container
+    spawn = max(1, round(count / (MEAN_LIFE * 0.8)))
+    return [spawn_batch(rng, spawn) for _ in range(frames)]
+
+
+def containers():
+    return [
+        ('list', list_frame, list),
+        ('pooled', pooled_frame, lambda: EntityList(ObjectPool(Bullet))),
+        ('store', store_frame, lambda: EntityStore(life=np.int64)),
+    ]
+
+
+def run(frame, container, batches, traced=False):
+    # Returns ms per frame, or (peak over baseline, retained growth) when traced
+    if traced:
+        tracemalloc.start()
+        start_size, _ = tracemalloc.get_traced_memory()
+        peak = 0
+        for batch in batches:
+            tracemalloc.reset_peak()
+            before, _ = tracemalloc.get_traced_memory()
+            frame(container, batch)
+            _, frame_peak = tracemalloc.get_traced_memory()
+            peak = max(peak, frame_peak - before)
+        end_size, _ = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        return peak, end_size - start_size
+    start = time.perf_counter()
+    for batch in batches:
+        frame(container, batch)
+    return (time.perf_counter() - start) / len(batches) * 1000.0
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--frames', type=int, default=300)
+    parser.add_argument('--counts', default='100,1000,5000')
+    parser.add_argument('--seed', type=int, default=1)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    print(f"{'entities':>9} {'container':>10} {'ms/frame':>9} {'peak KiB':>9} {'growth KiB':>11} {'created':>8}")
+    for count in [int(c) for c in args.counts.split(',')]:
+        batches = make_batches(rng, count, args.frames)
+        # Warm up so every container reaches its working size first
+        warm = batches[:args.frames // 3]
+        for name, frame, build in containers():
+            container = build()
+            run(frame, container, warm)
+            Bullet.created = 0
+            ms = run(frame, container, batches)
+            created = Bullet.created
+            peak, growth = run(frame, container, batches, traced=True)
+            print(f"{count:9d} {name:>10} {ms:9.3f} {peak / 1024:9.1f} {growth / 1024:11.1f} {created:8d}")
+
+
+if __name__ == '__main__':
+    main()
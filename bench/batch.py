@@ -0,0 +1,197 @@
+"""Batch runner: thousands of seeded headless spacegame episodes across processes.
+
+Usage: python -m bench.batch [--episodes N] [--workers N] [--policy autopilot|random]
+                             [--spawn-interval STEPS] [--enemy-speed MIN,MAX]
+                             [--max-steps N] [--output episodes.jsonl] [--summary summary.json]
+                             [--scaling]
+
+Episode ``i`` runs with seed ``--seed + i`` under the chosen policy until
+game over (or ``--max-steps``), with nothing drawn. Episodes are spread
+over a ``ProcessPoolExecutor``; each worker imports the game, applies the
+difficulty settings and plays a short warm-up episode once, in its
+initializer, so the episodes themselves pay no start-up cost. They are
+handed out in chunks and come back in seed order as they finish.
+
+Every episode record (seed, score, lives lost, steps survived, enemies
+spawned and killed) is streamed to ``--output`` as a JSON line. The
+aggregate (mean, standard deviation and percentiles of each statistic,
+plus throughput) is printed and written to ``--summary``. ``--scaling``
+instead runs the batch at 1, 2, 4, ... workers up to ``--workers`` and
+reports episodes per second at each.
+"""
+import argparse
+import json
+import os
+import random
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+os.environ.setdefault('SDL_VIDEODRIVER', 'dummy')
+
+import numpy as np
+
+import spacegame
+
+STATS = ('score', 'lives_lost', 'steps', 'spawned', 'killed')
+WARMUP_STEPS = 600
+
+_settings = None
+
+
+class RandomPolicy:
+    # Holds a random combination of the held keys for a random number of steps
+    def __init__(self, seed=None):
+        self.random = random.Random(seed)
+        self.mask = 0
+        self.remaining = 0
+
+    def inputs(self, game):
+        if self.remaining <= 0:
+            self.mask = self.random.getrandbits(len(spacegame.INPUTS.held))
+            self.remaining = self.random.randint(5, 60)
+        self.remaining -= 1
+        return self.mask
+
+
+def make_policy(name, seed):
+    if name == 'random':
+        return RandomPolicy(seed)
+    return spacegame.AutopilotKeys(seed)
+
+
+def init_worker(settings):
+    # Per-process setup: difficulty settings, then one throwaway episode so
+    # imports, NumPy and the game's caches are warm before timing starts
+    global _settings
+    spacegame.SPAWN_INTERVAL = settings['spawn_interval']
+    spacegame.ENEMY_SPEED = tuple(settings['enemy_speed'])
+    _settings = settings
+    play(None, settings['policy'], WARMUP_STEPS)
+
+
+def play(seed, policy_name, max_steps):
+    game = spacegame.Game(seed, star_count=0)
+    policy = make_policy(policy_name, seed)
+    lives = game.player.lives
+    while not game.game_over and game.steps < max_steps:
+        game.step(policy.inputs(game))
+    return {'seed': seed, 'score': game.player.score, 'lives_lost': lives - max(game.player.lives, 0),
+            'steps': game.steps, 'spawned': game.spawned, 'killed': game.killed,
+            'game_over': game.game_over}
+
+
+def run_episode(seed):
+    return play(seed, _settings['policy'], _settings['max_steps'])
+
+
+class Aggregate:
+    """Folds episode records into per-statistic arrays as they arrive."""
+
+    def __init__(self, stats=STATS):
+        self.stats = stats
+        self.values = {name: [] for name in stats}
+        self.episodes = 0
+        self.finished = 0
+
+    def add(self, record):
+        for name in self.stats:
+            self.values[name].append(record[name])
+        self.episodes += 1
+        self.finished += record['game_over']
+
+    def summary(self, quantiles=(5, 50, 95)):
+        result = {'episodes': self.episodes, 'game_over': self.finished}
+        for name, values in self.values.items():
+            values = np.asarray(values, np.float64)
+            percentiles = np.percentile(values, quantiles) if len(values) else [0.0] * len(quantiles)
+            result[name] = {'mean': float(values.mean()) if len(values) else 0.0,
+                            'std': float(values.std()) if len(values) else 0.0,
+                            **{f"p{q}": float(p) for q, p in zip(quantiles, percentiles)}}
+        return result
+
+
+def run_batch(settings, seeds, workers, sink=None):
+    # Plays every seed and returns (aggregate, seconds); each record goes to
+    # ``sink`` as soon as it is back
+    aggregate = Aggregate()
+    chunksize = max(1, min(64, len(seeds) // (workers * 8)))
+    with ProcessPoolExecutor(workers, initializer=init_worker, initargs=(settings,)) as executor:
+        # Wait until every worker is initialized, so only episodes are timed
+        list(executor.map(time.sleep, [0.01] * workers))
+        start = time.perf_counter()
+        for record in executor.map(run_episode, seeds, chunksize=chunksize):
+            aggregate.add(record)
+            if sink is not None:
+                sink(record)
+        elapsed = time.perf_counter() - start
+    return aggregate, elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--episodes', type=int, default=1000)
+    parser.add_argument('--workers', type=int, default=os.cpu_count())
+    parser.add_argument('--seed', type=int, default=0, help='seed of the first episode')
+    parser.add_argument('--policy', choices=('autopilot', 'random'), default='autopilot')
+    parser.add_argument('--spawn-interval', type=int, default=None, help='steps between enemy spawns')
+    parser.add_argument('--enemy-speed', default=None, help='MIN,MAX enemy speed in pixels per step')
+    parser.add_argument('--max-steps', type=int, default=60 * 60 * 5, help='cap on steps per episode')
+    parser.add_argument('--output', help='write one JSON line per episode to this file')
+    parser.add_argument('--summary', help='write the summary statistics to this JSON file')
+    parser.add_argument('--scaling', action='store_true', help='measure throughput at 1, 2, 4, ... workers')
+    args = parser.parse_args()
+
+    settings = {
+        'policy': args.policy,
+        'max_steps': args.max_steps,
+        'spawn_interval': args.spawn_interval or spacegame.SPAWN_INTERVAL,
+        'enemy_speed': [float(value) for value in args.enemy_speed.split(',')] if args.enemy_speed
+                       else list(spacegame.ENEMY_SPEED),
+    }
+    seeds = list(range(args.seed, args.seed + args.episodes))
+
+    if args.scaling:
+        print(f"{'workers':>7} {'episodes/s':>11} {'steps/s':>11} {'speedup':>8}")
+        counts = []
+        count = 1
+        while count < args.workers:
+            counts.append(count)
+            count *= 2
+        counts.append(args.workers)
+        base = None
+        for count in counts:
+            aggregate, elapsed = run_batch(settings, seeds, count)
+            rate = aggregate.episodes / elapsed
+            base = base or rate
+            steps = sum(aggregate.values['steps']) / elapsed
+            print(f"{count:7d} {rate:11.1f} {steps:11.0f} {rate / base:8.2f}")
+        return
+
+    output = open(args.output, 'w') if args.output else None
+    sink = (lambda record: output.write(json.dumps(record) + '\n')) if output else None
+    aggregate, elapsed = run_batch(settings, seeds, args.workers, sink)
+    if output is not None:
+        output.close()
+
+    summary = aggregate.summary()
+    summary['settings'] = settings
+    summary['workers'] = args.workers
+    summary['seconds'] = elapsed
+    summary['episodes_per_second'] = aggregate.episodes / elapsed
+    summary['steps_per_second'] = sum(aggregate.values['steps']) / elapsed
+    if args.summary:
+        with open(args.summary, 'w') as target:
+            json.dump(summary, target, indent=2)
+
+    print(f"{aggregate.episodes} episodes ({aggregate.finished} ended in game over) on {args.workers} workers "
+          f"in {elapsed:.2f} s: {summary['episodes_per_second']:.1f} episodes/s, "
+          f"{summary['steps_per_second']:.0f} steps/s")
+    print(f"{'statistic':<12} {'mean':>9} {'std':>9} {'p5':>9} {'p50':>9} {'p95':>9}")
+    for name in STATS:
+        values = summary[name]
+        print(f"{name:<12} {values['mean']:9.1f} {values['std']:9.1f} {values['p5']:9.1f} "
+              f"{values['p50']:9.1f} {values['p95']:9.1f}")
+
+
+if __name__ == '__main__':
+    main()
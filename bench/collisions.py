@@ -0,0 +1,185 @@
+"""Bullet/enemy collision benchmark: nested loops versus the spatial hash.
+
+Usage: python -m bench.collisions [--frames N] [--counts 100,1000,...]
+
+Entities are scattered over the 800x600 playfield with the radii spacegame
+uses. For every entity count the same frame is resolved both ways and the
+average time per frame is reported. The hashed pass should stay nearly flat
+per entity while the nested loops grow with bullets x enemies; the
+vectorized column is the NumPy ``close_pairs`` pass spacegame now uses.
+"""
+import argparse
+import math
+import random
+import time
+
+import numpy as np
+
+from engine.spatial import close_pairs, match_first
+
+WIDTH, HEIGHT = 800, 600
+BULLET_RADIUS = 4
+ENEMY_SIZE = 30
+PLAYER_HIT_RADIUS = 20
+CELL_SIZE = 64
+VECTOR_CELL_SIZE = 40
+
+
+class Body:
+    def __init__(self, x, y):
+        self.x = x
+        self.y = y
+
+
+class SpatialHash:
+    """Buckets items by the grid cell their centre falls into.
+
+    The per-object broad phase spacegame used before ``close_pairs``, kept
+    here as the baseline. Items are re-registered every frame: call
+    ``clear()`` and then ``insert()`` each entity. ``query()`` returns the
+    items whose cell overlaps a square of the given radius, so only nearby
+    entities need an exact distance test. Cell buckets are kept between
+    frames and only emptied, which avoids rebuilding the dict every frame.
+    """
+
+    def __init__(self, cell_size=64):
+        self.cell_size = cell_size
+        self.cells = {}
+
+    def clear(self):
+        for bucket in self.cells.values():
+            bucket.clear()
+
+    def insert(self, item, x, y):
+        key = (int(x // self.cell_size), int(y // self.cell_size))
+        bucket = self.cells.get(key)
+        if bucket is None:
+            self.cells[key] = [item]
+        else:
+            bucket.append(item)
+
+    def query(self, x, y, radius):
+        size = self.cell_size
+        cells = self.cells
+        x0 = int((x - radius) // size)
+        x1 = int((x + radius) // size)
+        y0 = int((y - radius) // size)
+        y1 = int((y + radius) // size)
+        found = []
+        for cx in range(x0, x1 + 1):
+            for cy in range(y0, y1 + 1):
+                bucket = cells.get((cx, cy))
+                if bucket:
+                    found.extend(bucket)
+        return found
+
+
+def make_frame(rng, count):
+    bullets = [Body(rng.uniform(0, WIDTH), rng.uniform(0, HEIGHT)) for _ in range(count)]
+    enemies = [Body(rng.uniform(0, WIDTH), rng.uniform(0, HEIGHT)) for _ in range(count)]
+    return bullets, enemies, Body(WIDTH // 2, HEIGHT - 60)
+
+
+def nested_loops(bullets, enemies, player):
+    # The original spacegame collision pass
+    bullets = bullets[:]
+    enemies = enemies[:]
+    hits = 0
+    for bullet in bullets[:]:
+        for enemy in enemies[:]:
+            distance = math.sqrt((bullet.x - enemy.x)**2 + (bullet.y - enemy.y)**2)
+            if distance < BULLET_RADIUS + ENEMY_SIZE//2:
+                bullets.remove(bullet)
+                enemies.remove(enemy)
+                hits += 1
+                break
+    for enemy in enemies[:]:
+        distance = math.sqrt((player.x - enemy.x)**2 + (player.y - enemy.y)**2)
+        if distance < PLAYER_HIT_RADIUS + ENEMY_SIZE//2:
+            enemies.remove(enemy)
+            hits += 1
+    return hits
+
+
+def spatial_hash(grid, bullets, enemies, player):
+    # The same pass as spacegame's main loop
+    grid.clear()
+    for index, enemy in enumerate(enemies):
+        grid.insert(index, enemy.x, enemy.y)
+
+    hit_enemies = set()
+    hits = 0
+    reach = BULLET_RADIUS + ENEMY_SIZE//2
+    for bullet in bullets:
+        target = None
+        for index in grid.query(bullet.x, bullet.y, reach):
+            if index in hit_enemies or (target is not None and index > target):
+                continue
+            enemy = enemies[index]
+            if (bullet.x - enemy.x)**2 + (bullet.y - enemy.y)**2 < reach * reach:
+                target = index
+        if target is not None:
+            hit_enemies.add(target)
+            hits += 1
+
+    reach = PLAYER_HIT_RADIUS + ENEMY_SIZE//2
+    for index in grid.query(player.x, player.y, reach):
+        if index in hit_enemies:
+            continue
+        enemy = enemies[index]
+        if (player.x - enemy.x)**2 + (player.y - enemy.y)**2 < reach * reach:
+            hit_enemies.add(index)
+            hits += 1
+    return hits
+
+
+def vectorized(arrays, player):
+    # The batch pass over NumPy arrays
+    bx, by, br, ex, ey, er = arrays
+    enemy_alive = np.ones(len(ex), bool)
+    bullet_hits, enemy_hits = match_first(*close_pairs(bx, by, br, ex, ey, er, VECTOR_CELL_SIZE))
+    enemy_alive[enemy_hits] = False
+    hits = len(bullet_hits)
+    reach = PLAYER_HIT_RADIUS + er
+    rammed = enemy_alive & ((ex - player.x)**2 + (ey - player.y)**2 < reach * reach)
+    return hits + int(np.count_nonzero(rammed))
+
+
+def time_frames(func, frames, *args):
+    start = time.perf_counter()
+    for _ in range(frames):
+        result = func(*args)
+    return (time.perf_counter() - start) / frames * 1000.0, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--frames', type=int, default=20)
+    parser.add_argument('--counts', default='50,100,250,500,1000,2000,4000')
+    parser.add_argument('--brute-limit', type=int, default=2000,
+                        help='skip the nested loops above this entity count')
+    parser.add_argument('--seed', type=int, default=1)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    grid = SpatialHash(CELL_SIZE)
+    print(f"{'entities':>9} {'nested ms':>10} {'hashed ms':>10} {'hashed us/entity':>17} {'vector ms':>10}")
+    for count in [int(c) for c in args.counts.split(',')]:
+        bullets, enemies, player = make_frame(rng, count)
+        hashed_ms, hashed_hits = time_frames(spatial_hash, args.frames, grid, bullets, enemies, player)
+        arrays = (np.array([b.x for b in bullets]), np.array([b.y for b in bullets]), np.full(count, float(BULLET_RADIUS)),
+                  np.array([e.x for e in enemies]), np.array([e.y for e in enemies]), np.full(count, float(ENEMY_SIZE//2)))
+        vector_ms, vector_hits = time_frames(vectorized, args.frames, arrays, player)
+        assert vector_hits == hashed_hits, (vector_hits, hashed_hits)
+        if count <= args.brute_limit:
+            nested_ms, nested_hits = time_frames(nested_loops, max(1, args.frames // 10), bullets, enemies, player)
+            assert nested_hits == hashed_hits, (nested_hits, hashed_hits)
+            nested = f"{nested_ms:10.2f}"
+        else:
+            nested = f"{'-':>10}"
+        per_entity = hashed_ms * 1000.0 / (2 * count)
+        print(f"{2 * count:9d} {nested} {hashed_ms:10.2f} {per_entity:17.3f} {vector_ms:10.2f}")
+
+
+if __name__ == '__main__':
+    main()
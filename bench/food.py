@@ -0,0 +1,101 @@
+"""Food placement benchmark: picking an empty cell as the snake fills the board.
+
+Usage: python -m bench.food [--board 500x500] [--fills 0.5,0.9,0.99,0.999] [--picks N]
+
+For each fill level a snek game is set up with the snake along the
+Hamiltonian tour of engine.cells, covering that fraction of the board, and
+food is placed ``--picks`` times with three strategies:
+
+* ``reroll``: the old placement, a uniform cell re-rolled once if it is
+  on the snake; the miss column is how often the food still landed on it.
+* ``rejection``: uniform cells until an empty one turns up, which is
+  correct but takes ``1 / (1 - fill)`` draws on average.
+* ``index``: ``Food.randomize()`` with the snake's FreeCells index, one
+  draw at any fill.
+
+Times are per placement in microseconds. The tick column is Game.update()
+along the tour at that fill, which includes keeping the index up to date.
+"""
+import argparse
+import importlib
+import os
+import random
+import sys
+
+os.environ.setdefault('SDL_VIDEODRIVER', 'dummy')
+
+import numpy as np
+
+from bench.snake import OTHER, measure, time_ticks
+from engine.cells import tour_start
+
+
+def reroll(food, free):
+    food.cell = random.randrange(len(free.slots))
+    if food.cell not in free:
+        food.cell = random.randrange(len(free.slots))
+    return food.cell not in free
+
+
+def rejection(food, free):
+    size = len(free.slots)
+    cell = random.randrange(size)
+    while cell not in free:
+        cell = random.randrange(size)
+    food.cell = cell
+    return False
+
+
+def index(food, free):
+    food.randomize()
+    return food.cell not in free
+
+
+def measure_picks(place, food, free, picks):
+    misses = 0
+
+    def pick():
+        nonlocal misses
+        misses += place(food, free)
+
+    times = time_ticks(picks, pick)
+    return times, misses / picks
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--board', default='500x500', help='cells, WxH (H even)')
+    parser.add_argument('--fills', default='0.5,0.9,0.99,0.999')
+    parser.add_argument('--picks', type=int, default=2000)
+    parser.add_argument('--ticks', type=int, default=1000)
+    parser.add_argument('--seed', type=int, default=1)
+    args = parser.parse_args()
+
+    sys.path.insert(0, OTHER)
+    snek = importlib.import_module('snek')
+    cells_x, cells_y = (int(value) for value in args.board.split('x'))
+    cells_y -= cells_y % 2
+    size = cells_x * cells_y
+    strategies = (('reroll', reroll), ('rejection', rejection), ('index', index))
+    print(f"board {cells_x}x{cells_y}, {args.picks} placements per strategy, times in microseconds")
+    print(f"{'fill':>6} {'strategy':<10} {'pick p50':>9} {'p99':>9} {'max':>9} {'miss':>7} {'tick p50':>9}")
+    for fill in (float(value) for value in args.fills.split(',')):
+        random.seed(args.seed)
+        cells = tour_start(min(int(size * fill), size - 2), cells_x, cells_y)
+        game = snek.Game(cells_x, cells_y, cells)
+        free = game.snake.free
+        for name, place in strategies:
+            times, missed = measure_picks(place, game.food, free, args.picks)
+            p50, p99 = np.percentile(times, (50, 99))
+            print(f"{len(cells) / size:6.3f} {name:<10} {p50:9.2f} {p99:9.2f} {times.max():9.1f} {missed:7.2%}", end='')
+            if place is index:
+                # Fewer ticks than free cells, so the growing snake cannot fill the board
+                steps = min(args.ticks, (size - len(cells)) // 2)
+                ticks, _ = measure(snek, cells, cells_x, cells_y, steps)
+                print(f" {np.percentile(ticks, 50):9.2f}")
+            else:
+                print()
+
+
+if __name__ == '__main__':
+    main()
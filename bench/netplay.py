@@ -0,0 +1,119 @@
+"""Networked tank-shooter benchmark: bandwidth, server tick time and input latency.
+
+Usage: python -m bench.netplay [--clients 1,2,4,8] [--seconds N] [--enemies N] [--obstacles N]
+
+For each client count a TankServer and that many bot clients (random
+driving, always firing, restarting after game over) run over UDP on
+localhost in one event loop for ``--seconds``. Reported per run:
+
+* ``down``/``up``: bytes per second received and sent by each client.
+* ``full`` and ``delta``: size of a full snapshot of the final state and
+  the mean snapshot actually received, both with their packet headers.
+* ``map``: size of the obstacle map, which is sent once per client, and
+  ``max pkt`` the largest packet the server sent.
+* ``no snap``/``no map``: clients that never received a whole snapshot or
+  the whole map. Any at all means the run failed, and it is reported so
+  instead of printing empty figures.
+* server tick p50/p99: simulation plus snapshot encoding and sending.
+* input latency p50/p99: from a client sending an input to receiving the
+  first snapshot that has applied it. With everything in one process the
+  bots' own work is included, so this is an upper bound for localhost.
+
+Tick times and latencies are kept for the last STATS_WINDOW steps and
+snapshots of tank-net, so runs longer than a minute report the end.
+"""
+import argparse
+import asyncio
+import importlib
+import os
+import random
+import sys
+
+os.environ.setdefault('SDL_VIDEODRIVER', 'dummy')
+
+import numpy as np
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir)
+sys.path.insert(0, os.path.join(ROOT, 'other'))
+net = importlib.import_module('tank-net')
+
+from engine.netcode import encode_delta, split_payload
+from engine.timestep import FixedTimestep
+
+
+async def session(count, seconds, enemy_count, obstacle_count, seed):
+    random.seed(seed)
+    loop = asyncio.get_running_loop()
+    server = net.TankServer(net.tank.TankShooter(enemy_count, obstacle_count))
+    transport, _ = await loop.create_datagram_endpoint(lambda: server, local_addr=('127.0.0.1', 0))
+    port = transport.get_extra_info('sockname')[1]
+    bots = []
+    for index in range(count):
+        client = net.TankClient()
+        await loop.create_datagram_endpoint(lambda: client, remote_addr=('127.0.0.1', port))
+        await client.connect()
+        bots.append((client, net.BotPilot(seed + index)))
+
+    async def drive():
+        # Every bot sends one input per step, like a real client
+        timestep = FixedTimestep(net.STEP_RATE, clock=loop.time)
+        timestep.advance()
+        while True:
+            for _ in range(timestep.advance()):
+                for client, pilot in bots:
+                    client.send_input(pilot.next_mask(client))
+            await asyncio.sleep((1.0 - timestep.alpha) * timestep.dt)
+
+    driver = asyncio.create_task(drive())
+    await server.serve(seconds)
+    driver.cancel()
+    for client, _ in bots:
+        client.close()
+    transport.close()
+
+    ticks = np.array(server.tick_times) / 1e6
+    latencies = np.array([latency for client, _ in bots for latency in client.latencies]) * 1000.0
+    full = encode_delta({}, net.capture_state(server.game, server.slots))
+    return {
+        'clients': count,
+        'down': np.mean([client.bytes_received for client, _ in bots]) / seconds,
+        'up': np.mean([client.bytes_sent for client, _ in bots]) / seconds,
+        'full': len(full) + net.SNAPSHOT.size * len(split_payload(full, net.SNAPSHOT_PIECE)),
+        'delta': sum(client.snapshot_bytes for client, _ in bots) / max(1, sum(client.snapshots for client, _ in bots)),
+        'map': sum(len(piece) + net.MAP.size for piece in server.map_pieces),
+        'largest': server.largest_packet,
+        'no snapshot': sum(1 for client, _ in bots if not client.snapshots),
+        'no map': sum(1 for client, _ in bots if client.map_version != server.map_version),
+        'tick': np.percentile(ticks, (50, 99)),
+        'latency': np.percentile(latencies, (50, 99)) if len(latencies) else None,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--clients', default='1,2,4,8', help='client counts to run')
+    parser.add_argument('--seconds', type=float, default=5.0, help='length of each run')
+    parser.add_argument('--enemies', type=int, default=net.tank.ENEMY_COUNT)
+    parser.add_argument('--obstacles', type=int, default=net.tank.OBSTACLE_COUNT)
+    parser.add_argument('--seed', type=int, default=1)
+    args = parser.parse_args()
+
+    print(f"{net.STEP_RATE} steps/s, a snapshot every {net.SNAPSHOT_EVERY} steps, "
+          f"{args.enemies} enemies, {args.obstacles} obstacles, {args.seconds:g} s per run")
+    print(f"{'clients':>7} {'down B/s':>9} {'up B/s':>8} {'full B':>7} {'delta B':>8} {'map B':>7} {'max pkt':>7} "
+          f"{'no snap':>7} {'no map':>6} {'tick p50':>9} {'p99 ms':>7} {'latency p50':>12} {'p99 ms':>7}")
+    failed = False
+    for count in (int(value) for value in args.clients.split(',')):
+        result = asyncio.run(session(count, args.seconds, args.enemies, args.obstacles, args.seed))
+        latency = result['latency']
+        latency = f"{'-':>12} {'-':>7}" if latency is None else f"{latency[0]:12.1f} {latency[1]:7.1f}"
+        print(f"{result['clients']:7d} {result['down']:9.0f} {result['up']:8.0f} {result['full']:7d} "
+              f"{result['delta']:8.1f} {result['map']:7d} {result['largest']:7d} {result['no snapshot']:7d} "
+              f"{result['no map']:6d} {result['tick'][0]:9.3f} {result['tick'][1]:7.3f} {latency}")
+        failed |= bool(result['no snapshot'] or result['no map'])
+    if failed:
+        sys.exit("some clients never received a snapshot or the map")
+
+
+if __name__ == '__main__':
+    main()
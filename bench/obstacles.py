@@ -0,0 +1,104 @@
+"""Obstacle collision benchmark: linear scans versus the static RectGrid.
+
+Usage: python -m bench.obstacles [--frames N] [--obstacles 10,100,...] [--bullets 100,500]
+                                 [--tanks N] [--cell-size N]
+
+Obstacles are placed the way tank-shooter places them. Every frame tests
+each bullet's rect and each tank's rect against the obstacles, the queries
+tank-shooter makes per step. The linear column is the old code: a Python
+loop over every obstacle calling ``get_rect()``, which built a new Rect
+each time. The grid column asks a RectGrid built once, whose build time is
+reported separately. Frame times are compared with the 16.7 ms budget of
+a 60 Hz step.
+"""
+import argparse
+import random
+import time
+
+import pygame
+
+from engine.spatial import RectGrid
+
+WIDTH, HEIGHT = 800, 600
+BULLET_RADIUS = 4
+TANK_SIZE = (40, 30)
+BUDGET_MS = 1000.0 / 60
+
+
+class LegacyObstacle:
+    def __init__(self, x, y, width, height):
+        self.x = x
+        self.y = y
+        self.width = width
+        self.height = height
+
+    def get_rect(self):
+        return pygame.Rect(self.x, self.y, self.width, self.height)
+
+
+def place(count, rng):
+    return [LegacyObstacle(rng.randint(0, WIDTH - 30), rng.randint(0, HEIGHT - 30),
+                           rng.randint(20, 60), rng.randint(20, 60)) for _ in range(count)]
+
+
+def query_rects(bullets, tanks, rng):
+    rects = [pygame.Rect(rng.uniform(0, WIDTH) - BULLET_RADIUS, rng.uniform(0, HEIGHT) - BULLET_RADIUS,
+                         BULLET_RADIUS * 2, BULLET_RADIUS * 2) for _ in range(bullets)]
+    rects += [pygame.Rect(rng.uniform(0, WIDTH - TANK_SIZE[0]), rng.uniform(0, HEIGHT - TANK_SIZE[1]), *TANK_SIZE)
+              for _ in range(tanks)]
+    return rects
+
+
+def linear(obstacles, rects, frames):
+    hits = 0
+    start = time.perf_counter()
+    for _ in range(frames):
+        for rect in rects:
+            for obstacle in obstacles:
+                if rect.colliderect(obstacle.get_rect()):
+                    hits += 1
+                    break
+    return (time.perf_counter() - start) / frames * 1000.0, hits
+
+
+def indexed(grid, rects, frames):
+    hits = 0
+    collides = grid.collides
+    start = time.perf_counter()
+    for _ in range(frames):
+        for rect in rects:
+            if collides(rect):
+                hits += 1
+    return (time.perf_counter() - start) / frames * 1000.0, hits
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--frames', type=int, default=20)
+    parser.add_argument('--obstacles', default='10,100,1000,5000')
+    parser.add_argument('--bullets', default='100,500')
+    parser.add_argument('--tanks', type=int, default=50, help='tank moves tested per frame')
+    parser.add_argument('--cell-size', type=int, default=64)
+    parser.add_argument('--seed', type=int, default=1)
+    args = parser.parse_args()
+
+    print(f"{'obstacles':>9} {'bullets':>8} {'build ms':>9} {'linear ms':>10} {'grid ms':>8} {'speedup':>8} "
+          f"{'in budget':>10}")
+    for count in (int(value) for value in args.obstacles.split(',')):
+        rng = random.Random(args.seed)
+        obstacles = place(count, rng)
+        start = time.perf_counter()
+        grid = RectGrid((obstacle.get_rect() for obstacle in obstacles), args.cell_size)
+        build = (time.perf_counter() - start) * 1000.0
+        for bullets in (int(value) for value in args.bullets.split(',')):
+            rects = query_rects(bullets, args.tanks, rng)
+            slow, slow_hits = linear(obstacles, rects, args.frames)
+            fast, fast_hits = indexed(grid, rects, args.frames)
+            if slow_hits != fast_hits:
+                raise SystemExit(f"hit counts differ: {slow_hits} linear, {fast_hits} grid")
+            print(f"{count:9d} {bullets:8d} {build:9.2f} {slow:10.3f} {fast:8.3f} {slow / fast:8.1f} "
+                  f"{'yes' if fast < BUDGET_MS else 'no':>10}")
+
+
+if __name__ == '__main__':
+    main()
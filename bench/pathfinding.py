@@ -0,0 +1,89 @@
+"""Pathfinding benchmark: tank-shooter enemies chasing the player on one flow field.
+
+Usage: python -m bench.pathfinding [--steps N] [--enemies 10,100,300,1000] [--obstacles N]
+
+The player sweeps back and forth across the map, so the field is rebuilt
+every time it enters another navigation cell, while every enemy steers by
+a table lookup. Steps run headless with the game's FrameProfiler on. The
+report shows field rebuilds, the p50/p99/max of the profiler's
+pathfinding phase over the steps that rebuilt, the update phase per step,
+and how far the enemies ended up from the player on average. The search
+column is what one search per enemy would cost per step at the measured
+rebuild time.
+"""
+import argparse
+import importlib
+import math
+import os
+import random
+import sys
+
+os.environ.setdefault('SDL_VIDEODRIVER', 'dummy')
+
+import numpy as np
+
+from engine.profiler import FrameProfiler
+
+OTHER = os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir, 'other')
+
+
+class SweepKeys:
+    # Drives the player diagonally, turning around every ``period`` steps
+    def __init__(self, controls, period=150):
+        self.controls = controls
+        self.period = period
+        self.step = 0
+
+    def __getitem__(self, key):
+        controls = self.controls
+        if (self.step // self.period) % 2:
+            return key in (controls['left'], controls['up'])
+        return key in (controls['right'], controls['down'])
+
+
+def measure(tank, enemy_count, obstacle_count, steps, seed):
+    random.seed(seed)
+    profiler = FrameProfiler(tank.PHASES, window=steps, enabled=True)
+    game = tank.TankShooter(enemy_count, obstacle_count, profiler=profiler)
+    player = game.player
+    player.health = player.max_health = 10**9
+    keys = SweepKeys(player.controls)
+    rebuilt = []
+    for _ in range(steps):
+        keys.step += 1
+        before = game.field.rebuilds
+        profiler.start_frame()
+        game.step(keys)
+        profiler.lap('update')
+        profiler.end_frame()
+        rebuilt.append(game.field.rebuilds > before)
+    recent = profiler.recent()
+    rebuilds = recent[np.array(rebuilt), profiler.columns.index('pathfinding')]
+    update = recent[:, profiler.columns.index('update')]
+    distance = np.mean([math.hypot(enemy.x - player.x, enemy.y - player.y) for enemy in game.enemies])
+    return game.field.rebuilds, rebuilds, update, distance
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--steps', type=int, default=600)
+    parser.add_argument('--enemies', default='10,100,300,1000')
+    parser.add_argument('--obstacles', type=int, default=30)
+    parser.add_argument('--seed', type=int, default=1)
+    args = parser.parse_args()
+
+    sys.path.insert(0, OTHER)
+    tank = importlib.import_module('tank-shooter')
+    print(f"{args.steps} steps, {args.obstacles} obstacles, {tank.NAV_CELL_SIZE} px cells")
+    print(f"{'enemies':>8} {'rebuilds':>9} {'rebuild p50':>12} {'p99':>7} {'max ms':>7} {'update p50':>11} "
+          f"{'p99 ms':>7} {'search ms':>10} {'distance':>9}")
+    for count in (int(value) for value in args.enemies.split(',')):
+        total, rebuilds, update, distance = measure(tank, count, args.obstacles, args.steps, args.seed)
+        p50, p99 = np.percentile(rebuilds, (50, 99)) if len(rebuilds) else (0.0, 0.0)
+        print(f"{count:8d} {total:9d} {p50:12.3f} {p99:7.3f} {rebuilds.max(initial=0.0):7.3f} "
+              f"{np.percentile(update, 50):11.3f} {np.percentile(update, 99):7.3f} {p50 * count:10.1f} "
+              f"{distance:9.0f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,132 @@
+"""Projectile benchmark: per-bullet objects versus tank-shooter's shared store.
+
+Usage: python -m bench.projectiles [--frames N] [--bullets 100,1000,...] [--enemies N] [--obstacles N]
+
+Every frame starts from the same N bullets, half fired by the player and
+half by enemies, scattered over the screen with random velocities. Each
+is moved, culled off-screen or against the obstacles, and tested against
+the tanks, the work of one tank-shooter step. The objects column is the
+old code: a Python object per bullet, a Rect and a RectGrid query each,
+and nested loops over tanks for the hits. The store column is
+``TankShooter.update_projectiles()`` on the same bullets. Tanks cannot die
+here, so both sides see the same scene every frame and must report the
+same hits. Times are per step, against the 16.7 ms budget of 60 Hz.
+"""
+import argparse
+import importlib
+import os
+import random
+import sys
+import time
+
+os.environ.setdefault('SDL_VIDEODRIVER', 'dummy')
+
+import numpy as np
+import pygame
+
+OTHER = os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir, 'other')
+BUDGET_MS = 1000.0 / 60
+
+
+class LegacyBullet:
+    def __init__(self, x, y, dx, dy):
+        self.x = x
+        self.y = y
+        self.dx = dx
+        self.dy = dy
+        self.radius = 4
+        self.alive = True
+
+
+def legacy_step(tank, player_bullets, enemy_bullets, game):
+    # The old per-object update and the nested hit loops; returns the hits
+    grid = game.obstacle_index
+    hits = 0
+    for bullets in (player_bullets, enemy_bullets):
+        for bullet in bullets:
+            bullet.x += bullet.dx
+            bullet.y += bullet.dy
+            bullet_rect = pygame.Rect(bullet.x - bullet.radius, bullet.y - bullet.radius,
+                                      bullet.radius*2, bullet.radius*2)
+            if grid.collides(bullet_rect):
+                bullet.alive = False
+            elif bullet.x < 0 or bullet.x > tank.WIDTH or bullet.y < 0 or bullet.y > tank.HEIGHT:
+                bullet.alive = False
+    for bullet in player_bullets:
+        if bullet.alive:
+            for enemy in game.enemies:
+                if abs(bullet.x - enemy.x) < 20 and abs(bullet.y - enemy.y) < 20:
+                    hits += 1
+    for bullet in enemy_bullets:
+        if bullet.alive:
+            for player in game.players:
+                if abs(bullet.x - player.x) < 20 and abs(bullet.y - player.y) < 20:
+                    hits += 1
+                    break
+    return hits
+
+
+def scatter(tank, count, rng):
+    # Positions, velocities and teams of ``count`` bullets
+    angle = rng.uniform(0, 2 * np.pi, count)
+    speed = rng.uniform(3, 7, count)
+    return (rng.uniform(0, tank.WIDTH, count), rng.uniform(0, tank.HEIGHT, count),
+            speed * np.cos(angle), speed * np.sin(angle), (np.arange(count) % 2).astype(np.int8))
+
+
+def measure(tank, game, count, frames, rng):
+    # (objects ms, store ms) per step; raises if the hit counts differ
+    tanks = game.players + list(game.enemies)
+    projectiles = game.projectiles
+    enemy_serials = np.array([enemy.serial for enemy in game.enemies], np.int64)
+    slow = fast = 0.0
+    for _ in range(frames):
+        x, y, dx, dy, team = scatter(tank, count, rng)
+        enemy_bullets = team == tank.ENEMY_TEAM
+        owner = np.where(enemy_bullets, enemy_serials[np.arange(count) % len(enemy_serials)], game.player.serial)
+
+        player_list = [LegacyBullet(*values) for values in zip(x[~enemy_bullets].tolist(), y[~enemy_bullets].tolist(),
+                                                               dx[~enemy_bullets].tolist(), dy[~enemy_bullets].tolist())]
+        enemy_list = [LegacyBullet(*values) for values in zip(x[enemy_bullets].tolist(), y[enemy_bullets].tolist(),
+                                                              dx[enemy_bullets].tolist(), dy[enemy_bullets].tolist())]
+        start = time.perf_counter()
+        slow_hits = legacy_step(tank, player_list, enemy_list, game)
+        slow += time.perf_counter() - start
+
+        projectiles.clear()
+        projectiles.extend(count, x=x, y=y, prev_x=x, prev_y=y, dx=dx, dy=dy, radius=tank.BULLET_RADIUS,
+                           team=team, owner=owner)
+        for each in tanks:
+            each.health = 10**9
+        start = time.perf_counter()
+        game.update_projectiles()
+        fast += time.perf_counter() - start
+        fast_hits = sum(10**9 - each.health for each in tanks) // tank.BULLET_DAMAGE
+        if slow_hits != fast_hits:
+            raise SystemExit(f"hit counts differ: {slow_hits} objects, {fast_hits} store")
+    return slow / frames * 1000.0, fast / frames * 1000.0
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--frames', type=int, default=50)
+    parser.add_argument('--bullets', default='100,1000,5000,20000')
+    parser.add_argument('--enemies', type=int, default=50)
+    parser.add_argument('--obstacles', type=int, default=30)
+    parser.add_argument('--seed', type=int, default=1)
+    args = parser.parse_args()
+
+    sys.path.insert(0, OTHER)
+    tank = importlib.import_module('tank-shooter')
+    random.seed(args.seed)
+    game = tank.TankShooter(args.enemies, args.obstacles)
+    rng = np.random.default_rng(args.seed)
+
+    print(f"{'bullets':>8} {'objects ms':>11} {'store ms':>9} {'speedup':>8} {'in budget':>10}")
+    for count in (int(value) for value in args.bullets.split(',')):
+        slow, fast = measure(tank, game, count, args.frames, rng)
+        print(f"{count:8d} {slow:11.3f} {fast:9.3f} {slow / fast:8.1f} {'yes' if fast < BUDGET_MS else 'no':>10}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,116 @@
+"""Snake tick benchmark: tick time against snake length on large boards.
+
+Usage: python -m bench.snake [--ticks N] [--board 1000x1000] [--lengths 10,1000,...] [--legacy-max N]
+
+The snake follows a Hamiltonian tour of the board (engine.cells), so
+it never dies, with food on the board as in a normal game. Each tick is
+``Game.update()``: the move, the food check and the self-collision test,
+without drawing. The legacy columns time the old list-of-Vector2 snake,
+which copied the body on every move and scanned it for collisions, on
+the same path; it is skipped above ``--legacy-max`` segments.
+"""
+import argparse
+import importlib
+import os
+import random
+import sys
+import time
+
+os.environ.setdefault('SDL_VIDEODRIVER', 'dummy')
+
+import numpy as np
+import pygame
+
+from engine.cells import tour_start, tour_step
+
+OTHER = os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir, 'other')
+
+
+class LegacySnake:
+    # The old snake: a list of Vector2, copied on every move and scanned
+    def __init__(self, cells, cells_x, cells_y):
+        self.body = [pygame.Vector2(cell) for cell in cells]
+        self.direction = pygame.Vector2(1, 0)
+        self.cells_x = cells_x
+        self.cells_y = cells_y
+
+    def move_snake(self):
+        body_copy = self.body[:-1]
+        body_copy.insert(0, body_copy[0] + self.direction)
+        self.body = body_copy[:]
+
+    def check_collision(self):
+        if not 0 <= self.body[0].x < self.cells_x or not 0 <= self.body[0].y < self.cells_y:
+            return True
+        for block in self.body[1:]:
+            if block == self.body[0]:
+                return True
+        return False
+
+
+def time_ticks(ticks, tick):
+    times = np.empty(ticks)
+    clock = time.perf_counter
+    for index in range(ticks):
+        start = clock()
+        tick()
+        times[index] = clock() - start
+    return times * 1e6
+
+
+def measure(snek, cells, cells_x, cells_y, ticks):
+    game = snek.Game(cells_x, cells_y, cells)
+    snake = game.snake
+
+    def tick():
+        x, y = snake.head
+        snake.direction = pygame.Vector2(tour_step(x, y, cells_x, cells_y))
+        game.update()
+
+    times = time_ticks(ticks, tick)
+    if not game.game_active:
+        raise SystemExit("the snake died on the tour")
+    return times, len(snake.body)
+
+
+def measure_legacy(cells, cells_x, cells_y, ticks):
+    snake = LegacySnake(cells, cells_x, cells_y)
+
+    def tick():
+        head = snake.body[0]
+        snake.direction = pygame.Vector2(tour_step(int(head.x), int(head.y), cells_x, cells_y))
+        snake.move_snake()
+        snake.check_collision()
+
+    return time_ticks(ticks, tick)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--ticks', type=int, default=2000)
+    parser.add_argument('--board', default='1000x1000', help='cells, WxH (H even)')
+    parser.add_argument('--lengths', default='10,1000,10000,100000,500000')
+    parser.add_argument('--legacy-max', type=int, default=10000, help='longest snake timed with the old code')
+    parser.add_argument('--seed', type=int, default=1)
+    args = parser.parse_args()
+
+    sys.path.insert(0, OTHER)
+    snek = importlib.import_module('snek')
+    cells_x, cells_y = (int(value) for value in args.board.split('x'))
+    cells_y -= cells_y % 2
+    print(f"board {cells_x}x{cells_y}, {args.ticks} ticks per length, times in microseconds")
+    print(f"{'length':>8} {'tick p50':>9} {'p99':>8} {'max':>8} {'legacy p50':>11} {'p99':>9}")
+    for length in (int(value) for value in args.lengths.split(',')):
+        random.seed(args.seed)
+        cells = tour_start(min(length, cells_x * cells_y - 2), cells_x, cells_y)
+        times, final = measure(snek, cells, cells_x, cells_y, args.ticks)
+        p50, p99 = np.percentile(times, (50, 99))
+        line = f"{final:8d} {p50:9.2f} {p99:8.2f} {times.max():8.1f}"
+        if length <= args.legacy_max:
+            legacy = measure_legacy(cells, cells_x, cells_y, args.ticks)
+            line += f" {np.percentile(legacy, 50):11.2f} {np.percentile(legacy, 99):9.2f}"
+        print(line)
+
+
+if __name__ == '__main__':
+    main()
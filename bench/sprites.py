@@ -0,0 +1,67 @@
+"""Draw-time benchmark: per-entity primitive draws versus cached sprite blits.
+
+Usage: python -m bench.sprites [--frames N] [--counts 500,1000,...]
+
+Draws N enemies and N bullets onto an offscreen 800x600 display surface
+(SDL dummy driver) the old way, three or two ``pygame.draw`` calls per
+entity, and through spacegame's sprite cache with one ``blits()`` per layer.
+"""
+import argparse
+import os
+import time
+
+os.environ.setdefault('SDL_VIDEODRIVER', 'dummy')
+
+import numpy as np
+import pygame
+
+import spacegame
+from spacegame import SPRITES, ENEMY_COLOR, paint_bullet, paint_enemy
+
+
+def draw_primitives(screen, xs, ys, bxs, bys):
+    for x, y in zip(xs, ys):
+        paint_enemy(screen, x, y, ENEMY_COLOR)
+    for x, y in zip(bxs, bys):
+        paint_bullet(screen, x, y, None)
+
+
+def draw_sprites(screen, xs, ys, bxs, bys):
+    SPRITES.draw_batch(screen, 'enemy', xs, ys, ENEMY_COLOR)
+    SPRITES.draw_batch(screen, 'bullet', bxs, bys)
+
+
+def time_draw(func, screen, frames, *positions):
+    start = time.perf_counter()
+    for _ in range(frames):
+        screen.fill(spacegame.BACKGROUND)
+        func(screen, *positions)
+    return (time.perf_counter() - start) / frames * 1000.0
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--frames', type=int, default=50)
+    parser.add_argument('--counts', default='100,500,1000,2000')
+    parser.add_argument('--seed', type=int, default=1)
+    args = parser.parse_args()
+
+    pygame.display.init()
+    screen = pygame.display.set_mode((spacegame.WIDTH, spacegame.HEIGHT))
+    rng = np.random.default_rng(args.seed)
+    print(f"{'enemies':>8} {'primitives ms':>14} {'sprites ms':>11} {'speedup':>8}")
+    for count in [int(c) for c in args.counts.split(',')]:
+        xs = rng.uniform(0, spacegame.WIDTH, count)
+        ys = rng.uniform(0, spacegame.HEIGHT, count)
+        bxs = rng.uniform(0, spacegame.WIDTH, count)
+        bys = rng.uniform(0, spacegame.HEIGHT, count)
+        # The primitive path gets Python floats, as the old per-object draw did
+        lists = (xs.tolist(), ys.tolist(), bxs.tolist(), bys.tolist())
+        primitives = time_draw(draw_primitives, screen, args.frames, *lists)
+        sprites = time_draw(draw_sprites, screen, args.frames, xs, ys, bxs, bys)
+        print(f"{count:8d} {primitives:14.2f} {sprites:11.2f} {primitives / sprites:7.1f}x")
+    pygame.quit()
+
+
+if __name__ == '__main__':
+    main()
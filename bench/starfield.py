@@ -0,0 +1,69 @@
+"""Starfield benchmark: one draw.circle per star versus baked parallax layers.
+
+Usage: python -m bench.starfield [--frames N] [--counts 100,1000,...]
+
+Both paths scroll and draw the same stars onto an 800x600 display surface
+(SDL dummy driver). The per-star path is what spacegame used to do; the
+baked path costs a few blits per band however many stars there are. Layer
+baking happens once and is reported separately.
+"""
+import argparse
+import os
+import time
+
+os.environ.setdefault('SDL_VIDEODRIVER', 'dummy')
+
+import numpy as np
+import pygame
+
+from engine.starfield import Starfield
+from spacegame import WIDTH, HEIGHT, BACKGROUND, STAR_COLORS
+
+
+def per_star(screen, field, frames):
+    x = field.x.astype(np.float64)
+    y = field.y.astype(np.float64)
+    colors = [STAR_COLORS[c] for c in field.color.tolist()]
+    sizes = field.size.tolist()
+    start = time.perf_counter()
+    for _ in range(frames):
+        y += field.speed
+        wrapped = y > HEIGHT
+        y[wrapped] = 0
+        screen.fill(BACKGROUND)
+        for sx, sy, size, color in zip(x.tolist(), y.tolist(), sizes, colors):
+            pygame.draw.circle(screen, color, (sx, sy), size)
+    return (time.perf_counter() - start) / frames * 1000.0
+
+
+def baked(screen, field, frames):
+    start = time.perf_counter()
+    for _ in range(frames):
+        field.scroll()
+        field.draw(screen)
+    return (time.perf_counter() - start) / frames * 1000.0
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--frames', type=int, default=100)
+    parser.add_argument('--counts', default='100,1000,10000,50000')
+    parser.add_argument('--seed', type=int, default=1)
+    args = parser.parse_args()
+
+    pygame.display.init()
+    screen = pygame.display.set_mode((WIDTH, HEIGHT))
+    print(f"{'stars':>7} {'per-star ms':>12} {'baked ms':>9} {'bake once ms':>13}")
+    for count in [int(c) for c in args.counts.split(',')]:
+        field = Starfield(WIDTH, HEIGHT, STAR_COLORS, BACKGROUND, count, rng=np.random.default_rng(args.seed))
+        start = time.perf_counter()
+        field.bake()
+        bake_ms = (time.perf_counter() - start) * 1000.0
+        slow = per_star(screen, field, max(1, args.frames // 10))
+        fast = baked(screen, field, args.frames)
+        print(f"{count:7d} {slow:12.2f} {fast:9.2f} {bake_ms:13.1f}")
+    pygame.quit()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,100 @@
+"""Startup benchmark: import time and time to first frame for every game.
+
+Usage: python -m bench.startup [--repeat N] [--games space,tank,snek] [--json]
+
+Each run is a fresh interpreter, timed with ``time.monotonic()`` (which is
+shared between processes) from just before the parent launches it:
+
+* ``interpreter``: until the worker's first line runs.
+* ``import``: importing the game module and constructing the game.
+* ``first frame``: from there until ``run(frames=1)`` has presented.
+
+``lazy`` is how the games start now: only pygame's display and font
+modules are initialized, when the first frame is drawn. ``eager`` first
+does what they used to do at import, ``pygame.init()`` and
+``pygame.font.SysFont``, as a baseline. Medians over ``--repeat`` runs.
+"""
+import argparse
+import importlib
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+os.environ.setdefault('SDL_VIDEODRIVER', 'dummy')
+os.environ.setdefault('PYGAME_HIDE_SUPPORT_PROMPT', '1')
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir)
+OTHER = os.path.join(ROOT, 'other')
+MODES = ('eager', 'lazy')
+STAGES = ('interpreter', 'import', 'first frame', 'total')
+
+
+def build(game):
+    if game == 'space':
+        import spacegame
+        return spacegame.SpaceGame()
+    sys.path.insert(0, OTHER)
+    if game == 'tank':
+        return importlib.import_module('tank-shooter').TankShooter()
+    return importlib.import_module('snek').SnakeGame()
+
+
+def worker(game, mode, launched):
+    # Runs in the child process; returns seconds spent in each stage
+    started = time.monotonic()
+    if mode == 'eager':
+        import pygame
+        pygame.init()
+        pygame.font.SysFont(None, 36)
+        pygame.font.SysFont(None, 72)
+    app = build(game)
+    imported = time.monotonic()
+    app.run(frames=1)
+    presented = time.monotonic()
+    return {'interpreter': started - launched, 'import': imported - started,
+            'first frame': presented - imported, 'total': presented - launched}
+
+
+def measure(game, mode, repeat):
+    # Median of each stage over ``repeat`` fresh processes
+    runs = []
+    for _ in range(repeat):
+        launched = time.monotonic()
+        command = [sys.executable, '-m', 'bench.startup', '--worker', f"{game},{mode},{launched!r}"]
+        result = subprocess.run(command, cwd=ROOT, capture_output=True, text=True)
+        if result.returncode:
+            sys.stderr.write(result.stderr)
+            raise SystemExit(f"{game} ({mode}) failed")
+        runs.append(json.loads(result.stdout.strip().splitlines()[-1]))
+    return {stage: statistics.median(run[stage] for run in runs) * 1000 for stage in STAGES}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--games', default='space,tank,snek')
+    parser.add_argument('--json', action='store_true', help='print JSON records instead of a table')
+    parser.add_argument('--worker', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker:
+        game, mode, launched = args.worker.split(',')
+        print(json.dumps(worker(game, mode, float(launched))))
+        return
+
+    if not args.json:
+        print(f"{'game':<8} {'mode':<6} " + ' '.join(f"{stage + ' ms':>15}" for stage in STAGES))
+    for game in args.games.split(','):
+        for mode in MODES:
+            times = measure(game, mode, args.repeat)
+            if args.json:
+                print(json.dumps({'game': game, 'mode': mode, 'repeat': args.repeat, 'ms': times}))
+                continue
+            print(f"{game:<8} {mode:<6} " + ' '.join(f"{times[stage]:15.1f}" for stage in STAGES))
+
+
+if __name__ == '__main__':
+    main()
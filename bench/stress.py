@@ -0,0 +1,297 @@
+"""Stress benchmark suite: every game headless at scaled-up entity counts.
+
+Usage: python -m bench.stress [--frames N] [--games space,tank,snek]
+                              [--space 100,1000,...] [--tank 5x10,...] [--snek 40x30:100,...]
+                              [--output results.jsonl] [--json] [--tracemalloc]
+
+Scenarios:
+
+* ``space N``: spacegame with N enemies and N bullets kept on screen.
+* ``tank ExO``: tank-shooter with E enemy tanks and O obstacles.
+* ``snek WxH:L``: snek on a W x H board with a snake L segments long that
+  follows a Hamiltonian cycle, so it never dies of its own accord.
+
+Each scenario runs in its own process, so module state and peak RSS do not
+leak between runs. Every frame is simulated and drawn onto an offscreen
+display (SDL dummy driver) with the phases timed by ``FrameProfiler``.
+For each scenario the suite reports the frame rate, p50/p95/p99 per phase
+(the update versus draw split) and the peak RSS. ``--tracemalloc`` adds
+the peak traced Python heap; timings are inflated in that mode.
+
+The table goes to stdout. ``--json`` prints one JSON record per scenario
+instead, and ``--output`` appends the same records to a file. The records
+carry the git commit, so results from different commits can be compared.
+"""
+import argparse
+import importlib
+import json
+import os
+import random
+import resource
+import subprocess
+import sys
+import time
+import tracemalloc
+
+os.environ.setdefault('SDL_VIDEODRIVER', 'dummy')
+
+import numpy as np
+import pygame
+
+from engine.cells import tour_start, tour_step
+from engine.profiler import FrameProfiler
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir)
+OTHER = os.path.join(ROOT, 'other')
+FRAME_PHASES = ('update', 'draw', 'present')
+MAX_WINDOW_WIDTH = 1600
+
+
+def run_frames(profiler, frames, warmup, frame):
+    # ``frame()`` runs one profiled frame; the first ``warmup`` are not kept
+    for index in range(warmup + frames):
+        profiler.requested = index >= warmup
+        profiler.start_frame()
+        frame()
+        profiler.end_frame()
+
+
+def space_scenario(count, frames, warmup, seed):
+    import spacegame
+
+    profiler = FrameProfiler(spacegame.PHASES, window=frames)
+    app = spacegame.SpaceGame(seed, profiler=profiler, dirty=True)
+    game = app.game
+    game.player.lives = 10**9
+    keys = spacegame.AutopilotKeys(seed)
+    rng = np.random.default_rng(seed)
+
+    def top_up():
+        # Replace whatever left the screen or was destroyed
+        enemies = game.enemies
+        missing = count - len(enemies)
+        if missing > 0:
+            y = rng.uniform(-30, spacegame.HEIGHT, missing)
+            enemies.extend(missing, x=rng.uniform(30, spacegame.WIDTH - 30, missing), y=y, prev_y=y,
+                           speed=rng.uniform(1.0, 3.0, missing), radius=spacegame.ENEMY_SIZE//2)
+        bullets = game.bullets
+        missing = count - len(bullets)
+        if missing > 0:
+            y = rng.uniform(0, spacegame.HEIGHT, missing)
+            bullets.extend(missing, x=rng.uniform(0, spacegame.WIDTH, missing), y=y, prev_y=y,
+                           speed=spacegame.BULLET_SPEED, radius=spacegame.BULLET_RADIUS)
+
+    def frame():
+        top_up()
+        inputs = keys.inputs(game)
+        profiler.lap('events')
+        app.step(inputs)
+        app.render()
+
+    run_frames(profiler, frames, warmup, frame)
+    return profiler
+
+
+class SweepKeys:
+    # Held keys for tank-shooter: drive back and forth, turret spinning
+    def __init__(self, app):
+        self.app = app
+        self.frame = 0
+
+    def __getitem__(self, key):
+        controls = self.app.player.controls
+        if key == pygame.K_j:
+            return True
+        if (self.frame // 120) % 2:
+            return key in (controls['left'], controls['up'])
+        return key in (controls['right'], controls['down'])
+
+
+def tank_scenario(enemy_count, obstacle_count, frames, warmup, seed):
+    random.seed(seed)
+    sys.path.insert(0, OTHER)
+    tank = importlib.import_module('tank-shooter')
+    app = tank.TankShooter(enemy_count, obstacle_count)
+    player = app.player
+    player.health = player.max_health = 10**9
+    keys = SweepKeys(app)
+    profiler = FrameProfiler(FRAME_PHASES, window=frames)
+
+    def frame():
+        keys.frame += 1
+        missing = enemy_count - len(app.enemies)
+        if missing > 0:
+            app.spawn_enemies(missing)
+        app.game_won = False
+        app.shoot()
+        app.step(keys)
+        profiler.lap('update')
+        app.draw(1.0)
+        profiler.lap('draw')
+        app.renderer.present()
+        profiler.lap('present')
+
+    run_frames(profiler, frames, warmup, frame)
+    return profiler
+
+
+def snek_scenario(cells_x, cells_y, length, frames, warmup, seed):
+    random.seed(seed)
+    sys.path.insert(0, OTHER)
+    snek = importlib.import_module('snek')
+    cells_y -= cells_y % 2
+    snek.set_board(cells_x, cells_y, max(2, min(20, MAX_WINDOW_WIDTH // cells_x)))
+    length = min(length, cells_x * cells_y - 2)
+    profiler = FrameProfiler(FRAME_PHASES, window=frames)
+    app = snek.SnakeGame()
+    state = {'restarts': 0}
+
+    def new_game():
+        # Lay the snake along the tour, head first
+        return snek.Game(body=tour_start(length, cells_x, cells_y))
+
+    app.game = new_game()
+
+    def frame():
+        if not app.game.game_active:
+            state['restarts'] += 1
+            app.game = new_game()
+        game = app.game
+        snake = game.snake
+        x, y = snake.head
+        snake.direction = pygame.Vector2(tour_step(x, y, cells_x, cells_y))
+        app.step()
+        profiler.lap('update')
+        game.draw_elements(app.renderer)
+        profiler.lap('draw')
+        app.renderer.present()
+        profiler.lap('present')
+
+    run_frames(profiler, frames, warmup, frame)
+    profiler.restarts = state['restarts']
+    return profiler
+
+
+def parse_scenarios(args):
+    scenarios = []
+    games = args.games.split(',')
+    if 'space' in games:
+        for count in args.space.split(','):
+            scenarios.append({'game': 'space', 'count': int(count)})
+    if 'tank' in games:
+        for scale in args.tank.split(','):
+            enemy_count, obstacle_count = scale.split('x')
+            scenarios.append({'game': 'tank', 'enemies': int(enemy_count), 'obstacles': int(obstacle_count)})
+    if 'snek' in games:
+        for scale in args.snek.split(','):
+            board, length = scale.split(':')
+            cells_x, cells_y = board.split('x')
+            scenarios.append({'game': 'snek', 'cells_x': int(cells_x), 'cells_y': int(cells_y),
+                              'length': int(length)})
+    return scenarios
+
+
+def run_scenario(scenario, frames, warmup, seed, traced):
+    # Runs inside the worker process; returns the record for one scenario
+    if traced:
+        tracemalloc.start()
+    start = time.perf_counter()
+    game = scenario['game']
+    if game == 'space':
+        profiler = space_scenario(scenario['count'], frames, warmup, seed)
+    elif game == 'tank':
+        profiler = tank_scenario(scenario['enemies'], scenario['obstacles'], frames, warmup, seed)
+    else:
+        profiler = snek_scenario(scenario['cells_x'], scenario['cells_y'], scenario['length'],
+                                 frames, warmup, seed)
+    elapsed = time.perf_counter() - start
+    recent = profiler.recent()
+    record = dict(scenario)
+    record['frames'] = frames
+    record['fps'] = 1000.0 / float(recent[:, -1].mean())
+    record['ms'] = {name: {'p50': p50, 'p95': p95, 'p99': p99, 'mean': float(recent[:, column].mean())}
+                    for column, (name, (p50, p95, p99)) in enumerate(profiler.percentiles().items())}
+    record['peak_rss_kib'] = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    record['wall_s'] = elapsed
+    if traced:
+        record['peak_traced_kib'] = tracemalloc.get_traced_memory()[1] // 1024
+        tracemalloc.stop()
+    if hasattr(profiler, 'restarts'):
+        record['restarts'] = profiler.restarts
+    return record
+
+
+def git_commit():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=ROOT, capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def describe(record):
+    game = record['game']
+    if game == 'space':
+        return f"space {record['count']}"
+    if game == 'tank':
+        return f"tank {record['enemies']}x{record['obstacles']}"
+    return f"snek {record['cells_x']}x{record['cells_y']}:{record['length']}"
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--frames', type=int, default=300)
+    parser.add_argument('--warmup', type=int, default=30)
+    parser.add_argument('--seed', type=int, default=1)
+    parser.add_argument('--games', default='space,tank,snek')
+    parser.add_argument('--space', default='100,1000,5000', help='enemies (and bullets) per scenario')
+    parser.add_argument('--tank', default='5x10,50x50,200x200', help='ENEMIESxOBSTACLES per scenario')
+    parser.add_argument('--snek', default='40x30:100,200x150:2000,400x300:20000',
+                        help='WIDTHxHEIGHT:LENGTH per scenario')
+    parser.add_argument('--output', help='append one JSON record per scenario to this file')
+    parser.add_argument('--json', action='store_true', help='print JSON records instead of a table')
+    parser.add_argument('--tracemalloc', action='store_true', help='also report the peak traced Python heap')
+    parser.add_argument('--worker', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker:
+        record = run_scenario(json.loads(args.worker), args.frames, args.warmup, args.seed, args.tracemalloc)
+        print(json.dumps(record))
+        return
+
+    commit = git_commit()
+    if not args.json:
+        print(f"commit: {commit}  frames: {args.frames}  seed: {args.seed}")
+        print(f"{'scenario':<22} {'fps':>8} {'update p50':>11} {'p99':>7} {'draw p50':>9} {'p99':>7} "
+              f"{'total p99':>10} {'peak RSS MiB':>13}")
+    output = open(args.output, 'a') if args.output else None
+    for scenario in parse_scenarios(args):
+        command = [sys.executable, '-m', 'bench.stress', '--worker', json.dumps(scenario),
+                   '--frames', str(args.frames), '--warmup', str(args.warmup), '--seed', str(args.seed)]
+        if args.tracemalloc:
+            command.append('--tracemalloc')
+        result = subprocess.run(command, cwd=ROOT, capture_output=True, text=True)
+        if result.returncode:
+            sys.stderr.write(result.stderr)
+            raise SystemExit(f"scenario {scenario} failed")
+        record = json.loads(result.stdout.strip().splitlines()[-1])
+        record['commit'] = commit
+        record['python'] = sys.version.split()[0]
+        record['pygame'] = pygame.version.ver
+        if output is not None:
+            output.write(json.dumps(record) + '\n')
+        if args.json:
+            print(json.dumps(record))
+            continue
+        ms = record['ms']
+        # spacegame times collisions apart from the rest of the update
+        update = [ms['update'][q] + ms.get('collisions', {}).get(q, 0.0) for q in ('p50', 'p99')]
+        print(f"{describe(record):<22} {record['fps']:8.1f} {update[0]:11.3f} {update[1]:7.3f} "
+              f"{ms['draw']['p50']:9.3f} {ms['draw']['p99']:7.3f} {ms['total']['p99']:10.3f} "
+              f"{record['peak_rss_kib'] / 1024:13.1f}")
+    if output is not None:
+        output.close()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,50 @@
+"""VecEnv benchmark: environment steps per second for state and pixel observations.
+
+Usage: python -m bench.vecenv [--steps N] [--counts 1,8,64] [--downscale 4]
+
+Each configuration steps a SpaceVecEnv of ``count`` games on uniformly
+random actions (drawn up front, so the policy costs nothing) and reports
+env-steps per second, i.e. batch steps times ``count``, and the time of
+one batch step. Games that end are reset inside ``step()`` as in training.
+"""
+import argparse
+import os
+import time
+
+os.environ.setdefault('SDL_VIDEODRIVER', 'dummy')
+
+import numpy as np
+
+from spacegame_env import MOVES, SpaceVecEnv
+
+
+def measure(count, observation, steps, downscale, seed):
+    env = SpaceVecEnv(count, seed, observation, downscale)
+    rng = np.random.default_rng(seed)
+    actions = np.stack([rng.integers(0, len(MOVES), (steps, count)), rng.integers(0, 2, (steps, count))], axis=2)
+    env.reset()
+    start = time.perf_counter()
+    for batch in actions:
+        env.step(batch)
+    elapsed = time.perf_counter() - start
+    env.close()
+    return steps * count / elapsed, elapsed / steps * 1000.0
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--steps', type=int, default=500, help='batch steps per configuration')
+    parser.add_argument('--counts', default='1,8,64', help='games per environment')
+    parser.add_argument('--downscale', type=int, default=4, help='pixel observation sampling step')
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    print(f"{'observation':<12} {'games':>6} {'env-steps/s':>12} {'ms/step':>9}")
+    for observation in ('state', 'pixels'):
+        for count in (int(value) for value in args.counts.split(',')):
+            rate, ms = measure(count, observation, args.steps, args.downscale, args.seed)
+            print(f"{observation:<12} {count:6d} {rate:12.0f} {ms:9.3f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1 @@
+"""Shared engine pieces used by the games in this repository."""
@@ -0,0 +1,196 @@
+"""Frame capture on a background thread: PNG sequences or a raw RGB stream."""
+import collections
+import os
+import queue
+import struct
+import sys
+import threading
+import time
+import zlib
+
+import numpy as np
+import pygame
+
+PNG_SIGNATURE = b'\x89PNG\r\n\x1a\n'
+POLICIES = ('drop', 'block')
+WRITER_POLL = 0.1  # Seconds between checks that the writer is alive while blocked on it
+
+
+def png_chunk(kind, data):
+    return struct.pack('>I', len(data)) + kind + data + struct.pack('>I', zlib.crc32(kind + data))
+
+
+def encode_png(pixels, level=1):
+    # (height, width, 3) uint8 pixels as a PNG file. Every row gets filter
+    # type 0 and the whole image is one zlib stream; zlib releases the GIL
+    # while it compresses, so the game thread keeps running.
+    height, width, _ = pixels.shape
+    rows = np.zeros((height, width * 3 + 1), np.uint8)
+    rows[:, 1:] = pixels.reshape(height, width * 3)
+    header = struct.pack('>IIBBBBB', width, height, 8, 2, 0, 0, 0)
+    return (PNG_SIGNATURE + png_chunk(b'IHDR', header) +
+            png_chunk(b'IDAT', zlib.compress(rows.tobytes(), level)) + png_chunk(b'IEND', b''))
+
+
+class FrameCapture:
+    """Copies frames into recycled buffers and writes them on a thread.
+
+    ``capture(surface)`` copies the surface through a ``pygame.surfarray``
+    view into a free buffer from a fixed pool and queues it; the writer
+    thread encodes it and hands the buffer back. When every buffer is
+    waiting to be written, the ``'drop'`` policy skips the frame (counted
+    in ``dropped``) and ``'block'`` waits for the writer instead. If the
+    writer thread has died, frames are dropped under either policy rather
+    than waiting on buffers that will never come back.
+
+    ``path`` is a directory for a PNG sequence (frame_000000.png, ...), or
+    a file ending in .rgb/.raw, or ``-`` for stdout, for raw RGB24 frames
+    back to back, e.g. for ``ffmpeg -f rawvideo -pix_fmt rgb24 -s WxH -i -``.
+    Frames are taken at most ``fps`` times a second (0 takes every one).
+    """
+
+    def __init__(self, path, fps=60, buffers=8, policy='drop', level=1, clock=time.perf_counter):
+        if policy not in POLICIES:
+            raise ValueError(f"unknown backpressure policy {policy!r}")
+        self.path = path
+        self.raw = path == '-' or path.endswith(('.rgb', '.raw'))
+        self.interval = 1.0 / fps if fps else 0.0
+        self.buffer_count = buffers
+        self.policy = policy
+        self.level = level
+        self.clock = clock
+        self.size = None
+        # Taken now, in case stdout is redirected afterwards (see capture_from_args)
+        self.stdout = sys.stdout.buffer if path == '-' else None
+        self.free = None
+        self.pending = None
+        self.thread = None
+        self.output = None
+        self.next_due = 0.0
+        self.error = None
+        # Counters
+        self.captured = 0
+        self.dropped = 0
+        self.written = 0
+        self.latencies = collections.deque(maxlen=1000)
+        self.latency_max = 0.0
+
+    def start(self, size):
+        # Buffers and the writer thread, sized from the first frame
+        width, height = size
+        self.size = size
+        self.free = queue.Queue()
+        for _ in range(self.buffer_count):
+            self.free.put(np.empty((height, width, 3), np.uint8))
+        self.pending = queue.Queue()
+        if self.raw:
+            self.output = self.stdout or open(self.path, 'wb')
+        else:
+            os.makedirs(self.path, exist_ok=True)
+        self.thread = threading.Thread(target=self.write_frames, name='frame-capture', daemon=True)
+        self.thread.start()
+
+    def capture(self, surface):
+        # Queue a copy of ``surface``; returns False if the frame was skipped
+        now = self.clock()
+        if now < self.next_due:
+            return False
+        self.next_due = now + self.interval
+        if self.size is None:
+            self.start(surface.get_size())
+        elif surface.get_size() != self.size:
+            raise ValueError(f"capture size changed from {self.size} to {surface.get_size()}")
+        buffer = self.take_buffer()
+        if buffer is None:
+            self.dropped += 1
+            return False
+        view = pygame.surfarray.pixels3d(surface)
+        np.copyto(buffer, view.transpose(1, 0, 2))
+        del view
+        self.pending.put((self.captured, buffer, now))
+        self.captured += 1
+        return True
+
+    def take_buffer(self):
+        # A free buffer, or None if there is none to be had: under 'drop'
+        # when all are queued, under either policy once the writer is gone
+        block = self.policy == 'block'
+        while True:
+            try:
+                return self.free.get(block, WRITER_POLL)
+            except queue.Empty:
+                if not block or not self.thread.is_alive():
+                    return None
+
+    def write_frames(self):
+        # Writer thread: encode and write queued frames until the sentinel
+        while True:
+            item = self.pending.get()
+            if item is None:
+                break
+            index, buffer, queued = item
+            try:
+                if self.error is None:
+                    if self.raw:
+                        self.output.write(buffer.data)
+                    else:
+                        with open(os.path.join(self.path, f"frame_{index:06d}.png"), 'wb') as target:
+                            target.write(encode_png(buffer, self.level))
+                    self.written += 1
+            except Exception as error:
+                # Stop writing but keep recycling buffers so the game never stalls
+                self.error = error
+            finally:
+                self.free.put(buffer)
+            latency = self.clock() - queued
+            self.latencies.append(latency)
+            self.latency_max = max(self.latency_max, latency)
+
+    def close(self):
+        # Write out everything queued, then stop the thread
+        if self.thread is not None:
+            self.pending.put(None)
+            self.thread.join()
+            self.thread = None
+        if self.output is not None:
+            self.output.flush()
+            if self.output is not self.stdout:
+                self.output.close()
+            self.output = None
+
+    def stats(self):
+        latencies = self.latencies
+        return {
+            'captured': self.captured,
+            'dropped': self.dropped,
+            'written': self.written,
+            'latency_ms': 1000.0 * sum(latencies) / len(latencies) if latencies else 0.0,
+            'latency_max_ms': 1000.0 * self.latency_max,
+        }
+
+    def summary(self):
+        stats = self.stats()
+        text = (f"capture: {stats['written']} of {stats['captured']} frames written, {stats['dropped']} dropped, "
+                f"writer latency {stats['latency_ms']:.1f} ms mean / {stats['latency_max_ms']:.1f} ms max")
+        if self.error is not None:
+            text += f", stopped writing: {self.error}"
+        return text
+
+
+def add_capture_arguments(parser):
+    parser.add_argument('--capture', metavar='PATH',
+                        help='record frames: a directory for PNGs, or a .rgb/.raw file or - for raw RGB24')
+    parser.add_argument('--capture-fps', type=int, default=60, help='frames captured per second (0: every frame)')
+    parser.add_argument('--capture-policy', choices=POLICIES, default='drop',
+                        help='when the writer falls behind, drop frames or block the game')
+
+
+def capture_from_args(args):
+    # A FrameCapture for the --capture options, or None. With frames going
+    # to stdout, anything else the program prints is sent to stderr.
+    if not args.capture:
+        return None
+    capture = FrameCapture(args.capture, args.capture_fps, policy=args.capture_policy)
+    if capture.stdout is not None:
+        sys.stdout = sys.stderr
+    return capture
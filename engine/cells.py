@@ -0,0 +1,132 @@
+"""Cell-grid helpers: a free-cell index, a board surface painted cell by cell
+and a Hamiltonian tour of the board."""
+import random
+from array import array
+
+import pygame
+
+
+class FreeCells:
+    """The empty cells of a grid of ``size`` cells, numbered ``0..size-1``.
+
+    The free cells are packed into ``cells[0..count-1]`` and ``slots``
+    maps each cell to its position there, so ``cell in free`` is one
+    comparison, ``remove()`` swaps the last free cell into the hole and
+    ``add()`` appends: both O(1). ``choice()`` picks uniformly among the
+    free cells in one draw however full the grid is, where sampling the
+    whole grid until an empty cell turns up takes ``size / count`` draws
+    on average.
+
+    Every cell starts free. Adding a free cell or removing an occupied
+    one is a caller bug and is not checked.
+    """
+
+    def __init__(self, size):
+        self.cells = array('i', range(size))
+        self.slots = array('i', range(size))
+        self.count = size
+
+    def __len__(self):
+        return self.count
+
+    def __contains__(self, cell):
+        return self.slots[cell] < self.count
+
+    def remove(self, cell):
+        # Mark ``cell`` occupied: the last free cell takes its slot
+        cells = self.cells
+        slots = self.slots
+        self.count -= 1
+        slot = slots[cell]
+        last = cells[self.count]
+        cells[slot] = last
+        slots[last] = slot
+        cells[self.count] = cell
+        slots[cell] = self.count
+
+    def add(self, cell):
+        # Mark ``cell`` free: it swaps with the first occupied cell
+        cells = self.cells
+        slots = self.slots
+        slot = slots[cell]
+        first = cells[self.count]
+        cells[slot] = first
+        slots[first] = slot
+        cells[self.count] = cell
+        slots[cell] = self.count
+        self.count += 1
+
+    def choice(self, rng=random):
+        # A uniformly random free cell, or None when the grid is full
+        if not self.count:
+            return None
+        return self.cells[rng.randrange(self.count)]
+
+
+class CellBoard:
+    """A persistent surface for a grid of cells, repainted one cell at a time.
+
+    ``background`` (the empty grid) is copied once. After that game code
+    calls ``touch(cell)`` when what a cell shows changes, and ``repaint()``
+    redraws only those cells, each from the background up, so a frame
+    costs what changed rather than what is on the board.
+    """
+
+    def __init__(self, background, cells_x, cell_size):
+        self.background = background
+        self.surface = background.copy()
+        self.cells_x = cells_x
+        self.cell_size = cell_size
+        self.dirty = set()
+
+    def rect(self, cell):
+        y, x = divmod(cell, self.cells_x)
+        size = self.cell_size
+        return pygame.Rect(x * size, y * size, size, size)
+
+    def touch(self, cell):
+        self.dirty.add(cell)
+
+    def repaint(self, paint):
+        # Redraw the touched cells with ``paint(surface, cell, rect)`` over
+        # the background; returns their rects
+        surface = self.surface
+        background = self.background
+        rects = []
+        for cell in self.dirty:
+            rect = self.rect(cell)
+            surface.blit(background, rect, rect)
+            paint(surface, cell, rect)
+            rects.append(rect)
+        self.dirty.clear()
+        return rects
+
+
+def tour_step(x, y, width, height):
+    """Direction ``(dx, dy)`` from cell ``(x, y)`` to the next cell of the tour.
+
+    The tour is a closed Hamiltonian cycle of a ``width`` x ``height`` board
+    (``height`` even): a zigzag along the rows that leaves column 0 free,
+    then back up column 0. A snake that follows it never dies, which is
+    what the benchmarks and tests use it for.
+    """
+    if x == 0:
+        return (1, 0) if y == 0 else (0, -1)
+    if y % 2 == 0:
+        return (1, 0) if x < width - 1 else (0, 1)
+    if x > 1:
+        return (-1, 0)
+    return (-1, 0) if y == height - 1 else (0, 1)
+
+
+def tour_start(length, width, height):
+    """The first ``length`` cells of the tour from ``(1, 0)``, head (the last) first."""
+    cells = []
+    x, y = 1, 0
+    for _ in range(length):
+        cells.append((x, y))
+        dx, dy = tour_step(x, y, width, height)
+        x += dx
+        y += dy
+    cells.reverse()
+    return cells
@@ -0,0 +1,79 @@
+"""Dirty-rectangle presentation: upload only the parts of the screen that changed."""
+import pygame
+
+
+class DirtyRectRenderer:
+    """Wraps the display surface and decides what to push to the screen.
+
+    With ``enabled`` off every frame is presented with ``display.flip()``
+    as before, and ``begin()`` starts it with one blit of the background,
+    if there is one. With it on, ``begin()`` restores the background only under
+    the rects drawn last frame, drawing code reports what it touched through
+    ``mark()``/``mark_all()``, and ``present()`` passes last frame's and
+    this frame's rects to ``display.update``. Mode switches, background
+    changes and frames that touch most of the screen fall back to a full
+    redraw. ``pixels`` holds the number of pixels uploaded by the last
+    ``present()``.
+    """
+
+    def __init__(self, screen, background=None, enabled=False, full_fraction=0.6):
+        self.screen = screen
+        self.bounds = screen.get_rect()
+        self.background = background
+        self.enabled = enabled
+        self.full_fraction = full_fraction
+        self.previous = []
+        self.current = []
+        self.full_redraw = True
+        self.pixels = 0
+
+    def set_background(self, background):
+        self.background = background
+        self.full_redraw = True
+
+    def toggle(self):
+        self.enabled = not self.enabled
+        self.full_redraw = True
+
+    def begin(self):
+        # Erase last frame's entities by restoring the background under them
+        screen = self.screen
+        background = self.background
+        if not self.enabled:
+            if background is not None:
+                screen.blit(background, (0, 0))
+            return
+        if self.full_redraw:
+            screen.blit(background, (0, 0))
+        else:
+            for rect in self.previous:
+                screen.blit(background, rect, rect)
+
+    def mark(self, rect):
+        if rect is not None:
+            self.current.append(rect)
+
+    def mark_all(self, rects):
+        if rects:
+            self.current.extend(rects)
+
+    def present(self):
+        bounds = self.bounds
+        full_area = bounds.width * bounds.height
+        if not self.enabled or self.full_redraw:
+            pygame.display.flip()
+            self.pixels = full_area
+        else:
+            rects = [bounds.clip(rect) for rect in self.previous]
+            rects.extend(bounds.clip(rect) for rect in self.current)
+            rects = [rect for rect in rects if rect.width and rect.height]
+            pixels = sum(rect.width * rect.height for rect in rects)
+            if pixels >= full_area * self.full_fraction:
+                pygame.display.flip()
+                pixels = full_area
+            elif rects:
+                pygame.display.update(rects)
+            self.pixels = pixels
+        self.full_redraw = False
+        self.previous = [pygame.Rect(rect) for rect in self.current] if self.enabled else []
+        self.current = []
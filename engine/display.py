@@ -0,0 +1,38 @@
+"""Deferred pygame setup: initialize only the modules a game uses, on first use.
+
+``pygame.init()`` brings up every subsystem (audio, joystick, ...), and
+``pygame.font.SysFont`` scans the system font list before it can return
+anything. The games only need the display and the default font, so they
+get them from here when they first draw.
+"""
+import pygame
+
+_fonts = {}
+
+
+def get_screen(size, caption=None):
+    # The display surface at ``size``, created (or resized) on demand
+    if not pygame.display.get_init():
+        pygame.display.init()
+    screen = pygame.display.get_surface()
+    if screen is None or screen.get_size() != tuple(size):
+        screen = pygame.display.set_mode(size)
+        if caption is not None:
+            pygame.display.set_caption(caption)
+    return screen
+
+
+def get_font(size):
+    # The default font at ``size``. SysFont(None, size) resolves to this
+    # same font, but only after scanning the installed fonts.
+    font = _fonts.get(size)
+    if font is None:
+        if not pygame.font.get_init():
+            pygame.font.init()
+        font = _fonts[size] = pygame.font.Font(None, size)
+    return font
+
+
+def shutdown():
+    _fonts.clear()
+    pygame.quit()
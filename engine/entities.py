@@ -0,0 +1,326 @@
+"""Struct-of-arrays entity storage and pooled containers."""
+import numpy as np
+
+# Fields every store has; stores may add more through keyword arguments
+BASE_FIELDS = {
+    'x': np.float64,
+    'y': np.float64,
+    'speed': np.float64,
+    'radius': np.float64,
+    'alive': np.bool_,
+}
+
+# Handles pack a slot-table id in the low bits and a generation above it
+HANDLE_BITS = 32
+HANDLE_MASK = (1 << HANDLE_BITS) - 1
+
+
+class EntityStore:
+    """Keeps one NumPy array per field instead of one object per entity.
+
+    Reading a field as an attribute (``store.y``) returns a view of the
+    active entries, so batch updates are plain array expressions::
+
+        store.y -= store.speed
+        store.alive &= store.y > 0
+        store.compact()
+
+    Live entities are packed into slots ``0..count-1``. Removal swaps the
+    last entity into the hole, so it is O(1) per entity but does not keep
+    spawn order. Removing during iteration is deferred: clear ``alive``
+    (or call ``kill()``) and ``compact()`` once the loop is done.
+
+    ``add()`` returns a stable handle that survives those moves; ``get()``
+    resolves it to a view, or ``None`` once the entity is gone. Handle ids
+    are recycled through a free list and a generation counter tells stale
+    handles apart. Arrays only grow, so a store that has reached its
+    working size no longer allocates.
+
+    Iterating the store yields lightweight ``view`` objects for code that
+    still wants to work with one entity at a time.
+    """
+
+    def __init__(self, view=None, capacity=64, **extra_fields):
+        fields = dict(BASE_FIELDS)
+        fields.update(extra_fields)
+        set_attr = object.__setattr__
+        set_attr(self, 'arrays', {name: np.zeros(capacity, dtype) for name, dtype in fields.items()})
+        set_attr(self, 'view', view or EntityView)
+        set_attr(self, 'capacity', capacity)
+        set_attr(self, 'count', 0)
+        # Handle bookkeeping: slot -> handle id, handle id -> slot, free ids
+        set_attr(self, 'ids', np.zeros(capacity, np.int64))
+        set_attr(self, 'slots', np.full(capacity, -1, np.int64))
+        set_attr(self, 'generations', np.zeros(capacity, np.int64))
+        set_attr(self, 'free_ids', np.arange(capacity - 1, -1, -1, dtype=np.int64))
+        set_attr(self, 'free_count', capacity)
+
+    def __getattr__(self, name):
+        arrays = self.__dict__['arrays']
+        if name in arrays:
+            return arrays[name][:self.count]
+        raise AttributeError(name)
+
+    def __setattr__(self, name, value):
+        if name in self.arrays:
+            self.arrays[name][:self.count] = value
+        else:
+            object.__setattr__(self, name, value)
+
+    def __len__(self):
+        return self.count
+
+    def __iter__(self):
+        view = self.view
+        for index in range(self.count):
+            yield view(self, index)
+
+    def __getitem__(self, index):
+        if not 0 <= index < self.count:
+            raise IndexError(index)
+        return self.view(self, index)
+
+    def _grow(self, needed):
+        old = self.capacity
+        capacity = old
+        while capacity < needed:
+            capacity *= 2
+        for name, array in self.arrays.items():
+            grown = np.zeros(capacity, array.dtype)
+            grown[:self.count] = array[:self.count]
+            self.arrays[name] = grown
+        ids = np.zeros(capacity, np.int64)
+        ids[:old] = self.ids
+        slots = np.full(capacity, -1, np.int64)
+        slots[:old] = self.slots
+        generations = np.zeros(capacity, np.int64)
+        generations[:old] = self.generations
+        # New handle ids go below the existing free ones so low ids are reused first
+        free_ids = np.zeros(capacity, np.int64)
+        added = capacity - old
+        free_ids[:added] = np.arange(capacity - 1, old - 1, -1)
+        free_ids[added:added + self.free_count] = self.free_ids[:self.free_count]
+        set_attr = object.__setattr__
+        set_attr(self, 'ids', ids)
+        set_attr(self, 'slots', slots)
+        set_attr(self, 'generations', generations)
+        set_attr(self, 'free_ids', free_ids)
+        set_attr(self, 'free_count', self.free_count + added)
+        set_attr(self, 'capacity', capacity)
+
+    def _claim_ids(self, start, count):
+        # Take ``count`` handle ids off the free list for slots start..start+count
+        top = self.free_count
+        ids = self.free_ids[top - count:top][::-1]
+        self.ids[start:start + count] = ids
+        self.slots[ids] = np.arange(start, start + count)
+        object.__setattr__(self, 'free_count', top - count)
+
+    def add(self, **values):
+        # Append one entity and return its handle
+        slot = self.count
+        if slot >= self.capacity:
+            self._grow(slot + 1)
+        for name, array in self.arrays.items():
+            array[slot] = values.get(name, 0)
+        self.arrays['alive'][slot] = True
+        top = self.free_count - 1
+        handle_id = int(self.free_ids[top])
+        object.__setattr__(self, 'free_count', top)
+        self.ids[slot] = handle_id
+        self.slots[handle_id] = slot
+        object.__setattr__(self, 'count', slot + 1)
+        return handle_id | int(self.generations[handle_id]) << HANDLE_BITS
+
+    def extend(self, count, **values):
+        # Append ``count`` entities at once; values may be scalars or arrays
+        start = self.count
+        if start + count > self.capacity:
+            self._grow(start + count)
+        for name, array in self.arrays.items():
+            array[start:start + count] = values.get(name, 0)
+        self.arrays['alive'][start:start + count] = True
+        self._claim_ids(start, count)
+        object.__setattr__(self, 'count', start + count)
+
+    def slot(self, handle):
+        # Current slot of a handle, or -1 if the entity no longer exists
+        handle_id = handle & HANDLE_MASK
+        if handle_id >= self.capacity or self.generations[handle_id] != handle >> HANDLE_BITS:
+            return -1
+        return int(self.slots[handle_id])
+
+    def get(self, handle):
+        slot = self.slot(handle)
+        return self.view(self, slot) if slot >= 0 else None
+
+    def kill(self, index):
+        self.arrays['alive'][index] = False
+
+    def _release(self, slot):
+        # Retire the handle id of ``slot`` and push it on the free list
+        handle_id = self.ids[slot]
+        self.slots[handle_id] = -1
+        self.generations[handle_id] += 1
+        self.free_ids[self.free_count] = handle_id
+        object.__setattr__(self, 'free_count', self.free_count + 1)
+
+    def remove(self, handle):
+        # Swap-remove one entity right away; not for use while iterating
+        slot = self.slot(handle)
+        if slot < 0:
+            return False
+        self._release(slot)
+        last = self.count - 1
+        if slot != last:
+            for array in self.arrays.values():
+                array[slot] = array[last]
+            moved = self.ids[last]
+            self.ids[slot] = moved
+            self.slots[moved] = slot
+        object.__setattr__(self, 'count', last)
+        return True
+
+    def compact(self):
+        # Drop dead entities by moving survivors from the tail into the holes
+        count = self.count
+        alive = self.arrays['alive'][:count]
+        dead = np.flatnonzero(~alive)
+        removed = len(dead)
+        if not removed:
+            return 0
+        kept = count - removed
+
+        # Retire the dead handles
+        dead_ids = self.ids[dead]
+        self.slots[dead_ids] = -1
+        self.generations[dead_ids] += 1
+        top = self.free_count
+        self.free_ids[top:top + removed] = dead_ids
+        object.__setattr__(self, 'free_count', top + removed)
+
+        # Holes below the new end are filled by survivors from above it
+        holes = dead[:np.searchsorted(dead, kept)]
+        if len(holes):
+            movers = kept + np.flatnonzero(alive[kept:])
+            for array in self.arrays.values():
+                array[holes] = array[movers]
+            moved_ids = self.ids[movers]
+            self.ids[holes] = moved_ids
+            self.slots[moved_ids] = holes
+        object.__setattr__(self, 'count', kept)
+        return removed
+
+    def clear(self):
+        if self.count:
+            self.arrays['alive'][:self.count] = False
+            self.compact()
+
+
+class EntityView:
+    """A single entity seen through its store; attributes read and write the arrays."""
+
+    __slots__ = ('store', 'index')
+
+    def __init__(self, store, index):
+        object.__setattr__(self, 'store', store)
+        object.__setattr__(self, 'index', index)
+
+    def __getattr__(self, name):
+        arrays = self.store.arrays
+        if name in arrays:
+            return arrays[name][self.index].item()
+        raise AttributeError(name)
+
+    def __setattr__(self, name, value):
+        arrays = self.store.arrays
+        if name in arrays:
+            arrays[name][self.index] = value
+        else:
+            object.__setattr__(self, name, value)
+
+
+class ObjectPool:
+    """Free list of reusable Python objects.
+
+    ``factory()`` builds a blank object and ``acquire(*args)`` hands one out
+    after calling its ``reset(*args)``, so objects are built only until the
+    pool covers the peak number in use. ``created`` counts factory calls.
+    """
+
+    def __init__(self, factory, prefill=0):
+        self.factory = factory
+        self.free = [factory() for _ in range(prefill)]
+        self.created = prefill
+
+    def acquire(self, *args):
+        if self.free:
+            item = self.free.pop()
+        else:
+            item = self.factory()
+            self.created += 1
+        item.reset(*args)
+        return item
+
+    def release(self, item):
+        self.free.append(item)
+
+
+class EntityList:
+    """Unordered container of Python objects with O(1) swap-remove.
+
+    Items get ``slot`` and ``alive`` attributes. ``discard()`` only marks an
+    item dead and queues it, so it is safe in the middle of iterating the
+    list itself; ``compact()`` afterwards swaps the last item into each hole
+    and returns dead items to the pool, if there is one.
+    """
+
+    def __init__(self, pool=None):
+        self.items = []
+        self.dead = []
+        self.pool = pool
+
+    def __len__(self):
+        return len(self.items)
+
+    def __iter__(self):
+        return iter(self.items)
+
+    def __getitem__(self, index):
+        return self.items[index]
+
+    def append(self, item):
+        item.slot = len(self.items)
+        item.alive = True
+        self.items.append(item)
+        return item
+
+    def spawn(self, *args):
+        # Take an object from the pool and add it
+        return self.append(self.pool.acquire(*args))
+
+    def discard(self, item):
+        if item.alive:
+            item.alive = False
+            self.dead.append(item)
+
+    def compact(self):
+        items = self.items
+        dead = self.dead
+        pool = self.pool
+        while dead:
+            item = dead.pop()
+            last = items.pop()
+            if last is not item:
+                items[item.slot] = last
+                last.slot = item.slot
+            if pool is not None:
+                pool.release(item)
+
+    def clear(self):
+        for item in self.items:
+            item.alive = False
+            if self.pool is not None:
+                self.pool.release(item)
+        self.items.clear()
+        self.dead.clear()
@@ -0,0 +1,126 @@
+"""Grid navigation: a flow field shared by every agent chasing the same goals."""
+import numpy as np
+
+UNREACHABLE = np.iinfo(np.int32).max
+
+# Neighbour offsets (row, column), straight moves first so they win ties
+NEIGHBOURS = ((-1, 0), (1, 0), (0, -1), (0, 1), (-1, -1), (-1, 1), (1, -1), (1, 1))
+
+
+class FlowField:
+    """Breadth-first distances to the goal cells, and the next step from every cell.
+
+    The area is cut into ``cell_size`` cells, and a cell is blocked when an
+    agent of ``clearance`` (half width, half height) centred on it would
+    overlap one of ``rects``. Build a new field when the rects change.
+
+    ``update(goals)`` rebuilds the field only when the goal positions fall
+    in different cells than last time, so a chase costs one rebuild per
+    cell the target crosses instead of one search per agent per frame.
+    The search is a wavefront over the whole grid with array shifts, and
+    each cell then points at its neighbour closest to a goal; diagonal
+    steps need both straight neighbours free, so agents do not cut
+    corners. ``lookup(x, y)`` is then O(1) per agent.
+    """
+
+    def __init__(self, rects, width, height, cell_size=20, clearance=(0, 0)):
+        self.cell_size = cell_size
+        self.columns = -(-width // cell_size)
+        self.rows = -(-height // cell_size)
+        self.blocked = self.rasterize(rects, clearance)
+        self.goals = None
+        self.rebuilds = 0
+        self.distance = np.full((self.rows, self.columns), UNREACHABLE, np.int32)
+        self.table = None
+
+    def rasterize(self, rects, clearance):
+        # Blocked cells: centres within ``clearance`` of a rect
+        half_width, half_height = clearance
+        centres_x = (np.arange(self.columns) + 0.5) * self.cell_size
+        centres_y = (np.arange(self.rows) + 0.5) * self.cell_size
+        blocked = np.zeros((self.rows, self.columns), np.bool_)
+        for rect in rects:
+            left, top, width, height = rect
+            if width <= 0 or height <= 0:
+                continue
+            columns = (centres_x > left - half_width) & (centres_x < left + width + half_width)
+            rows = (centres_y > top - half_height) & (centres_y < top + height + half_height)
+            blocked |= np.outer(rows, columns)
+        return blocked
+
+    def cell(self, x, y):
+        # (column, row) of a position, clamped to the grid
+        size = self.cell_size
+        return (min(max(int(x // size), 0), self.columns - 1),
+                min(max(int(y // size), 0), self.rows - 1))
+
+    def update(self, goals):
+        # Point the field at the cells of ``goals`` (x, y positions);
+        # returns whether it had to be rebuilt
+        cells = frozenset(self.cell(x, y) for x, y in goals)
+        if cells == self.goals:
+            return False
+        self.goals = cells
+        self.rebuild(cells)
+        return True
+
+    def rebuild(self, cells):
+        rows = self.rows
+        columns = self.columns
+        free = ~self.blocked
+        distance = self.distance
+        distance.fill(UNREACHABLE)
+
+        # Wavefront from the goal cells (a goal may sit in a blocked cell,
+        # e.g. a tank against an obstacle), one ring of cells per pass
+        frontier = np.zeros((rows, columns), np.bool_)
+        for column, row in cells:
+            frontier[row, column] = True
+        seen = frontier.copy()
+        steps = 0
+        while frontier.any():
+            distance[frontier] = steps
+            grown = np.zeros_like(frontier)
+            grown[1:] |= frontier[:-1]
+            grown[:-1] |= frontier[1:]
+            grown[:, 1:] |= frontier[:, :-1]
+            grown[:, :-1] |= frontier[:, 1:]
+            frontier = grown & free & ~seen
+            seen |= frontier
+            steps += 1
+
+        # Each cell steps to its neighbour with the smallest distance, if
+        # that is closer than the cell itself
+        padded = np.full((rows + 2, columns + 2), UNREACHABLE, np.int32)
+        padded[1:-1, 1:-1] = distance
+        open_cells = np.zeros((rows + 2, columns + 2), np.bool_)
+        open_cells[1:-1, 1:-1] = free
+        candidates = np.empty((len(NEIGHBOURS), rows, columns), np.int32)
+        for index, (dr, dc) in enumerate(NEIGHBOURS):
+            neighbour = padded[1 + dr:rows + 1 + dr, 1 + dc:columns + 1 + dc]
+            if dr and dc:
+                corners = (open_cells[1 + dr:rows + 1 + dr, 1:columns + 1] &
+                           open_cells[1:rows + 1, 1 + dc:columns + 1 + dc])
+                neighbour = np.where(corners, neighbour, UNREACHABLE)
+            candidates[index] = neighbour
+        best = np.argmin(candidates, axis=0)
+        closer = np.take_along_axis(candidates, best[None], axis=0)[0] < distance
+        offsets = np.array(NEIGHBOURS)
+        size = self.cell_size
+        next_x = (np.arange(columns)[None, :] + offsets[best, 1] + 0.5) * size
+        next_y = (np.arange(rows)[:, None] + offsets[best, 0] + 0.5) * size
+
+        # Plain nested lists: per-agent lookups stay in Python without
+        # NumPy scalar overhead. A cell with nowhere closer to go has None.
+        table = []
+        for row_distance, row_closer, row_x, row_y in zip(distance.tolist(), closer.tolist(),
+                                                          next_x.tolist(), next_y.tolist()):
+            table.append([(away, (x, y) if step else None)
+                          for away, step, x, y in zip(row_distance, row_closer, row_x, row_y)])
+        self.table = table
+        self.rebuilds += 1
+
+    def lookup(self, x, y):
+        # (distance in cells, centre of the next cell or None) at a position
+        column, row = self.cell(x, y)
+        return self.table[row][column]
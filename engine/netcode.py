@@ -0,0 +1,150 @@
+"""Quantized, delta-compressed state snapshots for networked play."""
+import math
+import struct
+
+# Entity ids: kind in the top byte, a serial number below
+KIND_SHIFT = 24
+SERIAL_MASK = (1 << KIND_SHIFT) - 1
+
+# Largest datagram payload sent, so packets fit a typical path MTU without
+# IP fragmentation; longer messages go out in pieces
+MAX_PAYLOAD = 1200
+
+COUNT = struct.Struct('<H')
+ENTITY = struct.Struct('<IB')
+TAU = 2 * math.pi
+
+
+def entity_id(kind, serial):
+    return kind << KIND_SHIFT | serial & SERIAL_MASK
+
+
+def entity_kind(ident):
+    return ident >> KIND_SHIFT
+
+
+def quantize(value, scale=1):
+    # A non-negative quantity as a 16-bit integer in steps of 1/scale
+    return min(max(int(round(value * scale)), 0), 0xFFFF)
+
+
+def quantize_angle(angle):
+    return int(round(angle % TAU / TAU * 0x10000)) & 0xFFFF
+
+
+def dequantize_angle(value):
+    return value / 0x10000 * TAU
+
+
+def encode_delta(base, current):
+    # Snapshots are {entity id: tuple of 16-bit fields}. Encodes ``current``
+    # against ``base`` (an empty dict for a full snapshot): the ids that are
+    # gone, then each new or changed entity with a bit mask of the fields
+    # that differ and only those fields.
+    removed = [ident for ident in base if ident not in current]
+    parts = [COUNT.pack(len(removed)), struct.pack(f'<{len(removed)}I', *removed)]
+    changed = []
+    for ident, fields in current.items():
+        old = base.get(ident)
+        if old == fields:
+            continue
+        if old is None:
+            mask = (1 << len(fields)) - 1
+            values = fields
+        else:
+            mask = 0
+            values = []
+            for index, (value, previous) in enumerate(zip(fields, old)):
+                if value != previous:
+                    mask |= 1 << index
+                    values.append(value)
+        changed.append(ENTITY.pack(ident, mask) + struct.pack(f'<{len(values)}H', *values))
+    parts.append(COUNT.pack(len(changed)))
+    parts.extend(changed)
+    return b''.join(parts)
+
+
+def decode_delta(base, data, offset=0, field_counts=None):
+    # Inverse of encode_delta: ``base`` with the changes in ``data`` applied,
+    # as a new dict. ``field_counts`` maps kind to field count and is needed
+    # for entities that are not in ``base``.
+    snapshot = dict(base)
+    (count,) = COUNT.unpack_from(data, offset)
+    offset += COUNT.size
+    for ident in struct.unpack_from(f'<{count}I', data, offset):
+        snapshot.pop(ident, None)
+    offset += 4 * count
+    (count,) = COUNT.unpack_from(data, offset)
+    offset += COUNT.size
+    for _ in range(count):
+        ident, mask = ENTITY.unpack_from(data, offset)
+        offset += ENTITY.size
+        values = struct.unpack_from(f'<{bin(mask).count("1")}H', data, offset)
+        offset += 2 * len(values)
+        old = snapshot.get(ident)
+        if old is None:
+            old = (0,) * field_counts[entity_kind(ident)]
+        fields = list(old)
+        value = iter(values)
+        for index in range(len(fields)):
+            if mask >> index & 1:
+                fields[index] = next(value)
+        snapshot[ident] = tuple(fields)
+    return snapshot, offset
+
+
+class SnapshotHistory:
+    """The last ``size`` snapshots by tick, to delta against what a peer has."""
+
+    def __init__(self, size=64):
+        self.size = size
+        self.snapshots = {}
+
+    def add(self, tick, snapshot):
+        snapshots = self.snapshots
+        snapshots[tick] = snapshot
+        if len(snapshots) > self.size:
+            del snapshots[next(iter(snapshots))]
+
+    def get(self, tick):
+        return self.snapshots.get(tick)
+
+
+def split_payload(data, size):
+    # ``data`` in pieces of at most ``size`` bytes; no data is one empty piece
+    return [data[start:start + size] for start in range(0, len(data), size)] or [b'']
+
+
+class Reassembly:
+    """Puts messages sent in pieces back together, by a key such as a tick.
+
+    ``add(key, index, count, piece)`` returns the whole message once all
+    ``count`` pieces are in, and None until then; repeated pieces are
+    harmless. Only the ``size`` newest keys are kept, so messages missing
+    a piece that never arrives are dropped.
+    """
+
+    def __init__(self, size=4):
+        self.size = size
+        self.pending = {}
+
+    def add(self, key, index, count, piece):
+        pending = self.pending
+        parts = pending.get(key)
+        if parts is None:
+            if len(pending) >= self.size:
+                oldest = min(pending)
+                if key < oldest:
+                    return None
+                del pending[oldest]
+            parts = pending[key] = {}
+        parts[index] = piece
+        if len(parts) < count:
+            return None
+        del pending[key]
+        return b''.join(parts[index] for index in range(count))
+
+    def discard(self, key):
+        # Drop unfinished messages up to ``key``, once something newer is complete
+        for old in [old for old in self.pending if old <= key]:
+            del self.pending[old]
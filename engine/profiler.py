@@ -0,0 +1,161 @@
+"""Per-phase frame timings with rolling percentiles, an overlay and a log stream."""
+import csv
+import json
+from time import perf_counter_ns
+
+import numpy as np
+import pygame
+
+OVERLAY_COLOR = (180, 255, 180)
+OVERLAY_BACKGROUND = (0, 0, 0, 160)
+
+
+class FrameProfiler:
+    """Times the phases of the main loop with ``perf_counter_ns``.
+
+    The loop calls ``start_frame()``, then ``lap(phase)`` at the end of each
+    phase and ``end_frame()`` last. A lap charges the time since the
+    previous lap to its phase, so a phase that runs several times a frame
+    (fixed-timestep updates) adds up. The last ``window`` frames are kept
+    in a ring buffer for ``percentiles()`` and ``histogram()``; with a log
+    open every frame is also streamed as a CSV row or a JSON line.
+
+    Frames are timed while ``requested`` is set (a log or a benchmark
+    wants them) or the overlay is up; ``toggle()`` only shows or hides the
+    overlay, so it never stops a log. When neither holds each call is one
+    attribute check. Changes take effect at the next ``start_frame()`` so
+    no frame is half measured.
+    """
+
+    def __init__(self, phases, window=300, enabled=False, refresh=30):
+        self.phases = list(phases)
+        self.columns = self.phases + ['total']
+        self.index = {name: index for index, name in enumerate(self.phases)}
+        self.window = window
+        self.samples = np.zeros((window, len(self.columns)), np.int64)
+        self.current = [0] * len(self.phases)
+        self.frames = 0
+        self.enabled = False
+        self.requested = enabled
+        self.overlay = False
+        self.refresh = refresh
+        self.frame_start = 0
+        self.last = 0
+        self.log = None
+        self.writer = None
+        self.stats = None
+        self.shade = None
+
+    def toggle(self):
+        self.overlay = not self.overlay
+
+    def start_frame(self):
+        self.enabled = self.requested or self.overlay
+        if self.enabled:
+            self.frame_start = self.last = perf_counter_ns()
+
+    def lap(self, phase):
+        if self.enabled:
+            now = perf_counter_ns()
+            self.current[self.index[phase]] += now - self.last
+            self.last = now
+
+    def end_frame(self):
+        if not self.enabled:
+            return
+        current = self.current
+        total = perf_counter_ns() - self.frame_start
+        row = self.samples[self.frames % self.window]
+        row[:-1] = current
+        row[-1] = total
+        if self.writer is not None:
+            self.writer(self.frames, current, total)
+        self.frames += 1
+        self.current = [0] * len(current)
+
+    def recent(self):
+        # The frames still in the ring buffer, in milliseconds
+        return self.samples[:min(self.frames, self.window)] / 1e6
+
+    def percentiles(self, quantiles=(50, 95, 99)):
+        # {column: [ms at each quantile]} over the rolling window
+        recent = self.recent()
+        if not len(recent):
+            return {}
+        values = np.percentile(recent, quantiles, axis=0)
+        return {name: values[:, column].tolist() for column, name in enumerate(self.columns)}
+
+    def histogram(self, phase='total', bins=20):
+        # Counts and bin edges (ms) of one phase over the rolling window
+        recent = self.recent()
+        return np.histogram(recent[:, self.columns.index(phase)], bins=bins)
+
+    def open_log(self, path):
+        # Stream every profiled frame to ``path``: JSON lines for .jsonl, CSV otherwise
+        self.close()
+        self.log = open(path, 'w', newline='')
+        phases = self.phases
+        if path.endswith('.jsonl'):
+            write = self.log.write
+
+            def writer(frame, current, total):
+                record = dict(zip(phases, current))
+                record['frame'] = frame
+                record['total'] = total
+                write(json.dumps(record) + '\n')
+        else:
+            rows = csv.writer(self.log)
+            rows.writerow(['frame'] + [name + '_ns' for name in self.columns])
+
+            def writer(frame, current, total):
+                rows.writerow([frame, *current, total])
+        self.writer = writer
+
+    def close(self):
+        if self.log is not None:
+            self.log.close()
+        self.log = None
+        self.writer = None
+
+    def summary(self):
+        # Text table of the rolling percentiles
+        lines = [f"{'phase':<12} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8}"]
+        for name, (p50, p95, p99) in self.percentiles().items():
+            lines.append(f"{name:<12} {p50:8.3f} {p95:8.3f} {p99:8.3f}")
+        return '\n'.join(lines)
+
+    def draw_overlay(self, surface, text, font, position):
+        # Percentile table plus a histogram of total frame time; the numbers
+        # refresh every ``refresh`` frames and come from the glyph atlas, so
+        # the overlay renders no new text surfaces. Returns the rect drawn.
+        if self.stats is None or self.frames % self.refresh == 0:
+            counts, _ = self.histogram() if self.frames else (np.zeros(20, np.int64), None)
+            self.stats = (self.percentiles(), counts.tolist())
+        percentiles, counts = self.stats
+        left, top = position
+        line_height = font.get_linesize()
+        width = 300
+        height = line_height * (len(self.columns) + 1) + 40
+        panel = pygame.Rect(left, top, width, height)
+        if self.shade is None or self.shade.get_size() != panel.size:
+            self.shade = pygame.Surface(panel.size, pygame.SRCALPHA)
+            self.shade.fill(OVERLAY_BACKGROUND)
+        surface.blit(self.shade, panel)
+
+        y = top + 4
+        text.draw_labelled(surface, font, "ms p50/p95/p99", '', OVERLAY_COLOR, (left + 6, y))
+        for name in self.columns:
+            y += line_height
+            values = percentiles.get(name, (0.0, 0.0, 0.0))
+            text.draw_labelled(surface, font, name + ' ', '/'.join(f"{value:.2f}" for value in values),
+                               OVERLAY_COLOR, (left + 6, y))
+
+        # Frame time histogram, one bar per bin scaled to the tallest
+        y += line_height + 4
+        tallest = max(counts) or 1
+        bar_width = (width - 12) // len(counts)
+        for index, count in enumerate(counts):
+            bar_height = 32 * count // tallest
+            pygame.draw.rect(surface, OVERLAY_COLOR, (left + 6 + index * bar_width, y + 32 - bar_height,
+                                                      bar_width - 1, bar_height))
+        return panel
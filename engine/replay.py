@@ -0,0 +1,132 @@
+"""Input recording and deterministic replay."""
+import hashlib
+import struct
+import zlib
+
+import numpy as np
+
+MAGIC = b'RPLY'
+VERSION = 1
+# magic, version, bits per step, seed, steps, final-state checksum
+HEADER = struct.Struct('<4sBBqI16s')
+CHECKSUM_SIZE = 16
+
+
+class InputBits:
+    """Packs the input of one simulation step into a small integer.
+
+    ``held`` keys are sampled from ``pygame.key.get_pressed()`` and get the
+    low bits; ``pressed`` keys are KEYDOWN events since the previous step
+    and get the bits above. ``keys(mask)`` and ``events(mask)`` turn a mask
+    back into what the game reads, so live play and replays share one path.
+    """
+
+    def __init__(self, held, pressed):
+        self.held = tuple(held)
+        self.pressed = tuple(pressed)
+        self.bits = len(self.held) + len(self.pressed)
+
+    def encode(self, keys, events=()):
+        mask = 0
+        for bit, key in enumerate(self.held):
+            if keys[key]:
+                mask |= 1 << bit
+        for bit, key in enumerate(self.pressed, len(self.held)):
+            if key in events:
+                mask |= 1 << bit
+        return mask
+
+    def keys(self, mask):
+        return HeldKeys(self.held, mask)
+
+    def events(self, mask):
+        return [key for bit, key in enumerate(self.pressed, len(self.held)) if mask >> bit & 1]
+
+
+class HeldKeys:
+    """Stands in for ``pygame.key.get_pressed()`` when the input is a mask."""
+
+    __slots__ = ('held',)
+
+    def __init__(self, keys, mask):
+        self.held = {key for bit, key in enumerate(keys) if mask >> bit & 1}
+
+    def __getitem__(self, key):
+        return key in self.held
+
+
+def state_checksum(*parts):
+    # Digest of scalars and NumPy arrays describing a game state
+    digest = hashlib.blake2b(digest_size=CHECKSUM_SIZE)
+    for part in parts:
+        if isinstance(part, np.ndarray):
+            digest.update(np.ascontiguousarray(part).tobytes())
+        else:
+            digest.update(repr(part).encode())
+        digest.update(b'|')
+    return digest.digest()
+
+
+def pack_inputs(masks, bits):
+    # ``bits`` bits per step, packed back to back and deflated
+    masks = np.asarray(masks, np.uint32)
+    flags = (masks[:, None] >> np.arange(bits, dtype=np.uint32)) & 1
+    return zlib.compress(np.packbits(flags.astype(np.uint8).ravel(), bitorder='little').tobytes(), 9)
+
+
+def unpack_inputs(data, bits, steps):
+    flags = np.unpackbits(np.frombuffer(zlib.decompress(data), np.uint8), count=steps * bits, bitorder='little')
+    weights = np.uint32(1) << np.arange(bits, dtype=np.uint32)
+    return (flags.reshape(steps, bits).astype(np.uint32) * weights).sum(axis=1).tolist()
+
+
+class ReplayRecorder:
+    """Collects the input mask of every step; ``save()`` writes the replay."""
+
+    def __init__(self, seed, bits):
+        self.seed = seed
+        self.bits = bits
+        self.masks = []
+
+    def append(self, mask):
+        self.masks.append(mask)
+
+    def save(self, path, checksum):
+        with open(path, 'wb') as output:
+            output.write(HEADER.pack(MAGIC, VERSION, self.bits, self.seed, len(self.masks), checksum))
+            output.write(pack_inputs(self.masks, self.bits))
+
+
+class Replay:
+    """A recorded run: seed, per-step input masks and final-state checksum.
+
+    ``inputs(game)`` hands out the masks in order, so a replay can drive
+    the same loop as live input or the autopilot.
+    """
+
+    def __init__(self, seed, bits, masks, checksum):
+        self.seed = seed
+        self.bits = bits
+        self.masks = masks
+        self.checksum = checksum
+        self.position = 0
+
+    @classmethod
+    def load(cls, path):
+        with open(path, 'rb') as source:
+            data = source.read()
+        magic, version, bits, seed, steps, checksum = HEADER.unpack_from(data)
+        if magic != MAGIC or version != VERSION:
+            raise ValueError(f"{path}: not a version {VERSION} replay")
+        return cls(seed, bits, unpack_inputs(data[HEADER.size:], bits, steps), checksum)
+
+    def __len__(self):
+        return len(self.masks)
+
+    def inputs(self, game):
+        mask = self.masks[self.position]
+        self.position += 1
+        return mask
+
+    def verify(self, checksum):
+        return checksum == self.checksum
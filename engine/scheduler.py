@@ -0,0 +1,96 @@
+"""Time-sliced scheduling of agent decisions under a per-step budget."""
+import collections
+import heapq
+import itertools
+from time import perf_counter
+
+
+class ThinkScheduler:
+    """Runs agent decisions when they fall due, within a time budget per step.
+
+    ``add(agent)`` queues an agent; ``run(think)`` advances one step and
+    calls ``think(agent, elapsed)`` for the agents that are due, the most
+    overdue first, where ``elapsed`` is the steps since the agent's last
+    decision. ``think`` returns the steps until the agent's next decision
+    (its level of detail) or None to drop it. Agents whose ``alive`` is
+    false are dropped without a call.
+
+    Once ``budget_ms`` is spent the remaining due agents are deferred to
+    the next step, where they go first; at least one agent thinks per
+    step so nobody starves. With ``budget_ms=None`` every due agent thinks,
+    which keeps a simulation deterministic.
+    """
+
+    def __init__(self, budget_ms=None, clock=perf_counter):
+        self.budget = None if budget_ms is None else budget_ms / 1000.0
+        self.clock = clock
+        self.queue = []  # Heap of (due step, order, last decision step, agent)
+        self.order = itertools.count()
+        self.tick = 0
+        # Queued entries that are due (due step <= tick), and how many fall
+        # due at each later step, so the deferred count needs no heap scan
+        self.due = 0
+        self.upcoming = collections.Counter()
+        # Counters: the last step, then running totals
+        self.thought = 0
+        self.deferred = 0
+        self.elapsed = 0.0
+        self.total_thought = 0
+        self.total_deferred = 0
+
+    def __len__(self):
+        return len(self.queue)
+
+    def add(self, agent, delay=0):
+        self.push(self.tick + delay, self.tick, agent)
+
+    def push(self, due, last, agent):
+        heapq.heappush(self.queue, (due, next(self.order), last, agent))
+        if due <= self.tick:
+            self.due += 1
+        else:
+            self.upcoming[due] += 1
+
+    def clear(self):
+        self.queue.clear()
+        self.due = 0
+        self.upcoming.clear()
+
+    def run(self, think):
+        self.tick += 1
+        tick = self.tick
+        self.due += self.upcoming.pop(tick, 0)
+        queue = self.queue
+        clock = self.clock
+        start = clock()
+        deadline = None if self.budget is None else start + self.budget
+        thought = 0
+        while queue and queue[0][0] <= tick:
+            if thought and deadline is not None and clock() >= deadline:
+                break
+            _, _, last, agent = heapq.heappop(queue)
+            self.due -= 1
+            if not agent.alive:
+                continue
+            delay = think(agent, tick - last)
+            thought += 1
+            if delay is not None:
+                self.push(tick + delay, tick, agent)
+        # Only an exhausted budget leaves due agents behind
+        deferred = self.due
+        self.thought = thought
+        self.deferred = deferred
+        self.elapsed = clock() - start
+        self.total_thought += thought
+        self.total_deferred += deferred
+        return thought
+
+    def stats(self):
+        return {
+            'queued': len(self.queue),
+            'thought': self.thought,
+            'deferred': self.deferred,
+            'ms': 1000.0 * self.elapsed,
+            'total_thought': self.total_thought,
+            'total_deferred': self.total_deferred,
+        }
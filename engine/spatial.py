@@ -0,0 +1,173 @@
+"""Uniform-grid broad phases for collision queries."""
+import numpy as np
+import pygame
+
+
+class RectGrid:
+    """Static rectangles compiled once into a uniform grid.
+
+    Each rect is stored (as a cached ``pygame.Rect``) in every cell it
+    overlaps, so a query only tests the rects in the few cells under the
+    query rect, with ``Rect.collidelist`` doing the loop in C. Build a new
+    grid when the rectangles change.
+    """
+
+    def __init__(self, rects, cell_size=64):
+        self.cell_size = cell_size
+        self.rects = [pygame.Rect(rect) for rect in rects]
+        self.masks = {}
+        cells = {}
+        for index, rect in enumerate(self.rects):
+            for key in self.cells_under(rect):
+                bucket = cells.get(key)
+                if bucket is None:
+                    bucket = cells[key] = ([], [])
+                bucket[0].append(rect)
+                bucket[1].append(index)
+        self.cells = cells
+
+    def cells_under(self, rect):
+        size = self.cell_size
+        x0 = rect.left // size
+        x1 = (rect.right - 1) // size
+        y0 = rect.top // size
+        y1 = (rect.bottom - 1) // size
+        return [(cx, cy) for cx in range(x0, x1 + 1) for cy in range(y0, y1 + 1)]
+
+    def collides(self, rect):
+        # Whether ``rect`` overlaps any of the rects; the hot path, so the
+        # cell range is walked inline
+        size = self.cell_size
+        cells = self.cells
+        x1 = (rect.right - 1) // size
+        y0 = rect.top // size
+        y1 = (rect.bottom - 1) // size
+        for cx in range(rect.left // size, x1 + 1):
+            for cy in range(y0, y1 + 1):
+                bucket = cells.get((cx, cy))
+                if bucket is not None and rect.collidelist(bucket[0]) != -1:
+                    return True
+        return False
+
+    def query(self, rect):
+        # Indexes of every rect that ``rect`` overlaps, in build order
+        cells = self.cells
+        found = set()
+        for key in self.cells_under(rect):
+            bucket = cells.get(key)
+            if bucket is not None:
+                indexes = bucket[1]
+                found.update(indexes[hit] for hit in rect.collidelistall(bucket[0]))
+        return sorted(found)
+
+    def collide_squares(self, left, top, size):
+        # Vectorized collides() for many size x size squares at the integer
+        # corners ``left``/``top``: a boolean array, one lookup per square
+        mask = self.masks.get(size)
+        if mask is None:
+            mask = self.masks[size] = self.corner_mask(size)
+        x0, y0, grid = mask
+        ix = np.asarray(left, np.int64) - x0
+        iy = np.asarray(top, np.int64) - y0
+        height, width = grid.shape
+        inside = (ix >= 0) & (ix < width) & (iy >= 0) & (iy < height)
+        hits = np.zeros(len(ix), np.bool_)
+        hits[inside] = grid[iy[inside], ix[inside]]
+        return hits
+
+    def corner_mask(self, size):
+        # Every corner position whose size x size square overlaps a rect:
+        # each rect grown up and left by size - 1 and rasterized, with the
+        # origin of the grid
+        rects = [rect for rect in self.rects if rect.width > 0 and rect.height > 0]
+        if not rects:
+            return 0, 0, np.zeros((0, 0), np.bool_)
+        x0 = min(rect.left for rect in rects) - size + 1
+        y0 = min(rect.top for rect in rects) - size + 1
+        grid = np.zeros((max(rect.bottom for rect in rects) - y0, max(rect.right for rect in rects) - x0), np.bool_)
+        for rect in rects:
+            grid[rect.top - size + 1 - y0:rect.bottom - y0, rect.left - size + 1 - x0:rect.right - x0] = True
+        return x0, y0, grid
+
+
+def close_pairs(ax, ay, ar, bx, by, br, cell_size=64, box=False):
+    """Return index arrays ``(i, j)`` of every pair with ``dist(a[i], b[j]) < ar[i] + br[j]``.
+
+    A spatial hash in array form: ``b`` is sorted by grid cell and each
+    ``a`` looks up the runs of the 2x2 block of cells nearest to it with
+    ``searchsorted``, so only nearby candidates reach the exact
+    squared-distance test. ``cell_size`` must be at least twice the largest
+    reach. Pairs come back ordered by ``i`` and then ``j``. With ``box`` the
+    test is ``|dx| < reach and |dy| < reach`` instead of the distance.
+    """
+    empty = np.zeros(0, np.intp)
+    if len(ax) == 0 or len(bx) == 0:
+        return empty, empty
+
+    # Pack (cell x, cell y) into one sortable key; the offset keeps it positive
+    stride = 1 << 20
+    offset = 1 << 19
+    bkey = (np.floor(bx / cell_size).astype(np.int64) + offset) * stride + np.floor(by / cell_size).astype(np.int64) + offset
+    order = np.argsort(bkey, kind='stable')
+    sorted_keys = bkey[order]
+    fx = ax / cell_size
+    fy = ay / cell_size
+    acx = np.floor(fx).astype(np.int64)
+    acy = np.floor(fy).astype(np.int64)
+    # Step towards the neighbouring cell on the side of the cell we sit in
+    sx = np.where(fx - acx < 0.5, -1, 1)
+    sy = np.where(fy - acy < 0.5, -1, 1)
+    acx += offset
+    acy += offset
+
+    found_a = []
+    found_b = []
+    for cx, cy in ((acx, acy), (acx + sx, acy), (acx, acy + sy), (acx + sx, acy + sy)):
+        keys = cx * stride + cy
+        lo = np.searchsorted(sorted_keys, keys, 'left')
+        hi = np.searchsorted(sorted_keys, keys, 'right')
+        counts = hi - lo
+        total = int(counts.sum())
+        if not total:
+            continue
+        # Expand each a's [lo, hi) run into individual candidate pairs
+        ia = np.repeat(np.arange(len(ax)), counts)
+        run_start = np.repeat(lo - (np.cumsum(counts) - counts), counts)
+        jb = order[run_start + np.arange(total)]
+        found_a.append(ia)
+        found_b.append(jb)
+    if not found_a:
+        return empty, empty
+
+    ia = np.concatenate(found_a)
+    jb = np.concatenate(found_b)
+    reach = ar[ia] + br[jb]
+    if box:
+        close = (np.abs(ax[ia] - bx[jb]) < reach) & (np.abs(ay[ia] - by[jb]) < reach)
+    else:
+        close = (ax[ia] - bx[jb])**2 + (ay[ia] - by[jb])**2 < reach * reach
+    ia = ia[close]
+    jb = jb[close]
+    order = np.lexsort((jb, ia))
+    return ia[order], jb[order]
+
+
+def match_first(ia, jb):
+    """Pair each ``a`` with its first ``b`` that no earlier ``a`` has taken.
+
+    ``ia``/``jb`` are pairs ordered by ``i`` then ``j``, as returned by
+    ``close_pairs``. This is what a nested loop that removes both partners
+    on a hit would produce. Returns the matched index arrays.
+    """
+    taken = set()
+    matched_a = []
+    matched_b = []
+    last = -1
+    for a, b in zip(ia.tolist(), jb.tolist()):
+        if a == last or b in taken:
+            continue
+        last = a
+        taken.add(b)
+        matched_a.append(a)
+        matched_b.append(b)
+    return np.array(matched_a, np.intp), np.array(matched_b, np.intp)
@@ -0,0 +1,67 @@
+"""Pre-rendered sprites drawn with one ``blits()`` call per layer."""
+import numpy as np
+import pygame
+
+
+class Sprite:
+    """A baked image plus the pixel offset of the entity's centre inside it."""
+
+    __slots__ = ('image', 'anchor')
+
+    def __init__(self, image, anchor):
+        self.image = image
+        self.anchor = anchor
+
+
+class SpriteCache:
+    """Rasterizes each registered entity type once per variant.
+
+    ``register()`` records how to paint a sprite: ``paint(surface, x, y,
+    variant)`` draws the entity centred at ``(x, y)`` using the usual
+    ``pygame.draw`` calls. The first request for a ``(name, variant)`` pair
+    paints it onto a transparent surface, converts it for fast blitting and
+    keeps it; later frames only blit.
+    """
+
+    def __init__(self):
+        self.painters = {}
+        self.sprites = {}
+
+    def register(self, name, size, anchor, paint):
+        self.painters[name] = (size, anchor, paint)
+        # Drop stale bakes if a painter is replaced
+        for key in [key for key in self.sprites if key[0] == name]:
+            del self.sprites[key]
+
+    def get(self, name, variant=None):
+        key = (name, variant)
+        sprite = self.sprites.get(key)
+        if sprite is None:
+            size, anchor, paint = self.painters[name]
+            image = pygame.Surface(size, pygame.SRCALPHA)
+            paint(image, anchor[0], anchor[1], variant)
+            # convert_alpha() needs a display; plain SRCALPHA still works without one
+            if pygame.display.get_surface() is not None:
+                image = image.convert_alpha()
+            sprite = self.sprites[key] = Sprite(image, anchor)
+        return sprite
+
+    def draw(self, surface, name, x, y, variant=None):
+        sprite = self.get(name, variant)
+        return surface.blit(sprite.image, (x - sprite.anchor[0], y - sprite.anchor[1]))
+
+    def draw_batch(self, surface, name, xs, ys, variant=None, doreturn=False):
+        # Blit one sprite at every (xs[i], ys[i]) with a single blits() call;
+        # with doreturn the touched rects come back for dirty-rect tracking
+        if len(xs) == 0:
+            return []
+        sprite = self.get(name, variant)
+        image = sprite.image
+        left = np.floor(np.asarray(xs, np.float64) - sprite.anchor[0])
+        top = np.floor(np.asarray(ys, np.float64) - sprite.anchor[1])
+        return surface.blits([(image, position) for position in zip(left.astype(np.int32).tolist(),
+                                                                      top.astype(np.int32).tolist())],
+                             doreturn=doreturn)
+
+    def clear(self):
+        self.sprites.clear()
@@ -0,0 +1,97 @@
+"""Parallax star background baked into one tileable surface per speed band."""
+import numpy as np
+import pygame
+
+# Colour key for the transparent layers; stars are never pure black
+TRANSPARENT = (0, 0, 0)
+
+
+class Starfield:
+    """Scrolling star background with a constant per-frame cost.
+
+    Stars are split into ``bands`` by speed and each band is painted once
+    onto a surface the size of the screen that tiles vertically. Scrolling
+    a band is two blits of its surface, whatever the number of stars, so
+    density can go into the tens of thousands. The slowest band is opaque
+    and carries the background colour, which replaces ``screen.fill``.
+    """
+
+    def __init__(self, width, height, colors, background, count=100, bands=4,
+                 sizes=(1, 3), speeds=(0.2, 0.8), rng=None):
+        self.width = width
+        self.height = height
+        self.colors = colors
+        self.background = background
+        self.bands = bands
+        self.sizes = sizes
+        self.speeds = speeds
+        self.rng = rng if rng is not None else np.random.default_rng()
+        # Each band scrolls at the mean speed of its slice of the speed range
+        step = (speeds[1] - speeds[0]) / bands
+        self.band_speeds = [speeds[0] + step * (band + 0.5) for band in range(bands)]
+        self.offsets = [0.0] * bands
+        self.layers = []
+        self.generate(count)
+
+    def generate(self, count):
+        # Roll the stars the same way the per-star background did
+        rng = self.rng
+        self.count = count
+        self.x = rng.integers(0, self.width, count, endpoint=True)
+        self.y = rng.integers(0, self.height, count, endpoint=True)
+        self.size = rng.integers(self.sizes[0], self.sizes[1], count, endpoint=True)
+        self.speed = rng.uniform(self.speeds[0], self.speeds[1], count)
+        self.color = rng.integers(0, len(self.colors), count)
+        self.layers = []
+
+    def bake(self):
+        # Paint every star once into the layer of its speed band
+        low, high = self.speeds
+        step = (high - low) / self.bands
+        band_of = np.minimum(((self.speed - low) / step).astype(np.intp), self.bands - 1)
+        display = pygame.display.get_surface() is not None
+        height = self.height
+        layers = []
+        for band in range(self.bands):
+            image = pygame.Surface((self.width, height))
+            image.fill(self.background if band == 0 else TRANSPARENT)
+            members = np.flatnonzero(band_of == band)
+            for x, y, size, color in zip(self.x[members].tolist(), self.y[members].tolist(),
+                                         self.size[members].tolist(), self.color[members].tolist()):
+                color = self.colors[color]
+                pygame.draw.circle(image, color, (x, y), size)
+                # Repeat stars that straddle an edge so the layer tiles seamlessly
+                if y - size < 0:
+                    pygame.draw.circle(image, color, (x, y + height), size)
+                if y + size > height:
+                    pygame.draw.circle(image, color, (x, y - height), size)
+            if display:
+                image = image.convert()
+            if band:
+                # RLE colour keys skip the empty runs, so sparse layers blit cheaply
+                image.set_colorkey(TRANSPARENT, pygame.RLEACCEL)
+            layers.append(image)
+        self.layers = layers
+
+    def scroll(self, steps=1):
+        height = self.height
+        self.offsets = [(offset + speed * steps) % height
+                        for offset, speed in zip(self.offsets, self.band_speeds)]
+
+    def draw(self, surface, alpha=1.0):
+        # ``alpha`` < 1 draws the layers part of the way back towards the
+        # previous scroll step, for fixed-timestep interpolation
+        if not self.layers:
+            self.bake()
+        height = self.height
+        lag = 1.0 - alpha
+        for image, offset, speed in zip(self.layers, self.offsets, self.band_speeds):
+            y = int((offset - speed * lag) % height)
+            surface.blit(image, (0, y))
+            surface.blit(image, (0, y - height))
+
+    def snapshot(self):
+        # A still copy of the current frame, used as a static background
+        image = pygame.Surface((self.width, self.height))
+        self.draw(image)
+        return image.convert() if pygame.display.get_surface() is not None else image
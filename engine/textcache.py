@@ -0,0 +1,109 @@
+"""Cached text rendering for HUD strings."""
+from collections import OrderedDict
+
+import pygame
+
+
+class GlyphAtlas:
+    """Per-character glyph surfaces for one font and colour.
+
+    Fast-changing strings such as scores are composed from glyphs rendered
+    once, instead of rendering the whole string every time it changes.
+    """
+
+    def __init__(self, font, color, antialias=True):
+        self.font = font
+        self.color = color
+        self.antialias = antialias
+        self.height = font.get_height()
+        self.glyphs = {}
+        self.hits = 0
+        self.misses = 0
+
+    def glyph(self, char):
+        glyph = self.glyphs.get(char)
+        if glyph is None:
+            glyph = self.glyphs[char] = self.font.render(char, self.antialias, self.color)
+            self.misses += 1
+        else:
+            self.hits += 1
+        return glyph
+
+    def size(self, text):
+        return sum(self.glyph(char).get_width() for char in text), self.height
+
+    def draw(self, surface, text, position):
+        # Blit the glyphs side by side and return the rect they cover
+        left, top = position
+        x = left
+        blits = []
+        for char in text:
+            glyph = self.glyph(char)
+            blits.append((glyph, (x, top)))
+            x += glyph.get_width()
+        surface.blits(blits, doreturn=False)
+        return pygame.Rect(left, top, x - left, self.height)
+
+
+class TextCache:
+    """LRU cache of rendered strings keyed on (font, text, color, antialias).
+
+    Static strings render once and are blitted from the cache afterwards.
+    ``draw_labelled`` pairs a cached label with a glyph atlas for the value,
+    so a changing score never renders a new surface. ``hits``, ``misses``
+    and ``evictions`` count whole-string lookups; ``stats()`` adds the glyph
+    atlas counters.
+    """
+
+    def __init__(self, maxsize=128):
+        self.maxsize = maxsize
+        self.entries = OrderedDict()
+        self.atlases = {}
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def render(self, font, text, color, antialias=True):
+        key = (font, text, color, antialias)
+        entries = self.entries
+        surface = entries.get(key)
+        if surface is not None:
+            entries.move_to_end(key)
+            self.hits += 1
+            return surface
+        self.misses += 1
+        surface = entries[key] = font.render(text, antialias, color)
+        if len(entries) > self.maxsize:
+            entries.popitem(last=False)
+            self.evictions += 1
+        return surface
+
+    def atlas(self, font, color, antialias=True):
+        key = (font, color, antialias)
+        atlas = self.atlases.get(key)
+        if atlas is None:
+            atlas = self.atlases[key] = GlyphAtlas(font, color, antialias)
+        return atlas
+
+    def labelled_size(self, font, label, value, color, antialias=True):
+        width = self.render(font, label, color, antialias).get_width()
+        value_width, height = self.atlas(font, color, antialias).size(str(value))
+        return width + value_width, height
+
+    def draw_labelled(self, surface, font, label, value, color, position, antialias=True):
+        # Draw "<label><value>" with the label cached whole and the value from glyphs
+        label_rect = surface.blit(self.render(font, label, color, antialias), position)
+        value_rect = self.atlas(font, color, antialias).draw(surface, str(value), (position[0] + label_rect.width, position[1]))
+        return label_rect.union(value_rect)
+
+    def stats(self):
+        glyph_hits = sum(atlas.hits for atlas in self.atlases.values())
+        glyph_misses = sum(atlas.misses for atlas in self.atlases.values())
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'evictions': self.evictions,
+            'entries': len(self.entries),
+            'glyph_hits': glyph_hits,
+            'glyph_misses': glyph_misses,
+        }
@@ -0,0 +1,60 @@
+"""Fixed-timestep game loop: simulate at a fixed rate, render as fast as allowed."""
+import time
+
+
+def lerp(previous, current, alpha):
+    # Works on plain numbers and on NumPy arrays alike
+    return previous + (current - previous) * alpha
+
+
+class FixedTimestep:
+    """Accumulator that turns variable frame times into fixed simulation steps.
+
+    Each rendered frame calls ``advance()`` and runs the simulation step the
+    number of times it returns, so game speed stays tied to ``rate`` steps
+    per second whatever the frame rate. ``alpha`` is how far the real time
+    has got into the next step (0..1); drawing code blends the last two
+    simulated states with it so motion stays smooth when frames and steps
+    do not line up.
+
+    After a long hitch at most ``max_steps`` steps run in one frame and the
+    rest of the backlog is dropped (counted in ``dropped``), so a machine
+    that cannot keep up slows the game down instead of spiralling.
+    """
+
+    def __init__(self, rate, max_steps=5, clock=time.perf_counter):
+        self.rate = rate
+        self.dt = 1.0 / rate
+        self.max_steps = max_steps
+        self.clock = clock
+        self.accumulator = 0.0
+        self.alpha = 0.0
+        self.last = None
+        self.steps = 0
+        self.dropped = 0
+
+    def reset(self):
+        self.accumulator = 0.0
+        self.alpha = 0.0
+        self.last = None
+
+    def advance(self, elapsed=None):
+        # Returns the number of simulation steps to run this frame; pass
+        # ``elapsed`` (seconds) to drive the loop from something other than
+        # the wall clock
+        if elapsed is None:
+            now = self.clock()
+            elapsed = 0.0 if self.last is None else now - self.last
+            self.last = now
+        dt = self.dt
+        accumulator = self.accumulator + elapsed
+        steps = int(accumulator / dt)
+        if steps > self.max_steps:
+            self.dropped += steps - self.max_steps
+            steps = self.max_steps
+            accumulator = steps * dt + accumulator % dt
+        accumulator -= steps * dt
+        self.accumulator = accumulator
+        self.alpha = min(accumulator / dt, 1.0)
+        self.steps += steps
+        return steps
@@ -1,15 +1,26 @@
+import os
+
+# pygame greets on stdout at import, which would corrupt a --capture -
+# stream; the variable has to be set before the first import
+os.environ.setdefault('PYGAME_HIDE_SUPPORT_PROMPT', '1')
+
 import pygame
+import argparse
+import collections
 import sys
 import random
 import math
 
-# Initialize pygame
-pygame.init()
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir))
+from engine.cells import CellBoard, FreeCells
+from engine.capture import add_capture_arguments, capture_from_args
+from engine.dirtyrect import DirtyRectRenderer
+from engine.display import get_font, get_screen, shutdown
+from engine.textcache import TextCache
+from engine.timestep import FixedTimestep, lerp
 
 # Screen dimensions
 WIDTH, HEIGHT = 800, 600
-screen = pygame.display.set_mode((WIDTH, HEIGHT))
-pygame.display.set_caption("Snake Game")
 
 # Colors
 BACKGROUND = (15, 20, 25)
@@ -24,80 +35,133 @@ GAME_OVER_BG = (0, 0, 0, 180)  # Semi-transparent black
 CELL_SIZE = 20
 CELL_NUMBER_X = WIDTH // CELL_SIZE
 CELL_NUMBER_Y = HEIGHT // CELL_SIZE
-FPS = 10
+STEP_RATE = 10  # Snake moves per second
+FPS = 60  # Cap on drawn frames per second, which slide the snake between cells (0: uncapped)
+INITIAL_BODY = ((5, 10), (4, 10), (3, 10))  # (x, y) cells, head first
 
-# Font setup
-font = pygame.font.SysFont(None, 36)
-big_font = pygame.font.SysFont(None, 72)
+# Font sizes; the fonts themselves are loaded on first use
+FONT_SIZE = 36
+BIG_FONT_SIZE = 72
+TEXT = TextCache()
+
+# Surfaces that only depend on the board size, built on first use
+SURFACES = {}
 
 class Snake:
-    def __init__(self):
-        # Initial snake body (3 segments)
-        self.body = [pygame.Vector2(5, 10), pygame.Vector2(4, 10), pygame.Vector2(3, 10)]
+    """The snake as a deque of cell numbers (``y * cells_x + x``), head first.
+
+    A FreeCells index of the cells outside the body sits next to the
+    deque, so a move pushes the head and pops the tail, and hitting the
+    body is one lookup: moving, growing and self-collision are O(1) at any
+    length, and the food can pick an empty cell in one draw.
+    """
+
+    def __init__(self, cells_x, cells_y, body=INITIAL_BODY):
+        self.cells_x = cells_x
+        self.cells_y = cells_y
+        self.body = collections.deque(y * cells_x + x for x, y in body)
+        self.free = FreeCells(cells_x * cells_y)
+        for cell in self.body:
+            self.free.remove(cell)
+        # The cell the tail left on the last move (None after growing), and
+        # whether the segments are sliding from their previous cells
+        self.vacated = None
+        self.sliding = False
         self.direction = pygame.Vector2(1, 0)  # Moving right initially
         self.new_block = False
-
-    def draw_snake(self):
-        # Draw each segment of the snake
-        for index, block in enumerate(self.body):
-            x_pos = int(block.x * CELL_SIZE)
-            y_pos = int(block.y * CELL_SIZE)
+        self.crashed = False
+
+    @property
+    def head(self):
+        y, x = divmod(self.body[0], self.cells_x)
+        return x, y
+
+    def draw_snake(self, screen, alpha=1.0):
+        # Draw the parts of the snake that move between cells: the head,
+        # part of the way from the old head cell by ``alpha``, and the end
+        # of the tail leaving the vacated cell. The rest of the body stays
+        # on the board surface (see paint_segment). Returns the rects touched.
+        rects = []
+        if not self.sliding:
+            alpha = 1.0
+        body = self.body
+        if self.vacated is not None and alpha != 1.0:
+            x_pos, y_pos = self.cell_pos(self.vacated, body[-1], alpha)
             block_rect = pygame.Rect(x_pos, y_pos, CELL_SIZE, CELL_SIZE)
-
-            # Draw snake head differently
-            if index == 0:
-                pygame.draw.rect(screen, SNAKE_HEAD, block_rect)
-                # Draw eyes
-                eye_size = CELL_SIZE // 5
-
-                # Determine eye positions based on direction
-                if self.direction == pygame.Vector2(1, 0):  # Right
-                    pygame.draw.circle(screen, (0, 0, 0), (x_pos + CELL_SIZE - eye_size, y_pos + eye_size*2), eye_size)
-                    pygame.draw.circle(screen, (0, 0, 0), (x_pos + CELL_SIZE - eye_size, y_pos + CELL_SIZE - eye_size*2), eye_size)
-                elif self.direction == pygame.Vector2(-1, 0):  # Left
-                    pygame.draw.circle(screen, (0, 0, 0), (x_pos + eye_size, y_pos + eye_size*2), eye_size)
-                    pygame.draw.circle(screen, (0, 0, 0), (x_pos + eye_size, y_pos + CELL_SIZE - eye_size*2), eye_size)
-                elif self.direction == pygame.Vector2(0, 1):  # Down
-                    pygame.draw.circle(screen, (0, 0, 0), (x_pos + eye_size*2, y_pos + CELL_SIZE - eye_size), eye_size)
-                    pygame.draw.circle(screen, (0, 0, 0), (x_pos + CELL_SIZE - eye_size*2, y_pos + CELL_SIZE - eye_size), eye_size)
-                elif self.direction == pygame.Vector2(0, -1):  # Up
-                    pygame.draw.circle(screen, (0, 0, 0), (x_pos + eye_size*2, y_pos + eye_size), eye_size)
-                    pygame.draw.circle(screen, (0, 0, 0), (x_pos + CELL_SIZE - eye_size*2, y_pos + eye_size), eye_size)
-            else:
-                # Draw body segments with a gradient effect
-                pygame.draw.rect(screen, SNAKE_BODY, block_rect)
-                # Draw a subtle border for body segments
-                pygame.draw.rect(screen, (0, 100, 0), block_rect, 1)
+            paint_segment(screen, block_rect)
+            rects.append(block_rect)
+        # The head goes on top: it may be moving into the cell the tail left
+        if len(body) > 1 and alpha != 1.0:
+            rects.append(self.draw_head(screen, self.cell_pos(body[1], body[0], alpha)))
+        else:
+            rects.append(self.draw_head(screen, self.cell_pos(body[0])))
+        return rects
+
+    def cell_pos(self, cell, towards=None, alpha=1.0):
+        # Pixel position of ``cell``, or ``alpha`` of the way to ``towards``
+        y, x = divmod(cell, self.cells_x)
+        if towards is not None:
+            to_y, to_x = divmod(towards, self.cells_x)
+            x = lerp(x, to_x, alpha)
+            y = lerp(y, to_y, alpha)
+        return int(x * CELL_SIZE), int(y * CELL_SIZE)
+
+    def draw_head(self, screen, pos):
+        x_pos, y_pos = pos
+        block_rect = pygame.Rect(x_pos, y_pos, CELL_SIZE, CELL_SIZE)
+        pygame.draw.rect(screen, SNAKE_HEAD, block_rect)
+        # Draw eyes
+        eye_size = CELL_SIZE // 5
+
+        # Determine eye positions based on direction
+        if self.direction == pygame.Vector2(1, 0):  # Right
+            pygame.draw.circle(screen, (0, 0, 0), (x_pos + CELL_SIZE - eye_size, y_pos + eye_size*2), eye_size)
+            pygame.draw.circle(screen, (0, 0, 0), (x_pos + CELL_SIZE - eye_size, y_pos + CELL_SIZE - eye_size*2), eye_size)
+        elif self.direction == pygame.Vector2(-1, 0):  # Left
+            pygame.draw.circle(screen, (0, 0, 0), (x_pos + eye_size, y_pos + eye_size*2), eye_size)
+            pygame.draw.circle(screen, (0, 0, 0), (x_pos + eye_size, y_pos + CELL_SIZE - eye_size*2), eye_size)
+        elif self.direction == pygame.Vector2(0, 1):  # Down
+            pygame.draw.circle(screen, (0, 0, 0), (x_pos + eye_size*2, y_pos + CELL_SIZE - eye_size), eye_size)
+            pygame.draw.circle(screen, (0, 0, 0), (x_pos + CELL_SIZE - eye_size*2, y_pos + CELL_SIZE - eye_size), eye_size)
+        elif self.direction == pygame.Vector2(0, -1):  # Up
+            pygame.draw.circle(screen, (0, 0, 0), (x_pos + eye_size*2, y_pos + eye_size), eye_size)
+            pygame.draw.circle(screen, (0, 0, 0), (x_pos + CELL_SIZE - eye_size*2, y_pos + eye_size), eye_size)
+        return block_rect
 
     def move_snake(self):
-        # Create a copy of the body without the last segment
-        body_copy = self.body[:-1]
-        # Add the head position to the beginning
-        body_copy.insert(0, body_copy[0] + self.direction)
-        # Update the body
-        self.body = body_copy[:]
-
-        # If we need to add a new block, add it to the end
+        # One cell forward: push the new head and pop the tail, or keep the
+        # tail to grow. Running into a wall or the body stops the snake.
+        x, y = self.head
+        x += int(self.direction.x)
+        y += int(self.direction.y)
+        self.sliding = False
+        if not (0 <= x < self.cells_x and 0 <= y < self.cells_y):
+            self.crashed = True
+            return
+        cell = y * self.cells_x + x
+        body = self.body
+        free = self.free
+        # The tail moves out of the way unless the snake is growing
+        if cell not in free and (self.new_block or cell != body[-1]):
+            self.crashed = True
+            return
         if self.new_block:
-            body_copy = self.body[:]
-            body_copy.insert(0, body_copy[0] + self.direction)
-            self.body = body_copy[:]
             self.new_block = False
+            self.vacated = None
+        else:
+            tail = body.pop()
+            free.add(tail)
+            self.vacated = tail
+        body.appendleft(cell)
+        free.remove(cell)
+        self.sliding = True
 
     def add_block(self):
         self.new_block = True
 
     def check_collision(self):
-        # Check if snake hits the boundary
-        if not 0 <= self.body[0].x < CELL_NUMBER_X or not 0 <= self.body[0].y < CELL_NUMBER_Y:
-            return True
-
-        # Check if snake hits itself
-        for block in self.body[1:]:
-            if block == self.body[0]:
-                return True
-
-        return False
+        # Whether the last move ran into the boundary or the snake itself
+        return self.crashed
 
     def check_fail(self):
         # Check if game is over
@@ -106,143 +170,301 @@ class Snake:
         return False
 
 class Food:
-    def __init__(self):
+    def __init__(self, cells_x, cells_y, free=None):
+        # With ``free`` (a FreeCells index) the food only lands on empty cells
+        self.cells_x = cells_x
+        self.cells_y = cells_y
+        self.free = free
         self.randomize()
 
-    def draw_food(self):
-        # Draw the food as a circle
+    def draw_food(self, screen):
+        # Draw the food as a circle; there is none once the board is full
+        if self.cell is None:
+            return None
         food_rect = pygame.Rect(int(self.pos.x * CELL_SIZE), int(self.pos.y * CELL_SIZE), CELL_SIZE, CELL_SIZE)
         pygame.draw.circle(screen, FOOD_COLOR, (food_rect.x + CELL_SIZE // 2, food_rect.y + CELL_SIZE // 2), CELL_SIZE // 2)
         # Draw a shine effect on the food
         pygame.draw.circle(screen, (255, 100, 100), (food_rect.x + CELL_SIZE // 3, food_rect.y + CELL_SIZE // 3), CELL_SIZE // 6)
+        return food_rect
 
     def randomize(self):
-        # Generate random position for food
-        self.x = random.randint(0, CELL_NUMBER_X - 1)
-        self.y = random.randint(0, CELL_NUMBER_Y - 1)
+        # Move the food to a random cell, an empty one if there is an index;
+        # returns False when no cell is left
+        if self.free is None:
+            self.cell = random.randrange(self.cells_x * self.cells_y)
+        else:
+            self.cell = self.free.choice()
+            if self.cell is None:
+                return False
+        self.y, self.x = divmod(self.cell, self.cells_x)
         self.pos = pygame.Vector2(self.x, self.y)
+        return True
 
 class Game:
-    def __init__(self):
-        self.snake = Snake()
-        self.food = Food()
+    def __init__(self, cells_x=None, cells_y=None, body=INITIAL_BODY):
+        # The board defaults to the one set by set_board(); ``body`` is the
+        # snake's (x, y) cells, head first
+        cells_x = CELL_NUMBER_X if cells_x is None else cells_x
+        cells_y = CELL_NUMBER_Y if cells_y is None else cells_y
+        self.snake = Snake(cells_x, cells_y, body)
+        self.food = Food(cells_x, cells_y, self.snake.free)
         self.score = 0
         self.game_active = True
+        # The board surface, made by the first draw, and whether the game
+        # over screen is up
+        self.board = None
+        self.over_drawn = False
 
     def update(self):
+        # Advance the game by one fixed step
         if self.game_active:
-            self.snake.move_snake()
+            snake = self.snake
+            snake.move_snake()
             self.check_collision()
             self.check_fail()
-
-    def draw_elements(self):
-        # Draw grid background
-        for x in range(0, WIDTH, CELL_SIZE):
-            for y in range(0, HEIGHT, CELL_SIZE):
-                rect = pygame.Rect(x, y, CELL_SIZE, CELL_SIZE)
-                pygame.draw.rect(screen, GRID_COLOR, rect, 1)
-
-        # Draw food
-        self.food.draw_food()
+            if snake.sliding:
+                # The new head, the old head (now body) and the vacated cell
+                self.touch(snake.body[0], snake.body[1] if len(snake.body) > 1 else None, snake.vacated)
+        else:
+            # Stop the snake sliding once the game is over
+            self.snake.sliding = False
+
+    def draw_elements(self, renderer, alpha=1.0):
+        # The board surface is the renderer's background: the cells that
+        # changed since the last draw are repainted on it and copied to the
+        # screen, and only the head, the tail and the score are drawn on top
+        screen = renderer.screen
+        font = get_font(FONT_SIZE)
+        if self.over_drawn:
+            # The game over screen does not change
+            return
+        board = self.board_for(renderer)
+        changed = board.repaint(self.paint_cell)
+        renderer.begin()
+        if renderer.enabled:
+            for rect in changed:
+                screen.blit(board.surface, rect, rect)
+            renderer.mark_all(changed)
 
         # Draw snake
-        self.snake.draw_snake()
+        renderer.mark_all(self.snake.draw_snake(screen, alpha))
 
         # Draw score
-        score_text = f"Score: {self.score}"
-        score_surface = font.render(score_text, True, TEXT_COLOR)
-        score_rect = score_surface.get_rect(center=(WIDTH//2, 40))
-        screen.blit(score_surface, score_rect)
+        score_rect = pygame.Rect((0, 0), TEXT.labelled_size(font, "Score: ", self.score, TEXT_COLOR))
+        score_rect.center = (WIDTH//2, 40)
+        renderer.mark(TEXT.draw_labelled(screen, font, "Score: ", self.score, TEXT_COLOR, score_rect.topleft))
 
         # Draw game over message if needed
         if not self.game_active:
-            self.draw_game_over()
+            self.draw_game_over(screen)
+            renderer.mark(screen.get_rect())
+            self.over_drawn = True
+
+    def board_for(self, renderer):
+        # This game's board surface, painted in full when first drawn (or
+        # when another game has taken over the renderer)
+        board = self.board
+        if board is None or renderer.background is not board.surface:
+            board = self.board = CellBoard(grid_background(), self.snake.cells_x, CELL_SIZE)
+            self.touch(self.food.cell, *self.snake.body)
+            renderer.set_background(board.surface)
+        return board
+
+    def touch(self, *cells):
+        # Note cells whose contents changed, for the next draw to repaint
+        if self.board is not None:
+            for cell in cells:
+                if cell is not None:
+                    self.board.touch(cell)
+
+    def paint_cell(self, surface, cell, rect):
+        # What a cell shows on the board: the food or a body segment. The
+        # head is drawn over the board every frame.
+        if cell == self.food.cell:
+            self.food.draw_food(surface)
+        elif cell not in self.snake.free and cell != self.snake.body[0]:
+            paint_segment(surface, rect)
 
     def check_collision(self):
         # Check if snake head collides with food
-        if self.food.pos == self.snake.body[0]:
-            # Reposition food
-            self.food.randomize()
+        if self.food.cell == self.snake.body[0]:
             # Add new block to snake
             self.snake.add_block()
             # Increase score
             self.score += 1
 
-            # Make sure food doesn't appear on snake
-            for block in self.snake.body:
-                if block == self.food.pos:
-                    self.food.randomize()
+            # Reposition food on a cell the snake is not on; the game ends
+            # when the snake fills the board
+            if not self.food.randomize():
+                self.game_active = False
+            self.touch(self.food.cell)
 
     def check_fail(self):
         # Check if snake hits itself or boundary
         if self.snake.check_fail():
             self.game_active = False
 
-    def draw_game_over(self):
+    def draw_game_over(self, screen):
+        font = get_font(FONT_SIZE)
+        big_font = get_font(BIG_FONT_SIZE)
+
         # Semi-transparent overlay
-        overlay = pygame.Surface((WIDTH, HEIGHT), pygame.SRCALPHA)
-        overlay.fill(GAME_OVER_BG)
-        screen.blit(overlay, (0, 0))
+        screen.blit(game_over_overlay(), (0, 0))
 
         # Game over text
-        game_over_text = big_font.render("GAME OVER", True, (220, 20, 60))
+        game_over_text = TEXT.render(big_font, "GAME OVER", (220, 20, 60))
         game_over_rect = game_over_text.get_rect(center=(WIDTH//2, HEIGHT//2 - 50))
         screen.blit(game_over_text, game_over_rect)
 
         # Score text
-        score_text = font.render(f"Final Score: {self.score}", True, TEXT_COLOR)
-        score_rect = score_text.get_rect(center=(WIDTH//2, HEIGHT//2 + 20))
-        screen.blit(score_text, score_rect)
+        score_rect = pygame.Rect((0, 0), TEXT.labelled_size(font, "Final Score: ", self.score, TEXT_COLOR))
+        score_rect.center = (WIDTH//2, HEIGHT//2 + 20)
+        TEXT.draw_labelled(screen, font, "Final Score: ", self.score, TEXT_COLOR, score_rect.topleft)
 
         # Restart instructions
-        restart_text = font.render("Press SPACE to Restart", True, TEXT_COLOR)
+        restart_text = TEXT.render(font, "Press SPACE to Restart", TEXT_COLOR)
         restart_rect = restart_text.get_rect(center=(WIDTH//2, HEIGHT//2 + 80))
         screen.blit(restart_text, restart_rect)
 
-# Create game object
-game = Game()
-
-# Create clock object for controlling frame rate
-clock = pygame.time.Clock()
-
-# Main game loop
-while True:
-    for event in pygame.event.get():
-        if event.type == pygame.QUIT:
-            pygame.quit()
-            sys.exit()
-
-        if event.type == pygame.KEYDOWN:
-            # Change direction based on key pressed
-            if event.key == pygame.K_UP:
-                if game.snake.direction != pygame.Vector2(0, 1):
-                    game.snake.direction = pygame.Vector2(0, -1)
-            if event.key == pygame.K_DOWN:
-                if game.snake.direction != pygame.Vector2(0, -1):
-                    game.snake.direction = pygame.Vector2(0, 1)
-            if event.key == pygame.K_RIGHT:
-                if game.snake.direction != pygame.Vector2(-1, 0):
-                    game.snake.direction = pygame.Vector2(1, 0)
-            if event.key == pygame.K_LEFT:
-                if game.snake.direction != pygame.Vector2(1, 0):
-                    game.snake.direction = pygame.Vector2(-1, 0)
-
-            # Restart game
-            if event.key == pygame.K_SPACE and not game.game_active:
-                game = Game()  # Reset the game
-
-    # Fill the screen with background color
-    screen.fill(BACKGROUND)
-
-    # Update game state
-    game.update()
-
-    # Draw all elements
-    game.draw_elements()
-
-    # Update the display
-    pygame.display.update()
-
-    # Control the frame rate
-    clock.tick(FPS)
-
+def paint_segment(surface, rect):
+    # Draw body segments with a gradient effect
+    pygame.draw.rect(surface, SNAKE_BODY, rect)
+    # Draw a subtle border for body segments
+    pygame.draw.rect(surface, (0, 100, 0), rect, 1)
+
+def draw_background(surface):
+    # Background colour and grid: every cell has a one pixel outline, which
+    # comes to two lines per row and column of cells
+    surface.fill(BACKGROUND)
+    for x in range(0, WIDTH, CELL_SIZE):
+        pygame.draw.line(surface, GRID_COLOR, (x, 0), (x, HEIGHT - 1))
+        pygame.draw.line(surface, GRID_COLOR, (x + CELL_SIZE - 1, 0), (x + CELL_SIZE - 1, HEIGHT - 1))
+    for y in range(0, HEIGHT, CELL_SIZE):
+        pygame.draw.line(surface, GRID_COLOR, (0, y), (WIDTH - 1, y))
+        pygame.draw.line(surface, GRID_COLOR, (0, y + CELL_SIZE - 1), (WIDTH - 1, y + CELL_SIZE - 1))
+
+def grid_background():
+    # The empty grid, drawn once per board size
+    key = ('grid', WIDTH, HEIGHT, CELL_SIZE)
+    if key not in SURFACES:
+        SURFACES[key] = pygame.Surface((WIDTH, HEIGHT)).convert()
+        draw_background(SURFACES[key])
+    return SURFACES[key]
+
+def game_over_overlay():
+    key = ('overlay', WIDTH, HEIGHT)
+    if key not in SURFACES:
+        SURFACES[key] = pygame.Surface((WIDTH, HEIGHT), pygame.SRCALPHA)
+        SURFACES[key].fill(GAME_OVER_BG)
+    return SURFACES[key]
+
+def set_board(cells_x, cells_y, cell_size=CELL_SIZE):
+    # Resize the board; call before creating a SnakeGame, whose window follows it
+    global WIDTH, HEIGHT, CELL_SIZE, CELL_NUMBER_X, CELL_NUMBER_Y
+    CELL_SIZE = cell_size
+    CELL_NUMBER_X = cells_x
+    CELL_NUMBER_Y = cells_y
+    WIDTH, HEIGHT = cells_x * cell_size, cells_y * cell_size
+
+class SnakeGame:
+    """The game behind ``step()``, ``render()`` and ``run()``.
+
+    The window, fonts and grid background are created by the first
+    ``render()``, so the game can be imported and stepped headless.
+    """
+
+    def __init__(self, capture=None, fps=FPS):
+        self.game = Game()
+        self.capture = capture
+        self.fps = fps
+        self._renderer = None
+
+    @property
+    def renderer(self):
+        # Dirty-rect rendering restores the board under moving things and
+        # uploads only what changed; F2 switches to full frames. The game
+        # sets the board as the background when it first draws.
+        if self._renderer is None:
+            screen = get_screen((WIDTH, HEIGHT), "Snake Game")
+            self._renderer = DirtyRectRenderer(screen, enabled=True)
+        return self._renderer
+
+    def handle_event(self, event):
+        if event.type != pygame.KEYDOWN:
+            return
+        game = self.game
+        if event.key == pygame.K_F2:
+            self.renderer.toggle()
+
+        # Change direction based on key pressed
+        if event.key == pygame.K_UP:
+            if game.snake.direction != pygame.Vector2(0, 1):
+                game.snake.direction = pygame.Vector2(0, -1)
+        if event.key == pygame.K_DOWN:
+            if game.snake.direction != pygame.Vector2(0, -1):
+                game.snake.direction = pygame.Vector2(0, 1)
+        if event.key == pygame.K_RIGHT:
+            if game.snake.direction != pygame.Vector2(-1, 0):
+                game.snake.direction = pygame.Vector2(1, 0)
+        if event.key == pygame.K_LEFT:
+            if game.snake.direction != pygame.Vector2(1, 0):
+                game.snake.direction = pygame.Vector2(-1, 0)
+
+        # Restart game
+        if event.key == pygame.K_SPACE and not game.game_active:
+            self.game = Game()  # Reset the game
+
+    def step(self):
+        self.game.update()
+
+    def render(self, alpha=1.0):
+        # Draw a frame and put it on screen
+        self.game.draw_elements(self.renderer, alpha)
+        self.renderer.present()
+        if self.capture is not None:
+            self.capture.capture(self.renderer.screen)
+
+    def run(self, frames=None):
+        # Main game loop: the game steps at STEP_RATE and the snake is drawn
+        # between cells on the frames in between. Returns when the window is
+        # closed, or after ``frames`` frames if given.
+        self.renderer
+        clock = pygame.time.Clock()
+        timestep = FixedTimestep(STEP_RATE)
+        frame = 0
+        while frames is None or frame < frames:
+            frame += 1
+            for event in pygame.event.get():
+                if event.type == pygame.QUIT:
+                    return
+                self.handle_event(event)
+
+            # Update game state
+            for _ in range(timestep.advance()):
+                self.step()
+
+            # Draw all elements and update the display
+            self.render(timestep.alpha)
+
+            # Cap the frame rate; 0 leaves it uncapped
+            clock.tick(self.fps)
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Snake Game")
+    parser.add_argument('--board', default=f"{CELL_NUMBER_X}x{CELL_NUMBER_Y}", help='board size in cells, WxH')
+    parser.add_argument('--cell-size', type=int, default=CELL_SIZE, help='cell size in pixels')
+    parser.add_argument('--fps', type=int, default=FPS,
+                        help=f'cap on drawn frames per second (0: uncapped); the snake moves {STEP_RATE} times a second')
+    add_capture_arguments(parser)
+    args = parser.parse_args(argv)
+    cells_x, cells_y = (int(value) for value in args.board.split('x'))
+    set_board(cells_x, cells_y, args.cell_size)
+    capture = capture_from_args(args)
+    SnakeGame(capture=capture, fps=args.fps).run()
+    if capture is not None:
+        capture.close()
+        print(capture.summary(), file=sys.stderr)
+    shutdown()
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,595 @@
+"""Networked tank-shooter: an authoritative UDP server and predicting clients.
+
+Usage: python other/tank-net.py --server [--host 0.0.0.0] [--port 7777]
+       python other/tank-net.py --connect HOST[:PORT]
+
+The server runs the tank-shooter simulation at STEP_RATE with one tank per
+connected client and sends each client a snapshot every SNAPSHOT_EVERY
+steps. Snapshots are quantized (positions in quarter pixels, angles in
+1/65536 turns) and delta-encoded against the last snapshot the client has
+acknowledged, so an idle scene costs a few bytes. A snapshot larger than
+MAX_PAYLOAD goes out in pieces that the client puts back together; one
+with a piece missing is dropped like a lost packet.
+
+The obstacles never move, so they are not in the snapshots. The server
+sends a client the map once, in MAP_CHUNKS_PER_STEP pieces per step, over
+and over until the client's inputs report that it has all of it.
+
+Clients send their input every step, along with the previous few inputs
+in case packets are lost, and move their own tank at once instead of
+waiting for the server (prediction). When a snapshot arrives the tank is
+put where the server says and the inputs the server has not applied yet
+are replayed on top. The other tanks, enemies and bullets are drawn
+between the last two snapshots.
+"""
+import argparse
+import asyncio
+import collections
+import importlib
+import itertools
+import os
+import random
+import struct
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir))
+import pygame
+
+from engine.display import shutdown
+from engine.entities import EntityList
+from engine.netcode import (MAX_PAYLOAD, SERIAL_MASK, Reassembly, SnapshotHistory, decode_delta,
+                            dequantize_angle, encode_delta, entity_id, entity_kind, quantize, quantize_angle,
+                            split_payload)
+from engine.replay import InputBits
+from engine.timestep import FixedTimestep
+
+tank = importlib.import_module('tank-shooter')
+
+PORT = 7777
+STEP_RATE = tank.STEP_RATE
+SNAPSHOT_EVERY = 2  # Steps between snapshots (30 per second)
+POSITION_SCALE = 4  # Quarter-pixel positions
+INPUT_REDUNDANCY = 8  # Inputs repeated in every input packet
+MAX_PENDING = STEP_RATE  # Unacknowledged inputs a client keeps to replay on snapshots
+MAX_BACKLOG = 8  # Inputs a server queues per client before dropping the oldest
+CLIENT_TIMEOUT = 5.0  # Seconds of silence before the server drops a client
+HELLO_INTERVAL = 0.5
+STATS_WINDOW = 3600  # Tick times and latencies kept for the counters (a minute of steps)
+MAP_CHUNKS_PER_STEP = 8  # Map pieces sent to a client per step until it has them all
+
+# Input of one step: movement and turret keys plus fire held, restart pressed
+INPUTS = InputBits(held=(tank.player_controls['up'], tank.player_controls['down'],
+                         tank.player_controls['left'], tank.player_controls['right'],
+                         pygame.K_j, pygame.K_i, pygame.K_SPACE),
+                   pressed=(pygame.K_SPACE,))
+FIRE = 1 << INPUTS.held.index(pygame.K_SPACE)
+RESTART = 1 << len(INPUTS.held)
+
+# Entity kinds in a snapshot and the 16-bit fields of each
+TANK, SHELL, ENEMY, ENEMY_SHELL = range(4)
+FIELD_COUNTS = {
+    TANK: 4,  # x, y, turret angle, health
+    SHELL: 3,  # x, y, owner slot
+    ENEMY: 4,  # x, y, turret angle, health
+    ENEMY_SHELL: 3,  # x, y, owner serial (low 16 bits)
+}
+OBSTACLE = struct.Struct('<4H')  # x, y, width, height, in the map
+
+# Packets
+HELLO = b'H'
+BYE = b'B'
+WELCOME = struct.Struct('<cBI')  # b'W', slot, tick
+INPUT = struct.Struct('<cIIIB')  # b'I', newest input sequence, acknowledged snapshot tick, map held, input count
+# b'S', tick, base tick (0: full), last applied input, slot, flags, score, piece, pieces
+SNAPSHOT = struct.Struct('<cIIIBBIHH')
+MAP = struct.Struct('<cIHH')  # b'M', map version, piece, pieces
+SNAPSHOT_PIECE = MAX_PAYLOAD - SNAPSHOT.size
+MAP_PIECE = MAX_PAYLOAD - MAP.size
+GAME_OVER = 1
+GAME_WON = 2
+
+TANK_COLORS = [tank.TANK_COLOR, (50, 120, 200), (200, 170, 40), (160, 80, 200)]
+
+
+def capture_state(game, slots):
+    # The quantized snapshot of ``game``; ``slots`` maps each player tank to its slot
+    state = {}
+    owners = {}
+    for player in game.players:
+        slot = owners[player.serial] = slots[player]
+        state[entity_id(TANK, slot)] = (quantize(player.x, POSITION_SCALE), quantize(player.y, POSITION_SCALE),
+                                        quantize_angle(player.angle), quantize(player.health))
+    for enemy in game.enemies:
+        state[entity_id(ENEMY, enemy.serial)] = (quantize(enemy.x, POSITION_SCALE), quantize(enemy.y, POSITION_SCALE),
+                                                 quantize_angle(enemy.turret_angle), quantize(enemy.health))
+    projectiles = game.projectiles
+    for serial, team, owner, x, y in zip(projectiles.serial.tolist(), projectiles.team.tolist(),
+                                         projectiles.owner.tolist(), projectiles.x.tolist(), projectiles.y.tolist()):
+        if team == tank.PLAYER_TEAM:
+            state[entity_id(SHELL, serial)] = (quantize(x, POSITION_SCALE), quantize(y, POSITION_SCALE), owners[owner])
+        else:
+            state[entity_id(ENEMY_SHELL, serial)] = (quantize(x, POSITION_SCALE), quantize(y, POSITION_SCALE),
+                                                     owner & 0xFFFF)
+    return state
+
+
+def encode_map(obstacles):
+    return b''.join(OBSTACLE.pack(obstacle.x, obstacle.y, obstacle.width, obstacle.height)
+                    for obstacle in obstacles)
+
+
+def decode_map(data):
+    return [tank.Obstacle(*fields) for fields in OBSTACLE.iter_unpack(data)]
+
+
+class RemotePlayer:
+    """Server-side record of one client: its tank and its queued inputs."""
+
+    def __init__(self, address, slot, player, now):
+        self.address = address
+        self.slot = slot
+        self.player = player
+        self.inputs = {}
+        self.applied = 0
+        self.mask = 0
+        self.ack = 0
+        self.map = 0  # Map version the client has in full
+        self.map_piece = 0  # Next map piece to send it
+        self.seen = now
+
+    def receive(self, newest, masks, now):
+        self.seen = now
+        for seq, mask in enumerate(masks, newest - len(masks) + 1):
+            if seq > self.applied:
+                self.inputs[seq] = mask
+        while len(self.inputs) > MAX_BACKLOG:
+            del self.inputs[min(self.inputs)]
+
+    def next_input(self):
+        # The next input in sequence; a gap the redundancy did not cover is
+        # skipped, and without new input the last one is held
+        if self.inputs:
+            seq = self.applied + 1
+            if seq not in self.inputs:
+                seq = min(self.inputs)
+            self.mask = self.inputs.pop(seq)
+            self.applied = seq
+        return self.mask
+
+
+class TankServer(asyncio.DatagramProtocol):
+    """Runs the authoritative simulation and streams snapshots to clients."""
+
+    def __init__(self, game, clock=time.monotonic):
+        self.game = game
+        self.clock = clock
+        # The server's tank-shooter starts with no tanks; each client adds one
+        game.remove_player(game.player)
+        self.clients = {}
+        self.slots = {}
+        self.transport = None
+        self.tick = 0
+        self.history = SnapshotHistory()
+        # The map as sent: the obstacle list it was made from, a version
+        # that changes with it, and its pieces
+        self.map_source = None
+        self.map_version = 0
+        self.map_pieces = []
+        # Counters
+        self.tick_times = collections.deque(maxlen=STATS_WINDOW)
+        self.bytes_sent = 0
+        self.bytes_received = 0
+        self.largest_packet = 0
+
+    def connection_made(self, transport):
+        self.transport = transport
+
+    def datagram_received(self, data, address):
+        self.bytes_received += len(data)
+        client = self.clients.get(address)
+        kind = data[:1]
+        if kind == HELLO:
+            if client is None:
+                client = self.join(address)
+            self.send(WELCOME.pack(b'W', client.slot, self.tick), address)
+        elif kind == b'I' and client is not None:
+            _, newest, ack, map_version, count = INPUT.unpack_from(data)
+            client.receive(newest, data[INPUT.size:INPUT.size + count], self.clock())
+            client.ack = max(client.ack, ack)
+            client.map = map_version
+        elif kind == BYE and client is not None:
+            self.leave(client)
+
+    def join(self, address):
+        game = self.game
+        used = {client.slot for client in self.clients.values()}
+        slot = min(set(range(len(self.clients) + 1)) - used)
+        player = game.add_player(random.randint(50, tank.WIDTH - 50), random.randint(50, tank.HEIGHT - 50),
+                                 TANK_COLORS[slot % len(TANK_COLORS)])
+        client = self.clients[address] = RemotePlayer(address, slot, player, self.clock())
+        self.slots[player] = slot
+        return client
+
+    def leave(self, client):
+        del self.clients[client.address]
+        del self.slots[client.player]
+        self.game.remove_player(client.player)
+
+    def send(self, packet, address):
+        self.bytes_sent += len(packet)
+        self.largest_packet = max(self.largest_packet, len(packet))
+        self.transport.sendto(packet, address)
+
+    def send_map(self):
+        # A new obstacle list gets a new version; clients that do not have
+        # the current one get the next few pieces, round and round
+        game = self.game
+        if game.obstacles is not self.map_source:
+            self.map_source = game.obstacles
+            self.map_version += 1
+            self.map_pieces = split_payload(encode_map(game.obstacles), MAP_PIECE)
+        pieces = self.map_pieces
+        for client in self.clients.values():
+            if client.map == self.map_version:
+                continue
+            for _ in range(min(MAP_CHUNKS_PER_STEP, len(pieces))):
+                index = client.map_piece % len(pieces)
+                client.map_piece = index + 1
+                self.send(MAP.pack(b'M', self.map_version, index, len(pieces)) + pieces[index], client.address)
+
+    def step(self):
+        # One simulation step, then a snapshot every SNAPSHOT_EVERY steps
+        start = time.perf_counter_ns()
+        self.tick += 1
+        game = self.game
+        now = self.clock()
+        for client in [client for client in self.clients.values() if now - client.seen > CLIENT_TIMEOUT]:
+            self.leave(client)
+        if self.clients:
+            inputs = {}
+            for client in self.clients.values():
+                mask = client.next_input()
+                keys = inputs[client.player] = INPUTS.keys(mask)
+                if game.active:
+                    if keys[pygame.K_SPACE] and client.player.health > 0:
+                        client.player.shoot(game.projectiles)
+                elif INPUTS.events(mask):
+                    game.reset()
+            game.step([inputs[player] for player in game.players])
+            self.send_map()
+            if self.tick % SNAPSHOT_EVERY == 0:
+                self.broadcast()
+        self.tick_times.append(time.perf_counter_ns() - start)
+
+    def broadcast(self):
+        game = self.game
+        state = capture_state(game, self.slots)
+        self.history.add(self.tick, state)
+        flags = GAME_OVER * game.game_over | GAME_WON * game.game_won
+        # Clients that acknowledged the same snapshot share one encoding
+        bodies = {}
+        for client in self.clients.values():
+            base_tick = client.ack if self.history.get(client.ack) is not None else 0
+            pieces = bodies.get(base_tick)
+            if pieces is None:
+                body = encode_delta(self.history.get(base_tick) or {}, state)
+                pieces = bodies[base_tick] = split_payload(body, SNAPSHOT_PIECE)
+            for index, piece in enumerate(pieces):
+                header = SNAPSHOT.pack(b'S', self.tick, base_tick, client.applied, client.slot, flags, game.score,
+                                       index, len(pieces))
+                self.send(header + piece, client.address)
+
+    async def serve(self, duration=None):
+        # Step at STEP_RATE until ``duration`` seconds have passed (or forever)
+        loop = asyncio.get_running_loop()
+        timestep = FixedTimestep(STEP_RATE, clock=loop.time)
+        start = loop.time()
+        timestep.advance()
+        while duration is None or loop.time() - start < duration:
+            for _ in range(timestep.advance()):
+                self.step()
+            await asyncio.sleep((1.0 - timestep.alpha) * timestep.dt)
+
+
+class TankClient(asyncio.DatagramProtocol):
+    """Sends inputs, predicts its own tank and rebuilds the scene from snapshots.
+
+    With ``view`` (a TankShooter) the received state is mirrored into it for
+    drawing; without one the client only keeps the counters, as the bots in
+    the benchmark do.
+    """
+
+    def __init__(self, view=None, clock=time.monotonic):
+        self.view = view
+        if view is not None:
+            # The mirrored enemies are kept in ``self.enemies``, so the view
+            # must not hand them to its pool when it clears them
+            view.enemies = EntityList()
+        self.clock = clock
+        self.transport = None
+        self.slot = None
+        self.connected = asyncio.Event()
+        self.history = SnapshotHistory()
+        self.state = {}
+        self.tick = 0
+        self.flags = 0
+        self.seq = 0
+        # Inputs sent but not yet applied in a snapshot; if the server stops
+        # answering only the newest MAX_PENDING are kept and replayed
+        self.pending = collections.deque(maxlen=MAX_PENDING)
+        self.snapshot_time = 0.0
+        self.tanks = {}
+        self.enemies = {}
+        self.pieces = Reassembly()
+        self.map_version = 0
+        self.map_pieces = Reassembly(size=2)
+        self.obstacles = None
+        # Counters
+        self.bytes_sent = 0
+        self.bytes_received = 0
+        self.snapshot_bytes = 0
+        self.snapshots = 0
+        self.latencies = collections.deque(maxlen=STATS_WINDOW)
+
+    def connection_made(self, transport):
+        self.transport = transport
+
+    def send(self, packet):
+        self.bytes_sent += len(packet)
+        self.transport.sendto(packet)
+
+    async def connect(self, timeout=5.0):
+        # Say hello until the server answers
+        deadline = self.clock() + timeout
+        while not self.connected.is_set():
+            if self.clock() > deadline:
+                raise ConnectionError("no answer from the server")
+            self.send(HELLO)
+            try:
+                await asyncio.wait_for(self.connected.wait(), HELLO_INTERVAL)
+            except asyncio.TimeoutError:
+                pass
+
+    def close(self):
+        if self.transport is not None:
+            self.send(BYE)
+            self.transport.close()
+
+    def datagram_received(self, data, address):
+        self.bytes_received += len(data)
+        kind = data[:1]
+        if kind == b'W':
+            _, self.slot, _ = WELCOME.unpack_from(data)
+            self.connected.set()
+        elif kind == b'S':
+            self.receive_snapshot(data)
+        elif kind == b'M':
+            self.receive_map(data)
+
+    def send_input(self, mask):
+        # Send this step's input (with the last few for redundancy) and
+        # apply it to our own tank straight away
+        self.seq += 1
+        self.pending.append((self.seq, mask, self.clock()))
+        newest = [entry[1] for entry in itertools.islice(reversed(self.pending), INPUT_REDUNDANCY)]
+        masks = bytes(reversed(newest))
+        self.send(INPUT.pack(b'I', self.seq, self.tick, self.map_version, len(masks)) + masks)
+        own = self.tanks.get(self.slot)
+        if own is not None:
+            own.prev_x = own.x
+            own.prev_y = own.y
+            self.predict(own, mask)
+
+    def predict(self, own, mask):
+        view = self.view
+        if view is not None and view.active and own.health > 0:
+            keys = INPUTS.keys(mask)
+            own.rotate_turret(keys)
+            own.move(keys, view.obstacle_index)
+
+    def receive_map(self, data):
+        _, version, index, count = MAP.unpack_from(data)
+        if version <= self.map_version:
+            return  # Sent again before the server saw our acknowledgement, or stale
+        body = self.map_pieces.add(version, index, count, data[MAP.size:])
+        if body is None:
+            return
+        self.map_version = version
+        self.obstacles = decode_map(body)
+        if self.view is not None:
+            self.view.set_obstacles(self.obstacles)
+
+    def receive_snapshot(self, data):
+        _, tick, base_tick, applied, slot, flags, score, index, count = SNAPSHOT.unpack_from(data)
+        if tick <= self.tick:
+            return  # Late or duplicated
+        self.snapshot_bytes += len(data)
+        body = data[SNAPSHOT.size:]
+        if count > 1:
+            body = self.pieces.add(tick, index, count, body)
+            if body is None:
+                return  # More pieces to come
+            self.pieces.discard(tick)
+        base = self.history.get(base_tick) if base_tick else {}
+        if base is None:
+            return  # Delta against a snapshot we no longer have; the next one will be full
+        state, _ = decode_delta(base, body, 0, FIELD_COUNTS)
+        self.history.add(tick, state)
+        self.tick = tick
+        self.flags = flags
+        self.snapshots += 1
+        now = self.clock()
+        self.snapshot_time = now
+
+        # Inputs the server has applied: time how long each took to show up
+        pending = self.pending
+        while pending and pending[0][0] <= applied:
+            _, _, sent = pending.popleft()
+            self.latencies.append(now - sent)
+
+        if self.view is not None:
+            self.mirror(state, flags, score)
+        self.state = state
+
+    def mirror(self, state, flags, score):
+        # Rebuild the view's scene from ``state``, keeping the previous
+        # positions so the drawing can move things between snapshots
+        view = self.view
+        view.score = score
+        view.game_over = bool(flags & GAME_OVER)
+        view.game_won = bool(flags & GAME_WON)
+        previous = self.state
+        tanks = {}
+        enemies = {}
+        shells = []
+        for ident, fields in state.items():
+            kind = entity_kind(ident)
+            if kind == TANK:
+                slot = ident & SERIAL_MASK
+                player = self.tanks.get(slot)
+                if player is None:
+                    player = tank.Tank(0, 0, TANK_COLORS[slot % len(TANK_COLORS)], tank.player_controls)
+                    player.x = player.prev_x = fields[0] / POSITION_SCALE
+                    player.y = player.prev_y = fields[1] / POSITION_SCALE
+                if slot != self.slot:
+                    player.prev_x = player.x
+                    player.prev_y = player.y
+                player.x = fields[0] / POSITION_SCALE
+                player.y = fields[1] / POSITION_SCALE
+                player.angle = dequantize_angle(fields[2])
+                player.health = fields[3]
+                tanks[slot] = player
+            elif kind == ENEMY:
+                serial = ident & SERIAL_MASK
+                enemy = self.enemies.get(serial)
+                if enemy is None:
+                    enemy = tank.Enemy(fields[0] / POSITION_SCALE, fields[1] / POSITION_SCALE)
+                enemy.prev_x = enemy.x
+                enemy.prev_y = enemy.y
+                enemy.x = fields[0] / POSITION_SCALE
+                enemy.y = fields[1] / POSITION_SCALE
+                enemy.turret_angle = dequantize_angle(fields[2])
+                enemy.health = fields[3]
+                enemies[serial] = enemy
+            else:
+                shells.append((ident, kind, fields))
+
+        # Bullets start from where they were in the last snapshot
+        projectiles = view.projectiles
+        projectiles.clear()
+        for ident, kind, (x, y, owner) in shells:
+            old = previous.get(ident, (x, y))
+            projectiles.add(x=x / POSITION_SCALE, y=y / POSITION_SCALE, prev_x=old[0] / POSITION_SCALE,
+                            prev_y=old[1] / POSITION_SCALE, radius=tank.BULLET_RADIUS, owner=owner,
+                            team=tank.PLAYER_TEAM if kind == SHELL else tank.ENEMY_TEAM, serial=ident & SERIAL_MASK)
+
+        self.tanks = tanks
+        self.enemies = enemies
+        view.players = [tanks[slot] for slot in sorted(tanks)]
+        view.enemies.clear()
+        for enemy in enemies.values():
+            view.enemies.append(enemy)
+
+        # Our own tank: the server's position plus the inputs it has not seen yet
+        own = tanks.get(self.slot)
+        if own is not None:
+            view.player = own
+            for _, mask, _ in self.pending:
+                self.predict(own, mask)
+            own.prev_x = own.x
+            own.prev_y = own.y
+
+    def alpha(self):
+        # How far we are from the last snapshot towards the next one
+        return min((self.clock() - self.snapshot_time) * STEP_RATE / SNAPSHOT_EVERY, 1.0)
+
+    async def play(self):
+        # The interactive client: input every step, drawing as often as possible
+        view = self.view
+        timestep = FixedTimestep(STEP_RATE)
+        pressed = []
+        while True:
+            for event in pygame.event.get():
+                if event.type == pygame.QUIT:
+                    return
+                if event.type == pygame.KEYDOWN:
+                    if event.key == pygame.K_F2:
+                        view.renderer.toggle()
+                    pressed.append(event.key)
+            keys = pygame.key.get_pressed()
+            for _ in range(timestep.advance()):
+                mask = INPUTS.encode(keys, pressed)
+                if pygame.mouse.get_pressed()[0]:
+                    mask |= FIRE
+                pressed.clear()
+                self.send_input(mask)
+            if self.slot in self.tanks:
+                view.render(self.alpha())
+            await asyncio.sleep(0)
+
+
+class BotPilot:
+    """Random held keys that change every so often, always firing; restarts
+    the game as soon as it is over."""
+
+    def __init__(self, seed=None):
+        self.random = random.Random(seed)
+        self.mask = 0
+        self.remaining = 0
+
+    def next_mask(self, client):
+        if self.remaining <= 0:
+            self.mask = self.random.getrandbits(len(INPUTS.held) - 1) | FIRE
+            self.remaining = self.random.randint(10, 60)
+        self.remaining -= 1
+        return self.mask | (RESTART if client.flags else 0)
+
+
+async def run_server(host, port, enemy_count, obstacle_count):
+    loop = asyncio.get_running_loop()
+    server = TankServer(tank.TankShooter(enemy_count, obstacle_count))
+    transport, _ = await loop.create_datagram_endpoint(lambda: server, local_addr=(host, port))
+    print(f"serving on {host}:{port} at {STEP_RATE} steps/s")
+    try:
+        await server.serve()
+    finally:
+        transport.close()
+
+
+async def run_client(host, port):
+    loop = asyncio.get_running_loop()
+    view = tank.TankShooter(0, 0)
+    client = TankClient(view)
+    await loop.create_datagram_endpoint(lambda: client, remote_addr=(host, port))
+    try:
+        await client.connect()
+        await client.play()
+    finally:
+        client.close()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Networked Tank Shooter")
+    parser.add_argument('--server', action='store_true', help='run the authoritative server')
+    parser.add_argument('--connect', metavar='HOST[:PORT]', help='join a server')
+    parser.add_argument('--host', default='127.0.0.1', help='address the server listens on')
+    parser.add_argument('--port', type=int, default=PORT)
+    parser.add_argument('--enemies', type=int, default=tank.ENEMY_COUNT)
+    parser.add_argument('--obstacles', type=int, default=tank.OBSTACLE_COUNT)
+    args = parser.parse_args(argv)
+    if args.server:
+        try:
+            asyncio.run(run_server(args.host, args.port, args.enemies, args.obstacles))
+        except KeyboardInterrupt:
+            pass
+    elif args.connect:
+        host, _, port = args.connect.partition(':')
+        asyncio.run(run_client(host, int(port or PORT)))
+        shutdown()
+    else:
+        parser.error("give --server or --connect")
+
+if __name__ == '__main__':
+    main()
@@ -1,21 +1,40 @@
+import os
+
+# pygame greets on stdout at import, which would corrupt a --capture -
+# stream; the variable has to be set before the first import
+os.environ.setdefault('PYGAME_HIDE_SUPPORT_PROMPT', '1')
+
 import pygame
+import argparse
+import itertools
 import sys
 import math
 import random
 
-# Initialize pygame
-pygame.init()
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir))
+from engine.capture import add_capture_arguments, capture_from_args
+from engine.dirtyrect import DirtyRectRenderer
+from engine.display import get_font, get_screen, shutdown
+from engine.entities import EntityList, EntityStore, ObjectPool
+from engine.navigation import UNREACHABLE, FlowField
+from engine.profiler import FrameProfiler
+from engine.scheduler import ThinkScheduler
+from engine.spatial import RectGrid, close_pairs
+from engine.sprites import SpriteCache
+from engine.textcache import TextCache
+from engine.timestep import FixedTimestep, lerp
 
 # Screen dimensions
 WIDTH, HEIGHT = 800, 600
-screen = pygame.display.set_mode((WIDTH, HEIGHT))
-pygame.display.set_caption("Tank Shooter")
 
 # Colors
 BACKGROUND = (30, 30, 50)
 TANK_COLOR = (50, 150, 50)
 ENEMY_COLOR = (200, 50, 50)
 BULLET_COLOR = (255, 255, 0)
+ENEMY_BULLET_COLOR = (255, 100, 100)
 OBSTACLE_COLOR = (100, 100, 100)
 TEXT_COLOR = (220, 220, 220)
 HEALTH_COLOR = (0, 200, 0)
@@ -23,21 +42,49 @@ HEALTH_BG_COLOR = (100, 0, 0)
 GRID_COLOR = (40, 40, 60)
 GRID_HIGHLIGHT = (60, 60, 90)
 
-# Game variables
-clock = pygame.time.Clock()
-FPS = 60
-score = 0
-game_over = False
-game_won = False
+# Game parameters
+STEP_RATE = 60  # Simulation steps per second; speeds and timers are per step
+FPS = 60  # Cap on drawn frames per second (0: uncapped)
+ENEMY_COUNT = 5
+OBSTACLE_COUNT = 10
+
+# Projectiles: the side that fired them, and how close a shell must come to
+# a tank's centre on both axes to hit it
+PLAYER_TEAM = 0
+ENEMY_TEAM = 1
+BULLET_RADIUS = 4
+HIT_REACH = 20
+HIT_CELL_SIZE = 2 * HIT_REACH
+BULLET_DAMAGE = 10
+
+# Enemy navigation: flow field cell size, and how many cells from the
+# nearest player an enemy stops advancing
+NAV_CELL_SIZE = 20
+NAV_CLEARANCE = (15, 12.5)  # Half an enemy tank
+HOLD_CELLS = 6
+WANDER_STEPS = {'left': (-1, 0), 'right': (1, 0), 'up': (0, -1), 'down': (0, 1)}
 
-# Font
-font = pygame.font.SysFont(None, 36)
-big_font = pygame.font.SysFont(None, 72)
+# Enemy AI: decisions are time-sliced by the scheduler within a budget per
+# step (ms); between decisions enemies keep moving at their last velocity.
+# Level of detail: steps between decisions by distance to the target.
+AI_BUDGET_MS = 2.0
+AI_TIERS = ((150, 2), (350, 6), (math.inf, 12))
+
+# Main loop phases timed by the frame profiler (F3)
+PHASES = ('events', 'update', 'pathfinding', 'ai', 'draw', 'present', 'capture')
+
+# Font sizes; the fonts themselves are loaded on first use
+FONT_SIZE = 36
+BIG_FONT_SIZE = 72
+TEXT = TextCache()
+SPRITES = SpriteCache()
 
 class Tank:
     def __init__(self, x, y, color, controls):
         self.x = x
         self.y = y
+        self.prev_x = x
+        self.prev_y = y
         self.width = 40
         self.height = 30
         self.color = color
@@ -46,73 +93,69 @@ class Tank:
         self.health = 100
         self.max_health = 100
         self.controls = controls  # Dictionary with keys for controls
+        self.serial = next(serials)
         self.shoot_cooldown = 0
-        self.bullets = []
         self.turret_speed = 0.05  # Turret rotation speed
         
-    def draw(self, surface):
+    def draw(self, surface, alpha=1.0):
+        # Returns the rects touched, for dirty-rect rendering; ``alpha``
+        # blends the positions of the last two simulation steps
+        rects = []
+        x = lerp(self.prev_x, self.x, alpha)
+        y = lerp(self.prev_y, self.y, alpha)
+
         # Draw tank body
-        pygame.draw.rect(surface, self.color, (self.x - self.width//2, self.y - self.height//2, self.width, self.height))
+        rects.append(pygame.draw.rect(surface, self.color, (x - self.width//2, y - self.height//2, self.width, self.height)))
         
         # Draw tank turret
         turret_length = 20
-        turret_x = self.x + turret_length * math.cos(self.angle)
-        turret_y = self.y - turret_length * math.sin(self.angle)
-        pygame.draw.line(surface, (30, 100, 30), (self.x, self.y), (turret_x, turret_y), 6)
+        turret_x = x + turret_length * math.cos(self.angle)
+        turret_y = y - turret_length * math.sin(self.angle)
+        rects.append(pygame.draw.line(surface, (30, 100, 30), (x, y), (turret_x, turret_y), 6))
         
         # Draw tank tracks
-        pygame.draw.rect(surface, (20, 20, 20), (self.x - self.width//2 - 5, self.y - self.height//2, 5, self.height))
-        pygame.draw.rect(surface, (20, 20, 20), (self.x + self.width//2, self.y - self.height//2, 5, self.height))
+        rects.append(pygame.draw.rect(surface, (20, 20, 20), (x - self.width//2 - 5, y - self.height//2, 5, self.height)))
+        rects.append(pygame.draw.rect(surface, (20, 20, 20), (x + self.width//2, y - self.height//2, 5, self.height)))
         
         # Draw health bar
         bar_width = 40
         bar_height = 5
         health_width = bar_width * self.health / self.max_health
-        pygame.draw.rect(surface, HEALTH_BG_COLOR, (self.x - bar_width//2, self.y - self.height//2 - 15, bar_width, bar_height))
-        pygame.draw.rect(surface, HEALTH_COLOR, (self.x - bar_width//2, self.y - self.height//2 - 15, health_width, bar_height))
-        
-        # Draw bullets
-        for bullet in self.bullets:
-            pygame.draw.circle(surface, BULLET_COLOR, (int(bullet.x), int(bullet.y)), 4)
+        rects.append(pygame.draw.rect(surface, HEALTH_BG_COLOR, (x - bar_width//2, y - self.height//2 - 15, bar_width, bar_height)))
+        pygame.draw.rect(surface, HEALTH_COLOR, (x - bar_width//2, y - self.height//2 - 15, health_width, bar_height))
+        return rects
     
     def move(self, keys, obstacles):
-        if not game_over and not game_won:
-            # Move tank based on key presses
-            new_x = self.x
-            new_y = self.y
-            
-            if keys[self.controls['left']]:
-                new_x -= self.speed
-            if keys[self.controls['right']]:
-                new_x += self.speed
-            if keys[self.controls['up']]:
-                new_y -= self.speed
-            if keys[self.controls['down']]:
-                new_y += self.speed
-                
-            # Boundary checks
-            if new_x < self.width//2:
-                new_x = self.width//2
-            if new_x > WIDTH - self.width//2:
-                new_x = WIDTH - self.width//2
-            if new_y < self.height//2:
-                new_y = self.height//2
-            if new_y > HEIGHT - self.height//2:
-                new_y = HEIGHT - self.height//2
-            
-            # Check collision with obstacles
-            tank_rect = pygame.Rect(new_x - self.width//2, new_y - self.height//2, self.width, self.height)
-            collision = False
-            for obstacle in obstacles:
-                if tank_rect.colliderect(obstacle.get_rect()):
-                    collision = True
-                    break
+        # Move tank based on key presses
+        new_x = self.x
+        new_y = self.y
+        
+        if keys[self.controls['left']]:
+            new_x -= self.speed
+        if keys[self.controls['right']]:
+            new_x += self.speed
+        if keys[self.controls['up']]:
+            new_y -= self.speed
+        if keys[self.controls['down']]:
+            new_y += self.speed
             
-            # Only move if no collision
-            if not collision:
-                self.x = new_x
-                self.y = new_y
-    
+        # Boundary checks
+        if new_x < self.width//2:
+            new_x = self.width//2
+        if new_x > WIDTH - self.width//2:
+            new_x = WIDTH - self.width//2
+        if new_y < self.height//2:
+            new_y = self.height//2
+        if new_y > HEIGHT - self.height//2:
+            new_y = HEIGHT - self.height//2
+        
+        # Only move if no obstacle is in the way; ``obstacles`` is the static
+        # collision grid (RectGrid)
+        tank_rect = pygame.Rect(new_x - self.width//2, new_y - self.height//2, self.width, self.height)
+        if not obstacles.collides(tank_rect):
+            self.x = new_x
+            self.y = new_y
+
     def rotate_turret(self, keys):
         # Rotate turret with I and J keys
         if keys[pygame.K_j]:  # Rotate left
@@ -126,8 +169,8 @@ class Tank:
         if self.angle > 2 * math.pi:
             self.angle -= 2 * math.pi
     
-    def shoot(self):
-        if self.shoot_cooldown <= 0 and not game_over and not game_won:
+    def shoot(self, projectiles):
+        if self.shoot_cooldown <= 0:
             # Create a bullet at the turret tip
             turret_length = 20
             bullet_x = self.x + turret_length * math.cos(self.angle)
@@ -136,166 +179,159 @@ class Tank:
             bullet_dx = bullet_speed * math.cos(self.angle)
             bullet_dy = -bullet_speed * math.sin(self.angle)
             
-            self.bullets.append(Bullet(bullet_x, bullet_y, bullet_dx, bullet_dy))
+            fire(projectiles, bullet_x, bullet_y, bullet_dx, bullet_dy, PLAYER_TEAM, self.serial)
             self.shoot_cooldown = 15  # Cooldown period
     
-    def update(self, obstacles):
-        # Update cooldown
+    def update(self):
+        # Update cooldown; the bullets move with the game's projectile store
         if self.shoot_cooldown > 0:
             self.shoot_cooldown -= 1
-            
-        # Update bullets
-        for bullet in self.bullets[:]:
-            bullet.update()
-            
-            # Check collision with obstacles
-            bullet_rect = pygame.Rect(bullet.x - bullet.radius, bullet.y - bullet.radius, bullet.radius*2, bullet.radius*2)
-            for obstacle in obstacles:
-                if bullet_rect.colliderect(obstacle.get_rect()):
-                    self.bullets.remove(bullet)
-                    break
-            else:
-                # Remove bullets that go off-screen
-                if bullet.x < 0 or bullet.x > WIDTH or bullet.y < 0 or bullet.y > HEIGHT:
-                    self.bullets.remove(bullet)
-
-class Bullet:
-    def __init__(self, x, y, dx, dy):
-        self.x = x
-        self.y = y
-        self.dx = dx
-        self.dy = dy
-        self.radius = 4
-        
-    def update(self):
-        self.x += self.dx
-        self.y += self.dy
-        
-    def draw(self, surface):
-        pygame.draw.circle(surface, BULLET_COLOR, (int(self.x), int(self.y)), self.radius)
 
 class Enemy:
-    def __init__(self, x, y):
-        self.x = x
-        self.y = y
+    # The game keeps its enemies in an ObjectPool: ``Enemy()`` builds a
+    # blank tank and ``reset()`` puts it on the field as a new one
+    def __init__(self, x=None, y=None):
         self.width = 30
         self.height = 25
         self.color = ENEMY_COLOR
         self.speed = 1.5
-        self.health = 50
         self.max_health = 50
+        self.turret_speed = 0.03  # Enemy turret rotation speed
+        if x is not None:
+            self.reset(x, y)
+
+    def reset(self, x, y):
+        self.serial = next(serials)
+        self.x = x
+        self.y = y
+        self.prev_x = x
+        self.prev_y = y
+        self.health = self.max_health
         self.shoot_timer = random.randint(60, 180)
         self.move_timer = random.randint(30, 90)
         self.move_direction = random.choice(['left', 'right', 'up', 'down'])
+        self.wandering = False
+        self.vx = 0.0
+        self.vy = 0.0
         self.shoot_cooldown = 0
-        self.bullets = []  # Initialize the bullets attribute
-        self.turret_speed = 0.03  # Enemy turret rotation speed
         self.turret_angle = random.uniform(0, 2 * math.pi)
         
-    def draw(self, surface):
+    def draw(self, surface, alpha=1.0):
+        # Returns the rects touched, for dirty-rect rendering
+        rects = []
+        x = lerp(self.prev_x, self.x, alpha)
+        y = lerp(self.prev_y, self.y, alpha)
+
         # Draw enemy tank body
-        pygame.draw.rect(surface, self.color, (self.x - self.width//2, self.y - self.height//2, self.width, self.height))
+        rects.append(pygame.draw.rect(surface, self.color, (x - self.width//2, y - self.height//2, self.width, self.height)))
         
         # Draw enemy tank turret
         turret_length = 15
-        turret_x = self.x + turret_length * math.cos(self.turret_angle)
-        turret_y = self.y - turret_length * math.sin(self.turret_angle)
-        pygame.draw.line(surface, (100, 0, 0), (self.x, self.y), (turret_x, turret_y), 4)
+        turret_x = x + turret_length * math.cos(self.turret_angle)
+        turret_y = y - turret_length * math.sin(self.turret_angle)
+        rects.append(pygame.draw.line(surface, (100, 0, 0), (x, y), (turret_x, turret_y), 4))
         
         # Draw enemy tank tracks
-        pygame.draw.rect(surface, (20, 20, 20), (self.x - self.width//2 - 4, self.y - self.height//2, 4, self.height))
-        pygame.draw.rect(surface, (20, 20, 20), (self.x + self.width//2, self.y - self.height//2, 4, self.height))
+        rects.append(pygame.draw.rect(surface, (20, 20, 20), (x - self.width//2 - 4, y - self.height//2, 4, self.height)))
+        rects.append(pygame.draw.rect(surface, (20, 20, 20), (x + self.width//2, y - self.height//2, 4, self.height)))
         
         # Draw health bar
         bar_width = 30
         bar_height = 4
         health_width = bar_width * self.health / self.max_health
-        pygame.draw.rect(surface, HEALTH_BG_COLOR, (self.x - bar_width//2, self.y - self.height//2 - 10, bar_width, bar_height))
-        pygame.draw.rect(surface, HEALTH_COLOR, (self.x - bar_width//2, self.y - self.height//2 - 10, health_width, bar_height))
-        
-        # Draw bullets
-        for bullet in self.bullets:
-            pygame.draw.circle(surface, (255, 100, 100), (int(bullet.x), int(bullet.y)), 3)
+        rects.append(pygame.draw.rect(surface, HEALTH_BG_COLOR, (x - bar_width//2, y - self.height//2 - 10, bar_width, bar_height)))
+        pygame.draw.rect(surface, HEALTH_COLOR, (x - bar_width//2, y - self.height//2 - 10, health_width, bar_height))
+        return rects
     
-    def update(self, player, obstacles):
-        if not game_over and not game_won:
-            # Move randomly
-            self.move_timer -= 1
+    def think(self, player, projectiles, field, elapsed):
+        # Decisions, run by the AI scheduler every few steps (see AI_TIERS);
+        # ``elapsed`` is the steps since the last one. Returns the steps
+        # until the next decision.
+        # Pick a velocity: chase the players along the shared flow field,
+        # holding once within HOLD_CELLS of one; with no way through, move
+        # randomly
+        self.vx = 0.0
+        self.vy = 0.0
+        self.wandering = False
+        away, step = field.lookup(self.x, self.y)
+        if step is not None:
+            if away > HOLD_CELLS:
+                dx = step[0] - self.x
+                dy = step[1] - self.y
+                distance = math.hypot(dx, dy)
+                scale = self.speed / distance if distance > self.speed else 1.0
+                self.vx = dx * scale
+                self.vy = dy * scale
+        elif away == UNREACHABLE:
+            self.wandering = True
+            self.move_timer -= elapsed
             if self.move_timer <= 0:
                 self.move_direction = random.choice(['left', 'right', 'up', 'down'])
                 self.move_timer = random.randint(30, 90)
-                
-            # Calculate new position
-            new_x = self.x
-            new_y = self.y
+            self.vx, self.vy = WANDER_STEPS[self.move_direction]
+            self.vx *= self.speed
+            self.vy *= self.speed
             
-            if self.move_direction == 'left':
-                new_x -= self.speed
-            elif self.move_direction == 'right':
-                new_x += self.speed
-            elif self.move_direction == 'up':
-                new_y -= self.speed
-            elif self.move_direction == 'down':
-                new_y += self.speed
-                
-            # Boundary checks
-            if new_x < self.width//2:
-                new_x = self.width//2
-                self.move_direction = random.choice(['right', 'up', 'down'])
-            if new_x > WIDTH - self.width//2:
-                new_x = WIDTH - self.width//2
-                self.move_direction = random.choice(['left', 'up', 'down'])
-            if new_y < self.height//2:
-                new_y = self.height//2
-                self.move_direction = random.choice(['left', 'right', 'down'])
-            if new_y > HEIGHT - self.height//2:
-                new_y = HEIGHT - self.height//2
-                self.move_direction = random.choice(['left', 'right', 'up'])
-                
-            # Check collision with obstacles
-            enemy_rect = pygame.Rect(new_x - self.width//2, new_y - self.height//2, self.width, self.height)
-            collision = False
-            for obstacle in obstacles:
-                if enemy_rect.colliderect(obstacle.get_rect()):
-                    collision = True
-                    break
+        # Shoot at player
+        self.shoot_timer -= elapsed
+        if self.shoot_timer <= 0:
+            self.shoot(player, projectiles)
+            self.shoot_timer = random.randint(120, 240)
             
-            # Only move if no collision
-            if not collision:
-                self.x = new_x
-                self.y = new_y
+        # Rotate turret towards player
+        dx = player.x - self.x
+        dy = player.y - self.y
+        self.turret_angle = math.atan2(dy, dx)
                 
-            # Shoot at player
-            self.shoot_timer -= 1
-            if self.shoot_timer <= 0:
-                self.shoot(player)
-                self.shoot_timer = random.randint(120, 240)
-                
-            # Rotate turret towards player
-            dx = player.x - self.x
-            dy = player.y - self.y
-            self.turret_angle = math.atan2(dy, dx)
+        # Update cooldown
+        if self.shoot_cooldown > 0:
+            self.shoot_cooldown -= elapsed
+        
+        # Far from the action, think less often
+        distance = math.hypot(dx, dy)
+        for reach, interval in AI_TIERS:
+            if distance < reach:
+                return interval
+
+    def integrate(self, obstacles):
+        # Every step: move by the velocity of the last decision
+        new_x = self.x + self.vx
+        new_y = self.y + self.vy
+        if not self.vx and not self.vy:
+            return
             
-            # Update bullets
-            for bullet in self.bullets[:]:
-                bullet.update()
-                
-                # Check collision with obstacles
-                bullet_rect = pygame.Rect(bullet.x - bullet.radius, bullet.y - bullet.radius, bullet.radius*2, bullet.radius*2)
-                for obstacle in obstacles:
-                    if bullet_rect.colliderect(obstacle.get_rect()):
-                        self.bullets.remove(bullet)
-                        break
-                else:
-                    # Remove bullets that go off-screen
-                    if bullet.x < 0 or bullet.x > WIDTH or bullet.y < 0 or bullet.y > HEIGHT:
-                        self.bullets.remove(bullet)
-                    
-            # Update cooldown
-            if self.shoot_cooldown > 0:
-                self.shoot_cooldown -= 1
-    
-    def shoot(self, player):
+        # Boundary checks; a wandering enemy turns away from the edge
+        turn = None
+        if new_x < self.width//2:
+            new_x = self.width//2
+            turn = ['right', 'up', 'down']
+        if new_x > WIDTH - self.width//2:
+            new_x = WIDTH - self.width//2
+            turn = ['left', 'up', 'down']
+        if new_y < self.height//2:
+            new_y = self.height//2
+            turn = ['left', 'right', 'down']
+        if new_y > HEIGHT - self.height//2:
+            new_y = HEIGHT - self.height//2
+            turn = ['left', 'right', 'up']
+        if turn is not None and self.wandering:
+            self.move_direction = random.choice(turn)
+            self.vx, self.vy = WANDER_STEPS[self.move_direction]
+            self.vx *= self.speed
+            self.vy *= self.speed
+            
+        # Only move if no obstacle is in the way, sliding along it when one
+        # axis is free; ``obstacles`` is the static collision grid (RectGrid).
+        # An enemy that spawned on an obstacle may drive out of it.
+        stuck = obstacles.collides(pygame.Rect(self.x - self.width//2, self.y - self.height//2, self.width, self.height))
+        for x, y in ((new_x, new_y), (new_x, self.y), (self.x, new_y)):
+            enemy_rect = pygame.Rect(x - self.width//2, y - self.height//2, self.width, self.height)
+            if stuck or not obstacles.collides(enemy_rect):
+                self.x = x
+                self.y = y
+                break
+
+    def shoot(self, player, projectiles):
         if self.shoot_cooldown <= 0:
             # Create a bullet at the turret tip
             turret_length = 15
@@ -309,7 +345,7 @@ class Enemy:
             bullet_dx = (dx / distance) * 5 + random.uniform(-0.5, 0.5)
             bullet_dy = (dy / distance) * 5 + random.uniform(-0.5, 0.5)
             
-            self.bullets.append(Bullet(bullet_x, bullet_y, bullet_dx, bullet_dy))
+            fire(projectiles, bullet_x, bullet_y, bullet_dx, bullet_dy, ENEMY_TEAM, self.serial)
             self.shoot_cooldown = 30  # Cooldown period
 
 class Obstacle:
@@ -319,165 +355,437 @@ class Obstacle:
         self.width = width
         self.height = height
         self.color = OBSTACLE_COLOR
+        # Obstacles never move; the rect is built once for collision queries
+        self.rect = pygame.Rect(x, y, width, height)
         
     def draw(self, surface):
         pygame.draw.rect(surface, self.color, (self.x, self.y, self.width, self.height))
         
     def get_rect(self):
-        return pygame.Rect(self.x, self.y, self.width, self.height)
+        return self.rect
+
+# Serial numbers that tell tanks and bullets apart across steps (networked
+# play) and tie each bullet to the tank that fired it
+serials = itertools.count(1)
+
+def projectile_store():
+    # Every bullet in a game, the players' and the enemies', in one store;
+    # ``team`` is the side that fired it and ``owner`` the tank's serial
+    return EntityStore(prev_x=np.float64, prev_y=np.float64, dx=np.float64, dy=np.float64,
+                       team=np.int8, owner=np.int64, serial=np.int64)
+
+def fire(projectiles, x, y, dx, dy, team, owner):
+    projectiles.add(x=x, y=y, prev_x=x, prev_y=y, dx=dx, dy=dy, radius=BULLET_RADIUS,
+                    team=team, owner=owner, serial=next(serials))
+
+def paint_bullet(surface, x, y, variant):
+    color, radius = variant
+    pygame.draw.circle(surface, color, (x, y), radius)
 
-# Create player tank
+# Bullets are baked once per team and drawn with one blits() call each
+SPRITES.register('bullet', (2 * BULLET_RADIUS + 2, 2 * BULLET_RADIUS + 2), (BULLET_RADIUS + 1, BULLET_RADIUS + 1),
+                 paint_bullet)
+BULLET_STYLES = {PLAYER_TEAM: (BULLET_COLOR, 4), ENEMY_TEAM: (ENEMY_BULLET_COLOR, 3)}
+
+# Player controls
 player_controls = {
     'up': pygame.K_w,
     'down': pygame.K_s,
     'left': pygame.K_a,
     'right': pygame.K_d
 }
-player = Tank(WIDTH//2, HEIGHT//2, TANK_COLOR, player_controls)
-
-# Create enemy tanks
-enemies = []
-for i in range(5):
-    x = random.randint(50, WIDTH - 50)
-    y = random.randint(50, HEIGHT - 50)
-    enemies.append(Enemy(x, y))
-
-# Create obstacles
-obstacles = []
-for i in range(10):
-    x = random.randint(0, WIDTH - 30)
-    y = random.randint(0, HEIGHT - 30)
-    width = random.randint(20, 60)
-    height = random.randint(20, 60)
-    obstacles.append(Obstacle(x, y, width, height))
-
-# Main game loop
-running = True
-while running:
-    clock.tick(FPS)
-    
-    # Event handling
-    for event in pygame.event.get():
-        if event.type == pygame.QUIT:
-            running = False
-        if event.type == pygame.KEYDOWN:
-            if event.key == pygame.K_SPACE:
-                if game_over or game_won:
-                    # Reset game
-                    game_over = False
-                    game_won = False
-                    player.health = player.max_health
-                    score = 0
-                    enemies = []
-                    for i in range(5):
-                        x = random.randint(50, WIDTH - 50)
-                        y = random.randint(50, HEIGHT - 50)
-                        enemies.append(Enemy(x, y))
-                else:
-                    player.shoot()
-        if event.type == pygame.MOUSEBUTTONDOWN:
-            if event.button == 1:  # Left mouse button
-                player.shoot()
-    
-    # Get pressed keys
-    keys = pygame.key.get_pressed()
-    
-    # Rotate turret with I and J keys
-    player.rotate_turret(keys)
-    
-    # Update player
-    player.move(keys, obstacles)
-    player.update(obstacles)
-    
-    # Update enemies
-    for enemy in enemies:
-        enemy.update(player, obstacles)
-    
-    # Check collisions - player bullets with enemies
-    for bullet in player.bullets[:]:
-        for enemy in enemies[:]:
-            if (abs(bullet.x - enemy.x) < 20 and abs(bullet.y - enemy.y) < 20):
-                # Bullet hit enemy
-                enemy.health -= 10
-                if enemy.health <= 0:
-                    enemies.remove(enemy)
-                    score += 100
-                if bullet in player.bullets:
-                    player.bullets.remove(bullet)
-    
-    # Check collisions - enemy bullets with player
-    for enemy in enemies:
-        for bullet in enemy.bullets[:]:
-            if (abs(bullet.x - player.x) < 20 and abs(bullet.y - player.y) < 20):
-                # Bullet hit player
-                player.health -= 10
-                if bullet in enemy.bullets:
-                    enemy.bullets.remove(bullet)
-                if player.health <= 0:
-                    game_over = True
-    
-    # Check collisions - tank with obstacles
-    player_rect = pygame.Rect(player.x - player.width//2, player.y - player.height//2, player.width, player.height)
-    for obstacle in obstacles:
-        if player_rect.colliderect(obstacle.get_rect()):
-            # Move player back (this prevents the tank from getting stuck)
-            player.x -= 5 if keys[player.controls['left']] else 0
-            player.x += 5 if keys[player.controls['right']] else 0
-            player.y -= 5 if keys[player.controls['up']] else 0
-            player.y += 5 if keys[player.controls['down']] else 0
-    
-    # Check if all enemies are defeated
-    if len(enemies) == 0:
-        game_won = True
-    
-    # Drawing
-    screen.fill(BACKGROUND)
+
+def draw_background(surface, obstacles):
+    # Static scenery: background colour, grid and obstacles
+    surface.fill(BACKGROUND)
     
     # Draw grid
     for x in range(0, WIDTH, 40):
-        pygame.draw.line(screen, GRID_COLOR, (x, 0), (x, HEIGHT), 1)
+        pygame.draw.line(surface, GRID_COLOR, (x, 0), (x, HEIGHT), 1)
     for y in range(0, HEIGHT, 40):
-        pygame.draw.line(screen, GRID_COLOR, (0, y), (WIDTH, y), 1)
+        pygame.draw.line(surface, GRID_COLOR, (0, y), (WIDTH, y), 1)
     
     # Draw obstacles
     for obstacle in obstacles:
-        obstacle.draw(screen)
-    
-    # Draw enemies
-    for enemy in enemies:
-        enemy.draw(screen)
-    
-    # Draw player
-    player.draw(screen)
-    
-    # Draw score
-    score_text = font.render(f"Score: {score}", True, TEXT_COLOR)
-    screen.blit(score_text, (10, 10))
-    
-    # Draw health
-    health_text = font.render(f"Health: {player.health}", True, TEXT_COLOR)
-    screen.blit(health_text, (WIDTH - 150, 10))
-    
-    # Draw game over or win message
-    if game_over:
-        game_over_text = big_font.render("GAME OVER", True, (255, 50, 50))
-        restart_text = font.render("Press SPACE to restart", True, TEXT_COLOR)
-        screen.blit(game_over_text, (WIDTH//2 - game_over_text.get_width()//2, HEIGHT//2 - 50))
-        screen.blit(restart_text, (WIDTH//2 - restart_text.get_width()//2, HEIGHT//2 + 50))
-    
-    if game_won:
-        win_text = big_font.render("YOU WIN!", True, (50, 255, 50))
-        restart_text = font.render("Press SPACE to restart", True, TEXT_COLOR)
-        screen.blit(win_text, (WIDTH//2 - win_text.get_width()//2, HEIGHT//2 - 50))
-        screen.blit(restart_text, (WIDTH//2 - restart_text.get_width()//2, HEIGHT//2 + 50))
-    
-    # Draw instructions
-    if not game_over and not game_won:
-        instructions = font.render("WASD: Move | I/J: Rotate Turret | Left Click: Shoot", True, TEXT_COLOR)
-        screen.blit(instructions, (WIDTH//2 - instructions.get_width()//2, HEIGHT - 40))
-    
-    # Update display
-    pygame.display.flip()
+        obstacle.draw(surface)
+
+class TankShooter:
+    """The whole game behind ``step()``, ``render()`` and ``run()``.
+
+    Building one only sets up the simulation. The window, the fonts and the
+    static background are created by the first ``render()``, so the game
+    can be imported and stepped headless.
+    """
+
+    def __init__(self, enemy_count=ENEMY_COUNT, obstacle_count=OBSTACLE_COUNT, capture=None, profiler=None,
+                 ai_budget=AI_BUDGET_MS, fps=FPS):
+        self.enemy_count = enemy_count
+        self.capture = capture
+        self.fps = fps
+        self.profiler = profiler or FrameProfiler(PHASES)
+        self.ai = ThinkScheduler(ai_budget)
+        self.score = 0
+        self.game_over = False
+        self.game_won = False
+        self.player = Tank(WIDTH//2, HEIGHT//2, TANK_COLOR, player_controls)
+        self.players = [self.player]
+        # Destroyed enemies go back to the pool and the next wave reuses them
+        self.enemies = EntityList(ObjectPool(Enemy))
+        self.projectiles = projectile_store()
+        self.obstacles = []
+        self.obstacle_index = RectGrid(())
+        self.field = None
+        self.background = None
+        self._renderer = None
+        self.spawn_enemies(enemy_count)
+        self.place_obstacles(obstacle_count)
+
+    @property
+    def renderer(self):
+        # Dirty-rect rendering restores the background under moving things (toggle with F2)
+        if self._renderer is None:
+            self._renderer = DirtyRectRenderer(get_screen((WIDTH, HEIGHT), "Tank Shooter"))
+        return self._renderer
+
+    @property
+    def active(self):
+        return not self.game_over and not self.game_won
+
+    def add_player(self, x, y, color=TANK_COLOR, controls=player_controls):
+        # Another tank on the same side; the game is over once all are destroyed
+        tank = Tank(x, y, color, controls)
+        self.players.append(tank)
+        return tank
+
+    def remove_player(self, tank):
+        self.players.remove(tank)
+        projectiles = self.projectiles
+        projectiles.alive &= (projectiles.team != PLAYER_TEAM) | (projectiles.owner != tank.serial)
+        projectiles.compact()
+
+    def target(self, enemy):
+        # The player tank an enemy goes after: the nearest one still alive
+        players = self.players
+        if len(players) == 1:
+            return players[0]
+        alive = [player for player in players if player.health > 0] or players
+        return min(alive, key=lambda player: (player.x - enemy.x)**2 + (player.y - enemy.y)**2)
+
+    def think(self, enemy, elapsed):
+        return enemy.think(self.target(enemy), self.projectiles, self.field, elapsed)
+
+    def spawn_enemies(self, count):
+        # Create enemy tanks; their first decisions are staggered so the
+        # AI tiers do not all come due on the same step
+        for i in range(count):
+            x = random.randint(50, WIDTH - 50)
+            y = random.randint(50, HEIGHT - 50)
+            enemy = self.enemies.spawn(x, y)
+            self.ai.add(enemy, i % AI_TIERS[-1][1])
+
+    def place_obstacles(self, count):
+        # Create obstacles
+        obstacles = []
+        for i in range(count):
+            x = random.randint(0, WIDTH - 30)
+            y = random.randint(0, HEIGHT - 30)
+            width = random.randint(20, 60)
+            height = random.randint(20, 60)
+            obstacles.append(Obstacle(x, y, width, height))
+        self.set_obstacles(obstacles)
+
+    def set_obstacles(self, obstacles):
+        # Obstacles never move, so collision queries go through a grid built
+        # here once, and so does the enemies' navigation grid; the static
+        # background is repainted on the next render
+        self.obstacles = obstacles
+        self.obstacle_index = RectGrid(obstacle.get_rect() for obstacle in obstacles)
+        self.field = FlowField(self.obstacle_index.rects, WIDTH, HEIGHT, NAV_CELL_SIZE, NAV_CLEARANCE)
+        self.background = None
+
+    def reset(self):
+        self.game_over = False
+        self.game_won = False
+        for player in self.players:
+            player.health = player.max_health
+        self.score = 0
+        self.projectiles.clear()
+        self.enemies.clear()
+        self.ai.clear()
+        self.spawn_enemies(self.enemy_count)
+
+    def shoot(self):
+        if self.active:
+            self.player.shoot(self.projectiles)
+
+    def handle_event(self, event):
+        if event.type == pygame.KEYDOWN:
+            if event.key == pygame.K_F2:
+                self.renderer.toggle()
+            if event.key == pygame.K_F3:
+                self.profiler.toggle()
+            if event.key == pygame.K_SPACE:
+                if self.active:
+                    self.shoot()
+                else:
+                    self.reset()
+        if event.type == pygame.MOUSEBUTTONDOWN:
+            if event.button == 1:  # Left mouse button
+                self.shoot()
+
+    def step(self, keys):
+        # Advance the simulation by one fixed step. ``keys`` is the held-key
+        # state, or a list with one per player tank when they are driven
+        # separately (networked play).
+        players = self.players
+        inputs = keys if isinstance(keys, list) else [keys] * len(players)
+        enemies = self.enemies
+        obstacles = self.obstacle_index
+        active = self.active
+        
+        # Remember where the tanks were for interpolated drawing
+        for player in players:
+            player.prev_x = player.x
+            player.prev_y = player.y
+        for enemy in enemies:
+            enemy.prev_x = enemy.x
+            enemy.prev_y = enemy.y
+        
+        for player, keys in zip(players, inputs):
+            # Rotate turret with I and J keys
+            player.rotate_turret(keys)
+            
+            # Update player
+            if active and player.health > 0:
+                player.move(keys, obstacles)
+            player.update()
+        
+        # Update enemies; they all steer by one flow field towards the live
+        # players, rebuilt only when a player has moved to another cell
+        if active:
+            profiler = self.profiler
+            profiler.lap('update')
+            field = self.field
+            field.update([(player.x, player.y) for player in players if player.health > 0] or
+                         [(player.x, player.y) for player in players])
+            profiler.lap('pathfinding')
+            # Decisions for the enemies that are due, within the AI budget,
+            # then every enemy moves
+            self.ai.run(self.think)
+            profiler.lap('ai')
+            for enemy in enemies:
+                enemy.integrate(obstacles)
+        
+        # Move every bullet and resolve its hits in one batched pass
+        self.update_projectiles()
+        if all(player.health <= 0 for player in players):
+            self.game_over = True
+        
+        # Check collisions - tank with obstacles
+        for player, keys in zip(players, inputs):
+            player_rect = pygame.Rect(player.x - player.width//2, player.y - player.height//2, player.width, player.height)
+            for _ in obstacles.query(player_rect):
+                # Move player back (this prevents the tank from getting stuck)
+                player.x -= 5 if keys[player.controls['left']] else 0
+                player.x += 5 if keys[player.controls['right']] else 0
+                player.y -= 5 if keys[player.controls['up']] else 0
+                player.y += 5 if keys[player.controls['down']] else 0
+        
+        # Check if all enemies are defeated
+        if len(enemies) == 0:
+            self.game_won = True
+
+    def update_projectiles(self):
+        # All bullets move as array operations; those that leave the screen
+        # or hit an obstacle are culled in bulk
+        projectiles = self.projectiles
+        projectiles.prev_x = projectiles.x
+        projectiles.prev_y = projectiles.y
+        projectiles.x += projectiles.dx
+        projectiles.y += projectiles.dy
+        x = projectiles.x
+        y = projectiles.y
+        alive = projectiles.alive
+        alive &= (x >= 0) & (x <= WIDTH) & (y >= 0) & (y <= HEIGHT)
+        # Same corners as pygame.Rect(x - radius, ...), which truncates
+        alive &= ~self.obstacle_index.collide_squares((x - BULLET_RADIUS).astype(np.int64),
+                                                      (y - BULLET_RADIUS).astype(np.int64), 2 * BULLET_RADIUS)
+
+        # Player bullets against enemies: the close pairs come from one
+        # broad phase, ordered by bullet, and only actual hits are walked. A
+        # bullet damages every enemy it overlaps in the step it arrives.
+        team = projectiles.team
+        enemies = self.enemies
+        if len(enemies):
+            targets = enemies.items
+            shells = np.flatnonzero(alive & (team == PLAYER_TEAM))
+            hits, struck = self.tank_hits(shells, targets)
+            killed = []
+            for shell, index in zip(hits.tolist(), struck.tolist()):
+                enemy = targets[index]
+                if not enemy.alive:
+                    continue
+                alive[shell] = False
+                enemy.health -= BULLET_DAMAGE
+                if enemy.health <= 0:
+                    enemies.discard(enemy)
+                    killed.append(enemy.serial)
+                    self.score += 100
+            enemies.compact()
+            if killed:
+                # A destroyed enemy's bullets go with it
+                alive &= (team != ENEMY_TEAM) | ~np.isin(projectiles.owner, killed)
+
+        # Enemy bullets against players; each hits the first live tank it overlaps
+        players = self.players
+        shells = np.flatnonzero(alive & (team == ENEMY_TEAM))
+        hits, struck = self.tank_hits(shells, players)
+        for shell, index in zip(hits.tolist(), struck.tolist()):
+            player = players[index]
+            if alive[shell] and player.health > 0:
+                alive[shell] = False
+                player.health -= BULLET_DAMAGE
+        projectiles.compact()
+
+    def tank_hits(self, shells, tanks):
+        # (bullet slot, tank index) pairs within HIT_REACH on both axes, for
+        # the bullets in slots ``shells``
+        projectiles = self.projectiles
+        tank_x = np.fromiter((tank.x for tank in tanks), np.float64, len(tanks))
+        tank_y = np.fromiter((tank.y for tank in tanks), np.float64, len(tanks))
+        hits, struck = close_pairs(projectiles.x[shells], projectiles.y[shells], np.zeros(len(shells)),
+                                   tank_x, tank_y, np.full(len(tanks), float(HIT_REACH)), HIT_CELL_SIZE, box=True)
+        return shells[hits], struck
+
+    def draw(self, alpha=1.0):
+        # Draw everything, blending the last two steps by ``alpha``
+        renderer = self.renderer
+        screen = renderer.screen
+        font = get_font(FONT_SIZE)
+        big_font = get_font(BIG_FONT_SIZE)
+        if self.background is None:
+            # The grid and obstacles never move: bake them into a static
+            # layer, rebuilt only when the obstacles change
+            self.background = pygame.Surface((WIDTH, HEIGHT)).convert()
+            draw_background(self.background, self.obstacles)
+            renderer.set_background(self.background)
+        # Every frame starts from the static layer: one blit, or in dirty-rect
+        # mode only the parts under last frame's tanks and bullets
+        renderer.begin()
+        
+        # Draw enemies, then players, each side's bullets above its tanks
+        # in one batched blit
+        projectiles = self.projectiles
+        x = lerp(projectiles.prev_x, projectiles.x, alpha)
+        y = lerp(projectiles.prev_y, projectiles.y, alpha)
+        for tanks, team in ((self.enemies, ENEMY_TEAM), (self.players, PLAYER_TEAM)):
+            for tank in tanks:
+                renderer.mark_all(tank.draw(screen, alpha))
+            mine = projectiles.team == team
+            renderer.mark_all(SPRITES.draw_batch(screen, 'bullet', x[mine], y[mine], BULLET_STYLES[team],
+                                                 doreturn=renderer.enabled))
+        
+        # Draw score
+        renderer.mark(TEXT.draw_labelled(screen, font, "Score: ", self.score, TEXT_COLOR, (10, 10)))
+        
+        # Draw health
+        renderer.mark(TEXT.draw_labelled(screen, font, "Health: ", self.player.health, TEXT_COLOR, (WIDTH - 150, 10)))
+        
+        # Draw game over or win message
+        if self.game_over:
+            game_over_text = TEXT.render(big_font, "GAME OVER", (255, 50, 50))
+            restart_text = TEXT.render(font, "Press SPACE to restart", TEXT_COLOR)
+            renderer.mark(screen.blit(game_over_text, (WIDTH//2 - game_over_text.get_width()//2, HEIGHT//2 - 50)))
+            renderer.mark(screen.blit(restart_text, (WIDTH//2 - restart_text.get_width()//2, HEIGHT//2 + 50)))
+        
+        if self.game_won:
+            win_text = TEXT.render(big_font, "YOU WIN!", (50, 255, 50))
+            restart_text = TEXT.render(font, "Press SPACE to restart", TEXT_COLOR)
+            renderer.mark(screen.blit(win_text, (WIDTH//2 - win_text.get_width()//2, HEIGHT//2 - 50)))
+            renderer.mark(screen.blit(restart_text, (WIDTH//2 - restart_text.get_width()//2, HEIGHT//2 + 50)))
+        
+        # Draw instructions
+        if self.active:
+            instructions = TEXT.render(font, "WASD: Move | I/J: Rotate Turret | Left Click: Shoot", TEXT_COLOR)
+            renderer.mark(screen.blit(instructions, (WIDTH//2 - instructions.get_width()//2, HEIGHT - 40)))
+
+    def render(self, alpha=1.0):
+        # Draw a frame and put it on screen
+        renderer = self.renderer
+        profiler = self.profiler
+        self.draw(alpha)
+        if profiler.overlay:
+            font = get_font(22)
+            panel = profiler.draw_overlay(renderer.screen, TEXT, font, (10, 50))
+            renderer.mark(panel)
+            # AI work of the last step
+            ai = self.ai
+            renderer.mark(TEXT.draw_labelled(renderer.screen, font, "AI thought/deferred ", f"{ai.thought}/{ai.deferred}",
+                                             TEXT_COLOR, (panel.left, panel.bottom + 4)))
+        profiler.lap('draw')
+        renderer.present()
+        profiler.lap('present')
+        if self.capture is not None:
+            self.capture.capture(renderer.screen)
+            profiler.lap('capture')
+
+    def run(self, frames=None):
+        # Main game loop: the simulation runs at a fixed STEP_RATE, rendering
+        # at up to ``fps`` frames a second. Returns when the window is closed,
+        # or after ``frames`` frames if given.
+        self.renderer
+        profiler = self.profiler
+        clock = pygame.time.Clock()
+        timestep = FixedTimestep(STEP_RATE)
+        frame = 0
+        while frames is None or frame < frames:
+            frame += 1
+            clock.tick(self.fps)
+            profiler.start_frame()
+            
+            # Event handling
+            for event in pygame.event.get():
+                if event.type == pygame.QUIT:
+                    return
+                self.handle_event(event)
+            keys = pygame.key.get_pressed()
+            profiler.lap('events')
+            
+            # Run the simulation steps that are due, then draw
+            for _ in range(timestep.advance()):
+                self.step(keys)
+                profiler.lap('update')
+            self.render(timestep.alpha)
+            profiler.end_frame()
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Tank Shooter")
+    parser.add_argument('--enemies', type=int, default=ENEMY_COUNT, help='enemy tanks per round')
+    parser.add_argument('--obstacles', type=int, default=OBSTACLE_COUNT, help='obstacles on the map')
+    parser.add_argument('--ai-budget', type=float, default=AI_BUDGET_MS,
+                        help='milliseconds of enemy decisions per step (0: no limit)')
+    parser.add_argument('--fps', type=int, default=FPS,
+                        help=f'cap on drawn frames per second (0: uncapped); the simulation runs at {STEP_RATE} steps/s')
+    parser.add_argument('--profile', action='store_true',
+                        help='time each phase of the frame, pathfinding included (toggle the overlay in game with F3)')
+    parser.add_argument('--profile-log', metavar='PATH',
+                        help='stream per-frame phase timings to PATH (.csv, or .jsonl for JSON lines)')
+    add_capture_arguments(parser)
+    args = parser.parse_args(argv)
+    # The overlay (--profile, F3) and the log each turn the timing on
+    profiler = FrameProfiler(PHASES, enabled=args.profile_log is not None)
+    profiler.overlay = args.profile
+    if args.profile_log:
+        profiler.open_log(args.profile_log)
+    capture = capture_from_args(args)
+    TankShooter(args.enemies, args.obstacles, capture, profiler, args.ai_budget or None, args.fps).run()
+    if capture is not None:
+        capture.close()
+        print(capture.summary(), file=sys.stderr)
+    if profiler.frames:
+        print(profiler.summary(), file=sys.stderr)
+    profiler.close()
+    shutdown()
 
-pygame.quit()
-sys.exit()
+if __name__ == '__main__':
+    main()
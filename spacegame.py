@@ -1,15 +1,31 @@
+import os
+
+# pygame greets on stdout at import, which would corrupt a --capture -
+# stream; the variable has to be set before the first import
+os.environ.setdefault('PYGAME_HIDE_SUPPORT_PROMPT', '1')
+
 import pygame
 import random
-import math
 import sys
+import time
+import argparse
 
-# Initialize pygame
-pygame.init()
+import numpy as np
+
+from engine.capture import add_capture_arguments, capture_from_args
+from engine.dirtyrect import DirtyRectRenderer
+from engine.display import get_font, get_screen, shutdown
+from engine.entities import EntityStore, EntityView
+from engine.profiler import FrameProfiler
+from engine.replay import InputBits, Replay, ReplayRecorder, state_checksum
+from engine.spatial import close_pairs, match_first
+from engine.sprites import SpriteCache
+from engine.starfield import Starfield
+from engine.textcache import TextCache
+from engine.timestep import FixedTimestep, lerp
 
 # Screen dimensions
 WIDTH, HEIGHT = 800, 600
-screen = pygame.display.set_mode((WIDTH, HEIGHT))
-pygame.display.set_caption("Space Battle")
 
 # Colors
 BACKGROUND = (10, 10, 30)
@@ -19,11 +35,35 @@ BULLET_COLOR = (255, 255, 100)
 UI_COLOR = (200, 200, 255)
 STAR_COLORS = [(200, 200, 255), (255, 255, 200), (200, 255, 200)]
 
+# Simulation steps per second; every speed and timer below is per step
+STEP_RATE = 60
+
+# Entity and collision parameters
+BULLET_RADIUS = 4
+BULLET_SPEED = 7
+ENEMY_SIZE = 30
+PLAYER_HIT_RADIUS = 20
+COLLISION_CELL_SIZE = 40
+STAR_COUNT = 100
+
+# Difficulty: steps between enemy spawns and the range of enemy speeds
+SPAWN_INTERVAL = 30
+ENEMY_SPEED = (1.0, 3.0)
+
+# Input of one simulation step: held keys, then keys pressed since the last step
+INPUTS = InputBits(held=(pygame.K_LEFT, pygame.K_RIGHT, pygame.K_UP, pygame.K_DOWN, pygame.K_SPACE),
+                   pressed=(pygame.K_SPACE, pygame.K_r))
+
+# Main loop phases timed by the frame profiler
+PHASES = ('events', 'update', 'collisions', 'draw', 'present', 'capture')
+
 # Player class
 class Player:
     def __init__(self):
         self.x = WIDTH // 2
         self.y = HEIGHT - 60
+        self.prev_x = self.x
+        self.prev_y = self.y
         self.width = 40
         self.height = 30
         self.speed = 5
@@ -31,16 +71,8 @@ class Player:
         self.lives = 3
         self.score = 0
 
-    def draw(self):
-        # Draw the player ship
-        pygame.draw.polygon(screen, PLAYER_COLOR, [
-            (self.x, self.y - self.height//2),
-            (self.x - self.width//2, self.y + self.height//2),
-            (self.x + self.width//2, self.y + self.height//2)
-        ])
-        # Draw engine glow
-        pygame.draw.rect(screen, (0, 150, 255), (self.x - 10, self.y + self.height//2, 20, 10))
-        pygame.draw.rect(screen, (0, 100, 255), (self.x - 5, self.y + self.height//2 + 10, 10, 5))
+    def draw(self, surface, alpha=1.0):
+        return SPRITES.draw(surface, 'player', lerp(self.prev_x, self.x, alpha), lerp(self.prev_y, self.y, alpha))
 
     def move(self, keys):
         if keys[pygame.K_LEFT] and self.x > self.width//2:
@@ -52,190 +84,445 @@ class Player:
         if keys[pygame.K_DOWN] and self.y < HEIGHT - self.height:
             self.y += self.speed
 
-    def shoot(self):
+    def shoot(self, bullets):
         if self.shoot_cooldown <= 0:
-            bullets.append(Bullet(self.x, self.y - self.height//2))
+            y = self.y - self.height//2
+            bullets.add(x=self.x, y=y, prev_y=y, speed=BULLET_SPEED, radius=BULLET_RADIUS)
             self.shoot_cooldown = 15
 
     def update(self):
         if self.shoot_cooldown > 0:
             self.shoot_cooldown -= 1
 
-# Bullet class
-class Bullet:
-    def __init__(self, x, y):
-        self.x = x
-        self.y = y
-        self.radius = 4
-        self.speed = 7
+# Bullet class, a view into the bullet store
+class Bullet(EntityView):
+    __slots__ = ()
 
-    def draw(self):
-        pygame.draw.circle(screen, BULLET_COLOR, (self.x, self.y), self.radius)
-        pygame.draw.circle(screen, (255, 255, 200), (self.x, self.y), self.radius//2)
+    def draw(self, surface):
+        return SPRITES.draw(surface, 'bullet', self.x, self.y)
 
-    def update(self):
-        self.y -= self.speed
-        return self.y > 0
+# Enemy class, a view into the enemy store
+class Enemy(EntityView):
+    __slots__ = ()
+    width = ENEMY_SIZE
+    height = ENEMY_SIZE
+    color = ENEMY_COLOR
 
-# Enemy class
-class Enemy:
-    def __init__(self):
-        self.x = random.randint(30, WIDTH - 30)
-        self.y = random.randint(-100, -30)
-        self.width = 30
-        self.height = 30
-        self.speed = random.uniform(1.0, 3.0)
-        self.color = ENEMY_COLOR
-
-    def draw(self):
-        # Draw enemy ship
-        pygame.draw.polygon(screen, self.color, [
-            (self.x, self.y + self.height//2),
-            (self.x - self.width//2, self.y - self.height//2),
-            (self.x + self.width//2, self.y - self.height//2)
-        ])
-        # Draw enemy details
-        pygame.draw.circle(screen, (200, 0, 0), (self.x, self.y), 8)
-        pygame.draw.rect(screen, (150, 0, 0), (self.x - 15, self.y + 10, 30, 5))
+    def draw(self, surface):
+        return SPRITES.draw(surface, 'enemy', self.x, self.y, self.color)
 
-    def update(self):
-        self.y += self.speed
-        return self.y < HEIGHT + 30
+# Sprite painters; each entity type is rasterized once into the sprite cache
+def paint_player(surface, x, y, variant):
+    width, height = 40, 30
+    # Draw the player ship
+    pygame.draw.polygon(surface, PLAYER_COLOR, [
+        (x, y - height//2),
+        (x - width//2, y + height//2),
+        (x + width//2, y + height//2)
+    ])
+    # Draw engine glow
+    pygame.draw.rect(surface, (0, 150, 255), (x - 10, y + height//2, 20, 10))
+    pygame.draw.rect(surface, (0, 100, 255), (x - 5, y + height//2 + 10, 10, 5))
 
-# Star background
-class Star:
-    def __init__(self):
-        self.x = random.randint(0, WIDTH)
-        self.y = random.randint(0, HEIGHT)
-        self.size = random.randint(1, 3)
-        self.speed = random.uniform(0.2, 0.8)
-        self.color = random.choice(STAR_COLORS)
-        self.brightness = random.randint(150, 255)
+def paint_bullet(surface, x, y, variant):
+    pygame.draw.circle(surface, BULLET_COLOR, (x, y), BULLET_RADIUS)
+    pygame.draw.circle(surface, (255, 255, 200), (x, y), BULLET_RADIUS//2)
 
-    def draw(self):
-        pygame.draw.circle(screen, self.color, (self.x, self.y), self.size)
+def paint_enemy(surface, x, y, color):
+    size = ENEMY_SIZE
+    # Draw enemy ship
+    pygame.draw.polygon(surface, color, [
+        (x, y + size//2),
+        (x - size//2, y - size//2),
+        (x + size//2, y - size//2)
+    ])
+    # Draw enemy details
+    pygame.draw.circle(surface, (200, 0, 0), (x, y), 8)
+    pygame.draw.rect(surface, (150, 0, 0), (x - 15, y + 10, 30, 5))
+
+SPRITES = SpriteCache()
+TEXT = TextCache()
+SPRITES.register('player', (41, 46), (20, 15), paint_player)
+SPRITES.register('bullet', (2 * BULLET_RADIUS + 1, 2 * BULLET_RADIUS + 1), (BULLET_RADIUS, BULLET_RADIUS), paint_bullet)
+SPRITES.register('enemy', (ENEMY_SIZE + 1, ENEMY_SIZE + 1), (ENEMY_SIZE//2, ENEMY_SIZE//2), paint_enemy)
+
+# Scripted input for headless runs: hold fire and sweep across the screen
+class AutopilotKeys:
+    def __init__(self, seed=None):
+        self.random = random.Random(seed)
+        self.frame = 0
+        self.direction = pygame.K_LEFT
+
+    def advance(self):
+        self.frame += 1
+        if self.frame % 90 == 0:
+            self.direction = self.random.choice([pygame.K_LEFT, pygame.K_RIGHT])
+
+    def __getitem__(self, key):
+        return key == pygame.K_SPACE or key == self.direction
+
+    def inputs(self, game):
+        # Next step's input mask; restarts as soon as the game is over
+        self.advance()
+        return INPUTS.encode(self, (pygame.K_r,) if game.game_over else ())
+
+# Game state and simulation
+class Game:
+    def __init__(self, seed=None, star_count=STAR_COUNT, profiler=None):
+        self.profiler = profiler or FrameProfiler(PHASES)
+        # All randomness goes through these generators so a seed fixes the run
+        self.random = random.Random(seed)
+        self.star_random = np.random.default_rng(seed)
+        self.starfield = Starfield(WIDTH, HEIGHT, STAR_COLORS, BACKGROUND, star_count, rng=self.star_random)
+        # prev_y holds the position before the last step, for interpolation
+        self.bullets = EntityStore(Bullet, prev_y=np.float64)
+        self.enemies = EntityStore(Enemy, prev_y=np.float64)
+        self.reset()
+
+    def reset(self):
+        self.player = Player()
+        self.bullets.clear()
+        self.enemies.clear()
+        self.game_over = False
+        self.spawn_timer = 0
+        # Episode statistics
+        self.steps = 0
+        self.spawned = 0
+        self.killed = 0
+
+    def spawn_enemy(self):
+        x = self.random.randint(30, WIDTH - 30)
+        y = self.random.randint(-100, -30)
+        self.enemies.add(x=x, y=y, prev_y=y,
+                         speed=self.random.uniform(*ENEMY_SPEED), radius=ENEMY_SIZE//2)
+        self.spawned += 1
+
+    def handle_key(self, key):
+        if key == pygame.K_SPACE and not self.game_over:
+            self.player.shoot(self.bullets)
+        if key == pygame.K_r and self.game_over:
+            self.reset()
+
+    def step(self, inputs):
+        # One step from a packed input mask; live play, the autopilot and
+        # replays all come through here
+        for key in INPUTS.events(inputs):
+            self.handle_key(key)
+        self.update(INPUTS.keys(inputs))
+
+    def checksum(self):
+        # Digest of the simulation state, compared at the end of a replay
+        player = self.player
+        bullets = self.bullets
+        enemies = self.enemies
+        return state_checksum(player.x, player.y, player.lives, player.score, player.shoot_cooldown,
+                              self.game_over, self.spawn_timer, self.random.getstate(),
+                              bullets.x, bullets.y, enemies.x, enemies.y, enemies.speed)
+
+    def update(self, keys):
+        # Advance the simulation by one fixed step
+        player = self.player
+        bullets = self.bullets
+        enemies = self.enemies
+
+        # Remember where everything was for interpolated drawing
+        player.prev_x = player.x
+        player.prev_y = player.y
+        bullets.prev_y = bullets.y
+        enemies.prev_y = enemies.y
+        if self.game_over:
+            self.profiler.lap('update')
+            return
+
+        self.steps += 1
 
-    def update(self):
-        self.y += self.speed
-        if self.y > HEIGHT:
-            self.y = 0
-            self.x = random.randint(0, WIDTH)
-
-# Create game objects
-player = Player()
-bullets = []
-enemies = []
-stars = [Star() for _ in range(100)]
-
-# Game variables
-font = pygame.font.SysFont(None, 36)
-game_over = False
-spawn_timer = 0
-
-# Main game loop
-clock = pygame.time.Clock()
-while True:
-    # Event handling
-    for event in pygame.event.get():
-        if event.type == pygame.QUIT:
-            pygame.quit()
-            sys.exit()
-        if event.type == pygame.KEYDOWN:
-            if event.key == pygame.K_SPACE and not game_over:
-                player.shoot()
-            if event.key == pygame.K_r and game_over:
-                # Reset game
-                player = Player()
-                bullets = []
-                enemies = []
-                game_over = False
-                spawn_timer = 0
-
-    if not game_over:
         # Player movement
-        keys = pygame.key.get_pressed()
         player.move(keys)
         player.update()
 
         # Shooting
         if keys[pygame.K_SPACE]:
-            player.shoot()
+            player.shoot(bullets)
 
         # Spawn enemies
-        spawn_timer += 1
-        if spawn_timer >= 30:  # Spawn enemy every 30 frames
-            enemies.append(Enemy())
-            spawn_timer = 0
-
-        # Update bullets
-        for bullet in bullets[:]:
-            if not bullet.update():
-                bullets.remove(bullet)
-
-        # Update enemies
-        for enemy in enemies[:]:
-            if not enemy.update():
-                enemies.remove(enemy)
-
-        # Update stars
-        for star in stars:
-            star.update()
-
-        # Collision detection
-        for bullet in bullets[:]:
-            for enemy in enemies[:]:
-                # Simple distance-based collision
-                distance = math.sqrt((bullet.x - enemy.x)**2 + (bullet.y - enemy.y)**2)
-                if distance < bullet.radius + enemy.width//2:
-                    bullets.remove(bullet)
-                    enemies.remove(enemy)
-                    player.score += 10
-                    break
+        self.spawn_timer += 1
+        if self.spawn_timer >= SPAWN_INTERVAL:
+            self.spawn_enemy()
+            self.spawn_timer = 0
+
+        # Move everything as batch array operations
+        bullets.y -= bullets.speed
+        bullets.alive &= bullets.y > 0
+        enemies.y += enemies.speed
+        enemies.alive &= enemies.y < HEIGHT + 30
+        self.starfield.scroll()
+        self.profiler.lap('update')
+
+        # Collision detection over all close bullet/enemy pairs at once
+        bullet_hits, enemy_hits = close_pairs(bullets.x, bullets.y, bullets.radius,
+                                              enemies.x, enemies.y, enemies.radius,
+                                              COLLISION_CELL_SIZE)
+        # Pairs are ordered by bullet, then enemy, so each bullet takes the
+        # first enemy in slot order that is still alive
+        enemy_alive = enemies.alive
+        live = bullets.alive[bullet_hits] & enemy_alive[enemy_hits]
+        bullet_hits, enemy_hits = match_first(bullet_hits[live], enemy_hits[live])
+        bullets.alive[bullet_hits] = False
+        enemy_alive[enemy_hits] = False
+        player.score += 10 * len(bullet_hits)
+        self.killed += len(enemy_hits)
 
         # Check player-enemy collision
-        for enemy in enemies[:]:
-            distance = math.sqrt((player.x - enemy.x)**2 + (player.y - enemy.y)**2)
-            if distance < 20 + enemy.width//2:
-                enemies.remove(enemy)
-                player.lives -= 1
-                if player.lives <= 0:
-                    game_over = True
-
-    # Drawing
-    screen.fill(BACKGROUND)
-    
-    # Draw stars
-    for star in stars:
-        star.draw()
-    
-    # Draw player
-    player.draw()
-    
-    # Draw bullets
-    for bullet in bullets:
-        bullet.draw()
-    
-    # Draw enemies
-    for enemy in enemies:
-        enemy.draw()
-    
-    # Draw UI
-    score_text = font.render(f"Score: {player.score}", True, UI_COLOR)
-    lives_text = font.render(f"Lives: {player.lives}", True, UI_COLOR)
-    screen.blit(score_text, (10, 10))
-    screen.blit(lives_text, (WIDTH - 120, 10))
-    
-    # Draw game over screen
-    if game_over:
-        game_over_text = font.render("GAME OVER", True, (255, 50, 50))
-        restart_text = font.render("Press R to Restart", True, UI_COLOR)
-        screen.blit(game_over_text, (WIDTH//2 - game_over_text.get_width()//2, HEIGHT//2 - 30))
-        screen.blit(restart_text, (WIDTH//2 - restart_text.get_width()//2, HEIGHT//2 + 20))
-    
-    # Draw instructions
-    if not game_over:
-        controls_text = font.render("Arrow Keys: Move | Space: Shoot", True, (150, 150, 200))
-        screen.blit(controls_text, (WIDTH//2 - controls_text.get_width()//2, HEIGHT - 40))
-    
-    pygame.display.flip()
-    clock.tick(60)
+        reach = PLAYER_HIT_RADIUS + enemies.radius
+        rammed = enemy_alive & ((enemies.x - player.x)**2 + (enemies.y - player.y)**2 < reach * reach)
+        crashes = int(np.count_nonzero(rammed))
+        if crashes:
+            enemy_alive &= ~rammed
+            player.lives -= crashes
+            if player.lives <= 0:
+                self.game_over = True
+        self.profiler.lap('collisions')
+
+        # Remove destroyed and off-screen entities in a single pass
+        bullets.compact()
+        enemies.compact()
+        self.profiler.lap('update')
+
+    def draw(self, renderer, font, alpha=1.0):
+        # ``alpha`` blends the last two steps (see engine.timestep)
+        surface = renderer.screen
+        mark = renderer.mark
+        if self.game_over:
+            # Nothing moves any more, the stars included
+            alpha = 1.0
+        if renderer.enabled:
+            # Dirty rects need a still background, so the stars stop scrolling
+            if renderer.background is None:
+                renderer.set_background(self.starfield.snapshot())
+            renderer.begin()
+        else:
+            # Draw the background and stars
+            self.starfield.draw(surface, alpha)
+
+        # Draw player
+        mark(self.player.draw(surface, alpha))
+
+        # Draw bullets and enemies, one batched blit per layer
+        bullets = self.bullets
+        enemies = self.enemies
+        renderer.mark_all(SPRITES.draw_batch(surface, 'bullet', bullets.x, lerp(bullets.prev_y, bullets.y, alpha),
+                                             doreturn=renderer.enabled))
+        renderer.mark_all(SPRITES.draw_batch(surface, 'enemy', enemies.x, lerp(enemies.prev_y, enemies.y, alpha),
+                                             ENEMY_COLOR, doreturn=renderer.enabled))
+
+        # Draw UI
+        mark(TEXT.draw_labelled(surface, font, "Score: ", self.player.score, UI_COLOR, (10, 10)))
+        mark(TEXT.draw_labelled(surface, font, "Lives: ", self.player.lives, UI_COLOR, (WIDTH - 120, 10)))
+
+        # Draw game over screen
+        if self.game_over:
+            game_over_text = TEXT.render(font, "GAME OVER", (255, 50, 50))
+            restart_text = TEXT.render(font, "Press R to Restart", UI_COLOR)
+            mark(surface.blit(game_over_text, (WIDTH//2 - game_over_text.get_width()//2, HEIGHT//2 - 30)))
+            mark(surface.blit(restart_text, (WIDTH//2 - restart_text.get_width()//2, HEIGHT//2 + 20)))
+
+        # Draw instructions
+        if not self.game_over:
+            controls_text = TEXT.render(font, "Arrow Keys: Move | Space: Shoot", (150, 150, 200))
+            mark(surface.blit(controls_text, (WIDTH//2 - controls_text.get_width()//2, HEIGHT - 40)))
+
+# The game as a program: simulation, window and main loop
+class SpaceGame:
+    """Importable entry point with ``step()``, ``render()`` and ``run()``.
+
+    The display and fonts are created on the first ``render()``, so a
+    SpaceGame can be built and stepped without opening a window. Only the
+    display and font modules of pygame are ever initialized.
+    """
+
+    def __init__(self, seed=None, star_count=STAR_COUNT, profiler=None, dirty=False, fps=0, recorder=None,
+                 capture=None):
+        self.game = Game(seed, star_count, profiler)
+        self.profiler = self.game.profiler
+        self.dirty = dirty
+        self.fps = fps
+        self.recorder = recorder
+        self.capture = capture
+        self._renderer = None
+
+    @property
+    def renderer(self):
+        if self._renderer is None:
+            self._renderer = DirtyRectRenderer(get_screen((WIDTH, HEIGHT), "Space Battle"), enabled=self.dirty)
+        return self._renderer
+
+    def step(self, inputs):
+        # One simulation step from a packed input mask (see INPUTS)
+        if self.recorder is not None:
+            self.recorder.append(inputs)
+        self.game.step(inputs)
+
+    def render(self, alpha=1.0):
+        # Draw the current state and put it on screen
+        renderer = self.renderer
+        profiler = self.profiler
+        self.game.draw(renderer, get_font(36), alpha)
+        if profiler.overlay:
+            renderer.mark(profiler.draw_overlay(renderer.screen, TEXT, get_font(22), (10, 50)))
+        profiler.lap('draw')
+        renderer.present()
+        profiler.lap('present')
+        if self.capture is not None:
+            self.capture.capture(renderer.screen)
+            profiler.lap('capture')
+
+    def simulate(self, source, frames, render=True):
+        # Run fixed steps as fast as possible with input from ``source`` (the
+        # autopilot or a replay); returns simulated frames per second and the
+        # average number of pixels uploaded per frame
+        game = self.game
+        profiler = self.profiler
+        pixels = 0
+        start = time.perf_counter()
+        for _ in range(frames):
+            profiler.start_frame()
+            inputs = source.inputs(game)
+            profiler.lap('events')
+            self.step(inputs)
+            if render:
+                self.render()
+                pixels += self.renderer.pixels
+            profiler.end_frame()
+        return frames / (time.perf_counter() - start), pixels / frames
+
+    def run(self, frames=None):
+        # The interactive loop: fixed simulation steps, rendering as often as
+        # the machine allows. Returns when the window is closed, or after
+        # ``frames`` frames if given.
+        renderer = self.renderer
+        profiler = self.profiler
+        clock = pygame.time.Clock()
+        timestep = FixedTimestep(STEP_RATE)
+        pressed = []
+        frame = 0
+        while frames is None or frame < frames:
+            frame += 1
+            profiler.start_frame()
+
+            # Event handling; game keys are queued for the next simulation step
+            for event in pygame.event.get():
+                if event.type == pygame.QUIT:
+                    return
+                if event.type == pygame.KEYDOWN:
+                    if event.key == pygame.K_F2:
+                        renderer.toggle()
+                    if event.key == pygame.K_F3:
+                        profiler.toggle()
+                    pressed.append(event.key)
+            keys = pygame.key.get_pressed()
+            profiler.lap('events')
+
+            for _ in range(timestep.advance()):
+                self.step(INPUTS.encode(keys, pressed))
+                pressed.clear()
+            self.render(timestep.alpha)
+            profiler.end_frame()
+            clock.tick(self.fps)
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Space Battle")
+    parser.add_argument('--headless', action='store_true',
+                        help='use the SDL dummy video driver and let the autopilot play, uncapped')
+    parser.add_argument('--seed', type=int, default=None, help='seed for every random generator')
+    parser.add_argument('--frames', type=int, default=3000, help='frames to simulate when headless')
+    parser.add_argument('--stars', type=int, default=STAR_COUNT, help='number of background stars')
+    parser.add_argument('--dirty', action='store_true',
+                        help='start with dirty-rect rendering (toggle in game with F2)')
+    parser.add_argument('--fps', type=int, default=0,
+                        help='cap on rendered frames per second (default: uncapped); '
+                             f'the simulation always runs at {STEP_RATE} steps/s')
+    parser.add_argument('--no-render', action='store_true', help='skip drawing when headless')
+    parser.add_argument('--profile', action='store_true',
+                        help='time each phase of the frame (toggle the overlay in game with F3)')
+    parser.add_argument('--profile-log', metavar='PATH',
+                        help='stream per-frame phase timings to PATH (.csv, or .jsonl for JSON lines)')
+    parser.add_argument('--record', metavar='PATH', help='record the seed and every input to a replay file')
+    parser.add_argument('--replay', metavar='PATH',
+                        help='play a replay file back headless and uncapped, then check its final state')
+    parser.add_argument('--bench', action='store_true',
+                        help='headless benchmark: frame rate and uploaded pixels with and without drawing')
+    add_capture_arguments(parser)
+    return parser.parse_args(argv)
+
+def close_capture(capture):
+    # Finish writing captured frames; the report goes to stderr as stdout may carry the frames
+    if capture is not None:
+        capture.close()
+        print(capture.summary(), file=sys.stderr)
+
+def main(argv=None):
+    args = parse_args(argv)
+    headless = args.headless or args.bench or args.replay is not None
+    if headless:
+        os.environ['SDL_VIDEODRIVER'] = 'dummy'
+
+    # The overlay (--profile, F3) and the log each turn the timing on
+    profiler = FrameProfiler(PHASES, enabled=args.profile_log is not None)
+    profiler.overlay = args.profile
+    if args.profile_log:
+        profiler.open_log(args.profile_log)
+
+    if args.bench:
+        seed = 0 if args.seed is None else args.seed
+        print(f"frames: {args.frames}  seed: {seed}  stars: {args.stars}")
+        print(f"{'mode':<16} {'frames/s':>10} {'ms/frame':>9} {'pixels/frame':>13}")
+        for mode, render, dirty, profiled in (('simulation only', False, False, False),
+                                              ('full redraw', True, False, False),
+                                              ('dirty rects', True, True, False),
+                                              ('profiled', True, False, True)):
+            app = SpaceGame(seed, args.stars, FrameProfiler(PHASES, enabled=profiled), dirty)
+            fps, pixels = app.simulate(AutopilotKeys(seed), args.frames, render)
+            print(f"{mode:<16} {fps:10.1f} {1000.0 / fps:9.3f} {pixels:13.0f}")
+        print()
+        print(app.profiler.summary())
+        shutdown()
+        return
+
+    if args.replay:
+        replay = Replay.load(args.replay)
+        capture = capture_from_args(args)
+        app = SpaceGame(replay.seed, args.stars, profiler, args.dirty, capture=capture)
+        fps, pixels = app.simulate(replay, len(replay), not args.no_render)
+        close_capture(capture)
+        checksum = app.game.checksum()
+        matched = replay.verify(checksum)
+        print(f"{len(replay)} frames at {fps:.1f} frames/s, {pixels:.0f} pixels/frame, score {app.game.player.score}")
+        print(f"replay {'OK' if matched else 'MISMATCH'}: seed {replay.seed}, checksum {checksum.hex()}")
+        profiler.close()
+        shutdown()
+        sys.exit(0 if matched else 1)
+
+    # A recording needs a known seed to start from
+    seed = args.seed
+    if args.record and seed is None:
+        seed = random.randrange(2**32)
+    recorder = ReplayRecorder(seed, INPUTS.bits) if args.record else None
+    capture = capture_from_args(args)
+    app = SpaceGame(seed, args.stars, profiler, args.dirty, args.fps, recorder, capture)
+    if headless:
+        fps, pixels = app.simulate(AutopilotKeys(seed), args.frames, not args.no_render)
+        print(f"{args.frames} frames at {fps:.1f} frames/s, {pixels:.0f} pixels/frame, score {app.game.player.score}")
+        if not args.no_render:
+            print("text cache: " + ", ".join(f"{name} {value}" for name, value in TEXT.stats().items()))
+        if profiler.frames:
+            print(profiler.summary())
+    else:
+        app.run()
+    if recorder is not None:
+        recorder.save(args.record, app.game.checksum())
+    close_capture(capture)
+    profiler.close()
+    shutdown()
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,157 @@
+"""Vectorized environment API over spacegame for training agents.
+
+``SpaceVecEnv(count)`` steps ``count`` games in lockstep. An action is a
+(move, shoot) pair per game: ``move`` indexes MOVES (0 stands still) and
+``shoot`` holds the fire button. ``step(actions)`` returns observations,
+rewards, dones and infos in the style of a gym ``VecEnv``; a game that
+ends is reset on the spot and its final score reported in its info.
+
+Observations are written into one preallocated array that is reused on
+every call, so copy it to keep it. With ``observation='state'`` each row
+is the player followed by the nearest enemies and bullets, relative to
+the player and scaled to about -1..1 (see STATE_SIZE). With
+``observation='pixels'`` each game is drawn offscreen and sampled every
+``downscale`` pixels through a ``pygame.surfarray`` view of the canvas,
+giving (height, width, 3) uint8 frames.
+"""
+import numpy as np
+import pygame
+
+import spacegame
+from engine.dirtyrect import DirtyRectRenderer
+from engine.display import get_font
+
+# Held keys for each move: none, then the four directions and the diagonals
+MOVES = (
+    (),
+    (pygame.K_LEFT,), (pygame.K_RIGHT,), (pygame.K_UP,), (pygame.K_DOWN,),
+    (pygame.K_LEFT, pygame.K_UP), (pygame.K_RIGHT, pygame.K_UP),
+    (pygame.K_LEFT, pygame.K_DOWN), (pygame.K_RIGHT, pygame.K_DOWN),
+)
+MOVE_MASKS = np.array([spacegame.INPUTS.encode(keys) for keys in
+                       ({key: key in move for key in spacegame.INPUTS.held} for move in MOVES)], np.int64)
+SHOOT_MASK = spacegame.INPUTS.encode({key: key == pygame.K_SPACE for key in spacegame.INPUTS.held})
+
+# State vector: player x, y, lives, cooldown; then per enemy dx, dy, speed,
+# present; then per bullet dx, dy, present
+NEAREST_ENEMIES = 16
+NEAREST_BULLETS = 8
+PLAYER_FEATURES = 4
+ENEMY_FEATURES = 4
+BULLET_FEATURES = 3
+STATE_SIZE = PLAYER_FEATURES + NEAREST_ENEMIES * ENEMY_FEATURES + NEAREST_BULLETS * BULLET_FEATURES
+
+
+def nearest(xs, ys, x, y, count):
+    # Offsets of the ``count`` entities closest to (x, y), closest first
+    dx = xs - x
+    dy = ys - y
+    if len(dx) > count:
+        distance = dx * dx + dy * dy
+        order = np.argpartition(distance, count - 1)[:count]
+        order = order[np.argsort(distance[order])]
+    else:
+        order = np.argsort(dx * dx + dy * dy)
+    return order, dx[order], dy[order]
+
+
+class SpaceVecEnv:
+    """``count`` spacegame instances stepped together on batched actions."""
+
+    def __init__(self, count, seed=0, observation='state', downscale=4, max_steps=None,
+                 star_count=0):
+        if observation not in ('state', 'pixels'):
+            raise ValueError(f"unknown observation type {observation!r}")
+        self.count = count
+        self.observation = observation
+        self.downscale = downscale
+        self.max_steps = max_steps
+        self.games = [spacegame.Game(seed + index, star_count) for index in range(count)]
+        self.scores = np.zeros(count, np.int64)
+        self.rewards = np.zeros(count, np.float32)
+        self.dones = np.zeros(count, np.bool_)
+        if observation == 'state':
+            self.observations = np.zeros((count, STATE_SIZE), np.float32)
+        else:
+            self.canvas = pygame.Surface((spacegame.WIDTH, spacegame.HEIGHT), depth=32)
+            self.renderer = DirtyRectRenderer(self.canvas)
+            height = -(-spacegame.HEIGHT // downscale)
+            width = -(-spacegame.WIDTH // downscale)
+            self.observations = np.zeros((count, height, width, 3), np.uint8)
+
+    def reset(self):
+        for index, game in enumerate(self.games):
+            game.reset()
+            self.scores[index] = 0
+            self.observe(index)
+        return self.observations
+
+    def step(self, actions):
+        # ``actions`` is (count, 2): move index and shoot flag per game
+        actions = np.asarray(actions)
+        masks = MOVE_MASKS[actions[:, 0]] | np.where(actions[:, 1] != 0, SHOOT_MASK, 0)
+        rewards = self.rewards
+        dones = self.dones
+        scores = self.scores
+        infos = [{} for _ in range(self.count)]
+        for index, game in enumerate(self.games):
+            game.step(int(masks[index]))
+            score = game.player.score
+            rewards[index] = score - scores[index]
+            scores[index] = score
+            truncated = self.max_steps is not None and game.steps >= self.max_steps
+            done = game.game_over or truncated
+            dones[index] = done
+            if done:
+                infos[index] = {'score': score, 'steps': game.steps, 'truncated': truncated and not game.game_over}
+                game.reset()
+                scores[index] = 0
+            self.observe(index)
+        return self.observations, rewards, dones, infos
+
+    def observe(self, index):
+        if self.observation == 'state':
+            self.observe_state(index)
+        else:
+            self.observe_pixels(index)
+
+    def observe_state(self, index):
+        game = self.games[index]
+        player = game.player
+        row = self.observations[index]
+        row[:] = 0
+        row[0] = player.x / spacegame.WIDTH
+        row[1] = player.y / spacegame.HEIGHT
+        row[2] = player.lives / 3
+        row[3] = player.shoot_cooldown / 15
+
+        # Nearest enemies, offsets scaled by the screen size
+        enemies = game.enemies
+        order, dx, dy = nearest(enemies.x, enemies.y, player.x, player.y, NEAREST_ENEMIES)
+        count = len(order)
+        block = row[PLAYER_FEATURES:PLAYER_FEATURES + NEAREST_ENEMIES * ENEMY_FEATURES].reshape(-1, ENEMY_FEATURES)
+        block[:count, 0] = dx / spacegame.WIDTH
+        block[:count, 1] = dy / spacegame.HEIGHT
+        block[:count, 2] = enemies.speed[order] / spacegame.ENEMY_SPEED[1]
+        block[:count, 3] = 1
+
+        # Nearest bullets
+        bullets = game.bullets
+        order, dx, dy = nearest(bullets.x, bullets.y, player.x, player.y, NEAREST_BULLETS)
+        count = len(order)
+        block = row[STATE_SIZE - NEAREST_BULLETS * BULLET_FEATURES:].reshape(-1, BULLET_FEATURES)
+        block[:count, 0] = dx / spacegame.WIDTH
+        block[:count, 1] = dy / spacegame.HEIGHT
+        block[:count, 2] = 1
+
+    def observe_pixels(self, index):
+        # Draw offscreen, then copy every ``downscale``-th pixel out of a
+        # surfarray view of the canvas; the view is released before the next draw
+        self.games[index].draw(self.renderer, get_font(36))
+        step = self.downscale
+        view = pygame.surfarray.pixels3d(self.canvas)
+        np.copyto(self.observations[index], view[::step, ::step].transpose(1, 0, 2))
+        del view
+
+    def close(self):
+        self.games = []
@@ -0,0 +1,47 @@
+import random
+
+from engine.cells import FreeCells
+
+
+def check(free, reference, size):
+    assert len(free) == len(reference)
+    assert set(free.cells[:free.count]) == reference
+    for cell in range(size):
+        assert (cell in free) == (cell in reference)
+
+
+def test_matches_a_set_over_random_runs():
+    rng = random.Random(3)
+    size = 50
+    free = FreeCells(size)
+    reference = set(range(size))
+    check(free, reference, size)
+    for _ in range(5000):
+        cell = rng.randrange(size)
+        if cell in reference:
+            free.remove(cell)
+            reference.discard(cell)
+        else:
+            free.add(cell)
+            reference.add(cell)
+        check(free, reference, size)
+        picked = free.choice(rng)
+        assert picked is None if not reference else picked in reference
+
+
+def test_choice_covers_every_free_cell():
+    rng = random.Random(1)
+    free = FreeCells(20)
+    for cell in range(0, 20, 2):
+        free.remove(cell)
+    assert {free.choice(rng) for _ in range(500)} == set(range(1, 20, 2))
+
+
+def test_choice_is_none_on_a_full_grid():
+    free = FreeCells(4)
+    for cell in (2, 0, 3, 1):
+        free.remove(cell)
+    assert len(free) == 0
+    assert free.choice() is None
+    free.add(3)
+    assert free.choice() == 3
@@ -0,0 +1,62 @@
+import random
+
+import pygame
+import pytest
+
+import snek
+from engine.cells import tour_start, tour_step
+
+DIRECTIONS = ((1, 0), (-1, 0), (0, 1), (0, -1))
+
+
+def free_cells(snake):
+    return set(snake.free.cells[:snake.free.count])
+
+
+def steer(game, rng):
+    # A random move that does not run into the wall or the body, if any
+    snake = game.snake
+    x, y = snake.head
+    safe = []
+    for dx, dy in DIRECTIONS:
+        if 0 <= x + dx < snake.cells_x and 0 <= y + dy < snake.cells_y:
+            cell = (y + dy) * snake.cells_x + x + dx
+            if cell in snake.free or (not snake.new_block and cell == snake.body[-1]):
+                safe.append((dx, dy))
+    snake.direction = pygame.Vector2(rng.choice(safe or DIRECTIONS))
+
+
+@pytest.mark.parametrize('seed', range(5))
+def test_food_never_on_the_body(seed):
+    random.seed(seed)
+    rng = random.Random(seed)
+    board = set(range(36))
+    for _ in range(60):
+        game = snek.Game(6, 6, ((2, 1), (1, 1), (0, 1)))
+        while game.game_active:
+            steer(game, rng)
+            game.update()
+            snake = game.snake
+            body = set(snake.body)
+            assert len(body) == len(snake.body)
+            assert free_cells(snake) == board - body
+            if game.game_active:
+                assert game.food.cell not in body
+
+
+def test_filling_the_board_ends_the_game():
+    random.seed(0)
+    game = snek.Game(4, 4, tour_start(3, 4, 4))
+    snake = game.snake
+    for _ in range(1000):
+        if not game.game_active:
+            break
+        x, y = snake.head
+        snake.direction = pygame.Vector2(tour_step(x, y, 4, 4))
+        game.update()
+    assert not game.game_active
+    assert not snake.crashed
+    assert len(snake.body) == 16
+    assert len(snake.free) == 0
+    assert game.food.cell is None
+    assert game.score == 14